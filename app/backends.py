@@ -0,0 +1,188 @@
+import collections
+import time
+
+import cv2
+import numpy as np
+
+from app.motion import SAMPLE_INTERVAL, ease_out_quad, sleep_until
+
+
+class PyAutoGUIBackend:
+    """
+    Mouse, keyboard and screen capture through pyautogui. pyautogui is imported when the
+    backend is created, so tools that use other backends do not need a display.
+    """
+    name = 'pyautogui'
+
+    def __init__(self):
+        import pyautogui
+        self._pyautogui = pyautogui
+
+    def position(self): return self._pyautogui.position()
+
+    def size(self): return self._pyautogui.size()
+
+    def move_to(self, x, y, duration=0):
+        self._pyautogui.moveTo(x, y, duration=duration, tween=self._pyautogui.easeOutQuad)
+
+    def set_position(self, x, y):
+        """Puts the cursor on (x, y) at once, skipping pyautogui's pause; trajectories call it per point."""
+        self._pyautogui.moveTo(x, y, _pause=False)
+
+    def click(self, duration=0): self._pyautogui.click(duration=duration)
+
+    def right_click(self): self._pyautogui.rightClick()
+
+    def press(self, key): self._pyautogui.press(key)
+
+    def write(self, text, interval=0): self._pyautogui.write(text, interval=interval)
+
+    def grab(self, region, conversion=cv2.COLOR_RGB2BGR):
+        """Captures region (x, y, w, h) and returns it as a BGR (or otherwise converted) array."""
+        return cv2.cvtColor(np.array(self._pyautogui.screenshot(region=region)), conversion)
+
+
+# pyautogui key names that differ from their X keysym names; f1-f24 and single characters map directly.
+X_KEY_NAMES = {
+    'enter': 'Return', 'return': 'Return', '\n': 'Return', 'tab': 'Tab', '\t': 'Tab', 'space': 'space', ' ': 'space',
+    'esc': 'Escape', 'escape': 'Escape', 'backspace': 'BackSpace', 'delete': 'Delete', 'del': 'Delete', 'insert': 'Insert',
+    'up': 'Up', 'down': 'Down', 'left': 'Left', 'right': 'Right', 'home': 'Home', 'end': 'End', 'pageup': 'Prior', 'pagedown': 'Next',
+    'shift': 'Shift_L', 'shiftleft': 'Shift_L', 'shiftright': 'Shift_R', 'ctrl': 'Control_L', 'ctrlleft': 'Control_L', 'ctrlright': 'Control_R',
+    'alt': 'Alt_L', 'altleft': 'Alt_L', 'altright': 'Alt_R', 'win': 'Super_L', 'capslock': 'Caps_Lock', 'printscreen': 'Print',
+}
+
+
+class XTestBackend:
+    """
+    Mouse and keyboard through the X server's XTEST extension, and capture through GetImage,
+    on one python-xlib connection (Linux/X11 only; Xvfb works). Unlike pyautogui there is no
+    PAUSE after each call: the only delays are key_hold (seconds each key stays down), click
+    hold durations and the interval passed to write(). write() with no interval sends the
+    whole text as one batch of key events and a single flush.
+    """
+    name = 'xtest'
+
+    def __init__(self, display=None, key_hold=0.0):
+        import Xlib.threaded # Makes the connection safe to share between the motion, loop and worker threads
+        from Xlib import X, XK, display as xdisplay
+        from Xlib.ext import xtest
+        self._X, self._XK, self._fake = X, XK, xtest.fake_input
+        self.display = xdisplay.Display(display)
+        if not self.display.has_extension('XTEST'): raise RuntimeError(f"X display {self.display.get_display_name()} has no XTEST extension")
+        self.root = self.display.screen().root
+        self.key_hold = key_hold
+        self._shift = self.display.keysym_to_keycode(XK.string_to_keysym('Shift_L'))
+
+    def position(self):
+        pointer = self.root.query_pointer(); return (pointer.root_x, pointer.root_y)
+
+    def size(self):
+        screen = self.display.screen(); return (screen.width_in_pixels, screen.height_in_pixels)
+
+    def set_position(self, x, y):
+        self._fake(self.display, self._X.MotionNotify, x=int(x), y=int(y)); self.display.flush()
+
+    def move_to(self, x, y, duration=0):
+        """Moves in a straight, eased line over duration seconds (the motion thread draws curved paths)."""
+        start, steps = self.position(), max(1, int(duration / SAMPLE_INTERVAL))
+        started = time.perf_counter()
+        for i in range(1, steps + 1):
+            u = ease_out_quad(i / steps)
+            sleep_until(started + duration * i / steps)
+            self.set_position(start[0] + (x - start[0]) * u, start[1] + (y - start[1]) * u)
+
+    def _button(self, button, hold):
+        self._fake(self.display, self._X.ButtonPress, button); self.display.flush()
+        if hold > 0: time.sleep(hold)
+        self._fake(self.display, self._X.ButtonRelease, button); self.display.flush()
+
+    def click(self, duration=0):
+        """Left click; duration is how long the button stays down."""
+        self._button(1, duration)
+
+    def right_click(self): self._button(3, 0)
+
+    def _keycode(self, key):
+        """(keycode, needs shift) for a pyautogui key name or a single character."""
+        name = X_KEY_NAMES.get(key if len(key) == 1 else key.lower())
+        if name is None: name = key.upper() if len(key) > 1 and key.lower().startswith('f') and key[1:].isdigit() else key
+        keysym = self._XK.string_to_keysym(name) if len(name) > 1 else ord(name) # Latin-1 characters are their own keysyms
+        for keycode, index in self.display.keysym_to_keycodes(keysym):
+            if index in (0, 1): return keycode, index == 1
+        raise ValueError(f"Key '{key}' is not on the X server's keyboard map")
+
+    def _key_events(self, key):
+        keycode, shifted = self._keycode(key)
+        events = [(self._X.KeyPress, keycode), (self._X.KeyRelease, keycode)]
+        return [(self._X.KeyPress, self._shift)] + events + [(self._X.KeyRelease, self._shift)] if shifted else events
+
+    def _send(self, events):
+        for event_type, keycode in events:
+            self._fake(self.display, event_type, keycode)
+            if self.key_hold > 0 and event_type == self._X.KeyPress: self.display.flush(); time.sleep(self.key_hold)
+        self.display.flush()
+
+    def press(self, key): self._send(self._key_events(key))
+
+    def write(self, text, interval=0):
+        if interval <= 0: self._send([event for char in text for event in self._key_events(char)]); return
+        for char in text: self._send(self._key_events(char)); time.sleep(interval)
+
+    def grab(self, region, conversion=cv2.COLOR_RGB2BGR):
+        x, y, w, h = region
+        image = self.root.get_image(x, y, w, h, self._X.ZPixmap, 0xffffffff)
+        bgr = np.frombuffer(image.data, np.uint8).reshape(h, w, 4)[:, :, :3] # 24-bit TrueColor arrives as BGRX
+        if conversion == cv2.COLOR_RGB2BGR: return bgr.copy()
+        return cv2.cvtColor(cv2.cvtColor(bgr, cv2.COLOR_BGR2RGB), conversion)
+
+
+class RecordingBackend:
+    """
+    Performs nothing: records every action with clock()'s time instead, and captures blank
+    frames. Used for simulations and dry runs; 'counts' tallies actions by kind and 'actions'
+    keeps the most recent ones as (time, kind, details) tuples.
+    """
+    name = 'recording'
+
+    def __init__(self, clock=time.time, screen_size=(1920, 1080), keep=10000):
+        self.clock = clock
+        self.screen_size = screen_size
+        self.counts = collections.Counter()
+        self.actions = collections.deque(maxlen=keep)
+        self._position = (0, 0)
+
+    def _record(self, kind, *details):
+        self.counts[kind] += 1; self.actions.append((self.clock(), kind, details))
+
+    def position(self): return self._position
+
+    def size(self): return self.screen_size
+
+    def move_to(self, x, y, duration=0): self._position = (x, y); self._record('move', x, y)
+
+    def set_position(self, x, y): self.move_to(x, y)
+
+    def click(self, duration=0): self._record('click', *self._position)
+
+    def right_click(self): self._record('right_click', *self._position)
+
+    def press(self, key): self._record('press', key)
+
+    def write(self, text, interval=0): self._record('write', text)
+
+    def grab(self, region, conversion=cv2.COLOR_RGB2BGR):
+        frame = np.zeros((region[3], region[2], 3), np.uint8)
+        return cv2.cvtColor(frame, conversion) if conversion in (cv2.COLOR_RGB2GRAY, cv2.COLOR_BGR2GRAY) else frame
+
+
+INPUT_BACKENDS = {'pyautogui': PyAutoGUIBackend, 'xtest': XTestBackend, 'recording': RecordingBackend}
+
+
+def create_backend(name='pyautogui', **options):
+    """
+    Creates the named input backend; options go to its constructor. Every backend provides
+    position(), size(), move_to(), set_position(), click(), right_click(), press(), write()
+    and grab(); see PyAutoGUIBackend.
+    """
+    if name not in INPUT_BACKENDS: raise ValueError(f"Unknown input backend '{name}'. Available: {', '.join(INPUT_BACKENDS)}")
+    return INPUT_BACKENDS[name](**options)
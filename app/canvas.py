@@ -4,121 +4,249 @@ import tkinter.font as tkfont
 import math
 
 class CanvasMixin:
+    # Retained-mode rendering with viewport culling: redraw_flowchart() lays out every step, note and
+    # edge into a spatial index (model coordinates) but only materializes canvas items for those that
+    # intersect the visible area plus VIEWPORT_MARGIN; _update_viewport() adds and deletes items as
+    # the view scrolls or resizes. Drags, selection changes, the marquee and the runtime highlight
+    # then only move, restyle or re-route the items involved, so a 5000 step chart costs about the
+    # same to interact with as one that fits on screen. Hit-testing and the marquee use the index.
+    VIEWPORT_MARGIN = 200 # Model units materialized beyond each edge of the view, so small scrolls add nothing
+    GRID_PAD = 4 # Grid cells laid beyond each edge of the view, see _draw_grid
+    ZOOM_SETTLE_MS = 150 # Quiet time after the last zoom wheel tick before the chart is laid out again, see _zoom_canvas
     def redraw_flowchart(self):
+        if self._zoom_after: self.root.after_cancel(self._zoom_after); self._zoom_after = None
         self.canvas.delete("all")
+        self._node_items = {} # Materialized step index -> its rectangle id
+        self._edges = [] # Every edge, see draw_connection; 'id' is its line while materialized
+        self._edges_by_node = {} # Step index -> edges starting or ending at it
+        self._scene.clear(); self._visible = set() # Index keys ('step', i), ('note', i), ('edge', n) and those materialized
+        self._highlight_item = None; self._marquee_item = None; self._grid_lines = []; self._grid_area = None
         self.canvas.config(bg=self.current_theme['canvas'])
-        
-        # --- NEW: Draw Grid ---
-        if self.grid_visible.get():
-            self._draw_grid()
-        # --- END NEW ---
 
-        for i in self.annotations: self.draw_annotation(i)
+        for i in range(len(self.annotations)): self._scene.insert(('note', i), self._item_box('note', i))
         if self.steps:
-            for i in range(len(self.steps)): self._calculate_node_size(i)
+            for i in range(len(self.steps)): self._calculate_node_size(i); self._scene.insert(('step', i), self._item_box('step', i))
             for i, step in enumerate(self.steps):
-                self.draw_connection(i, 'on_success_action', 'on_success_goto_step')
-                draw_timeout = False
-                # --- FIX: Added 'Movement Detect' to ensure its timeout arrow is drawn ---
-                if step.get('type') not in ['logical'] or step.get('logical_type') in ['Number', 'Wait', 'Movement Detect']:
-                    draw_timeout = True
-                if draw_timeout:
-                    self.draw_connection(i, 'on_timeout_action', 'on_timeout_goto_step')
-                if step.get('type') == 'logical' and step.get('logical_type') == 'Count':
-                    self.draw_connection(i, 'on_count_reached_action', 'on_count_reached_goto_step')
-
-            for i, step in enumerate(self.steps): self.draw_node(i)
-
-        all_items_bbox = self.canvas.bbox("all")
-        if all_items_bbox: self.canvas.config(scrollregion=(all_items_bbox[0]-50, all_items_bbox[1]-50, all_items_bbox[2]+50, all_items_bbox[3]+50))
+                for action_key, goto_key, source in self._connections(step): self.draw_connection(i, action_key, goto_key, source)
+        self._update_scrollregion()
+        self._update_viewport() # Also lays the grid
+        self._show_runtime_highlight()
+        self._update_minimap()
         if self._marquee_data.get("rect"):
-            rect = self._marquee_data["rect"]
-            self.canvas.create_rectangle(rect, outline="#3399ff", width=2, dash=(4,2), tags="marquee_rect")
+            self._marquee_item = self.canvas.create_rectangle(self._marquee_data["rect"], outline="#3399ff", width=2, dash=(4,2), tags="marquee_rect")
+
+    def _connections(self, step):
+        """(action_key, goto_key, source) of every arrow leaving step; source overrides the step for branch targets."""
+        connections = [('on_success_action', 'on_success_goto_step', None)]
+        # --- FIX: Added 'Movement Detect' to ensure its timeout arrow is drawn ---
+        if step.get('type') not in ['logical'] or step.get('logical_type') in ['Number', 'Wait', 'Movement Detect', 'Wait for Any', 'Condition']:
+            connections.append(('on_timeout_action', 'on_timeout_goto_step', None))
+        if step.get('type') == 'logical' and step.get('logical_type') == 'Count':
+            connections.append(('on_count_reached_action', 'on_count_reached_goto_step', None))
+        if step.get('type') == 'logical' and step.get('logical_type') == 'Wait for Any':
+            for target in step.get('targets', []):
+                if target.get('goto_step') is None: continue # Its step was deleted
+                connections.append(('branch_action', 'goto_step', {'branch_action': 'Go to Step', 'goto_step': target.get('goto_step', 1)}))
+        return connections
+
+    # --- Spatial Index & Culling ---
+    def _item_box(self, item_type, index):
+        """Model-space bounding box of a step or note."""
+        if item_type == 'step':
+            step, z = self.steps[index], self.zoom_factor; x, y = step.get('x', 50), step.get('y', 50)
+            return (x, y, x + step.get('_width', 180*z)/z, y + step.get('_height', 60*z)/z)
+        note = self.annotations[index]
+        return (note['x'], note['y'], note['x'] + note['width'], note['y'] + note['height'])
+
+    def _edge_box(self, edge):
+        """Model-space bounding box of an edge's points; a curved line stays inside its control polygon."""
+        points, z = edge['points'], self.zoom_factor
+        if not points: x, y = self.get_node_center(edge['source']); return (x, y, x, y)
+        xs, ys = [p[0] / z for p in points], [p[1] / z for p in points]
+        return (min(xs), min(ys), max(xs), max(ys))
+
+    def _update_scrollregion(self):
+        bounds = self._scene.bounds(); z = self.zoom_factor
+        if bounds: self.canvas.config(scrollregion=(bounds[0]*z-50, bounds[1]*z-50, bounds[2]*z+50, bounds[3]*z+50))
+
+    def _schedule_viewport_update(self):
+        """Coalesces the scroll and resize notifications of one event into a single _update_viewport."""
+        if self._viewport_after is None: self._viewport_after = self.root.after_idle(self._update_viewport)
+
+    def _on_canvas_scrolled(self, scrollbar, first, last):
+        scrollbar.set(first, last); self._schedule_viewport_update()
+
+    def _viewport_box(self, margin=0):
+        """The visible part of the canvas in model coordinates, grown by margin model units."""
+        z = self.zoom_factor; canvas = self.canvas
+        return (canvas.canvasx(0)/z - margin, canvas.canvasy(0)/z - margin, canvas.canvasx(canvas.winfo_width())/z + margin, canvas.canvasy(canvas.winfo_height())/z + margin)
+
+    def _update_viewport(self):
+        """Materializes the items that came into view and deletes the ones that left it."""
+        self._viewport_after = None
+        try: wanted = self._scene.query(self._viewport_box(self.VIEWPORT_MARGIN))
+        except tk.TclError: return # Canvas destroyed
+        self._draw_grid(); self.minimap.show_view(self._viewport_box())
+        if self._zoom_after: return # Mid-zoom the edge routes are stale; _finish_zoom materializes at the new zoom
+        for key in self._visible - wanted: self._dematerialize(key)
+        added = wanted - self._visible
+        for key in sorted(added): self._materialize(key)
+        self._visible = wanted
+        if added:
+            # New items land on top; restore the stacking order: grid, notes, edges, nodes, highlight, marquee
+            for tag in ("edge", "node", "runtime_highlight", "marquee_rect"): self.canvas.tag_raise(tag)
+            self.canvas.tag_lower("annotation"); self.canvas.tag_lower("grid_line")
+
+    def _materialize(self, key):
+        kind, index = key
+        if kind == 'step': self.draw_node(index)
+        elif kind == 'note': self.draw_annotation(self.annotations[index])
+        else:
+            edge = self._edges[index]
+            if edge['points']: edge['id'] = self.canvas.create_line(*[c for point in edge['points'] for c in point], smooth=edge['curved'], arrow=tk.LAST, tags=("edge",), **edge['style'])
+
+    def _dematerialize(self, key):
+        kind, index = key
+        if kind == 'edge':
+            edge = self._edges[index]
+            if edge['id']: self.canvas.delete(edge['id']); edge['id'] = None
+        else:
+            self.canvas.delete(f"{kind}_{index}")
+            if kind == 'step': self._node_items.pop(index, None)
+
+    def _center_view_on(self, mx, my):
+        """Scrolls so the model point (mx, my) is in the middle of the view, as far as the scroll region allows."""
+        self.canvas.update_idletasks() # Ensure canvas dimensions are up-to-date
+        scroll_region = str(self.canvas.cget("scrollregion")).split()
+        if not scroll_region: return
+        sr_x, sr_y, sr_x2, sr_y2 = map(float, scroll_region); z = self.zoom_factor
+        if sr_x2 > sr_x and sr_y2 > sr_y:
+            self.canvas.xview_moveto(max(0.0, (mx*z - self.canvas.winfo_width() / 2 - sr_x) / (sr_x2 - sr_x)))
+            self.canvas.yview_moveto(max(0.0, (my*z - self.canvas.winfo_height() / 2 - sr_y) / (sr_y2 - sr_y)))
+            self._update_viewport() # Materialize the target now rather than on the scroll callback
+
+    def _update_minimap(self):
+        """Sends the minimap a snapshot of the step boxes and edges; it re-renders only what moved."""
+        if not self.minimap_visible.get(): return
+        boxes = self._scene.boxes
+        self.minimap.update([boxes[('step', i)] for i in range(len(self.steps))], [step.get('type') for step in self.steps],
+                            [(edge['source'], edge['target']) for edge in self._edges], self.current_theme['canvas'])
+
+    def _item_at(self, mx, my):
+        """{'type', 'index', 'mode'} of the topmost step or note at the model point, or None. Steps are drawn
+        over notes and later items over earlier ones; a selected note's corner handle resizes it."""
+        handle = 4 # Half the resize handle, in model units
+        hits = self._scene.hit(mx, my, handle)
+        steps = [index for kind, index in hits if kind == 'step' and self._contains(self._scene.boxes[('step', index)], mx, my)]
+        if steps: return {'type': 'step', 'index': max(steps), 'mode': 'move'}
+        for index in sorted((index for kind, index in hits if kind == 'note'), reverse=True):
+            x1, y1, x2, y2 = self._scene.boxes[('note', index)]
+            if self._is_selected('note', index) and abs(mx - x2) <= handle and abs(my - y2) <= handle: return {'type': 'note', 'index': index, 'mode': 'resize'}
+            if self._contains((x1, y1, x2, y2), mx, my): return {'type': 'note', 'index': index, 'mode': 'move'}
+        return None
+
+    @staticmethod
+    def _contains(box, x, y): return box[0] <= x <= box[2] and box[1] <= y <= box[3]
+
+    def _show_runtime_highlight(self):
+        """Moves the single 'current step' dot to the running step, or removes it when stopped."""
+        index = self.current_step_index
+        if not (self.running and 0 <= index < len(self.steps)):
+            if self._highlight_item: self.canvas.delete(self._highlight_item); self._highlight_item = None
+            return
+        step, z = self.steps[index], self.zoom_factor; x, y = step.get('x', 50), step.get('y', 50)
+        coords = ((x-10)*z, (y-10)*z, (x+10)*z, (y+10)*z)
+        if self._highlight_item: self.canvas.coords(self._highlight_item, *coords); self.canvas.tag_raise(self._highlight_item)
+        else: self._highlight_item = self.canvas.create_oval(*coords, fill=self.current_theme['status_green'], outline="", tags=("runtime_highlight",))
+
+    def _is_selected(self, item_type, index): return any(item['type'] == item_type and item['index'] == index for item in self.selected_items)
+
+    def _refresh_selection(self, previous):
+        """Restyles only the materialized steps and notes whose selection changed since previous (the old selected_items)."""
+        changed = {(item['type'], item['index']) for item in previous} ^ {(item['type'], item['index']) for item in self.selected_items}
+        for item_type, index in changed:
+            if item_type == 'step' and index in self._node_items:
+                selected = self._is_selected('step', index)
+                self.canvas.itemconfig(self._node_items[index], outline="#2a9fd6" if selected else self.current_theme['node_border'], width=3 if selected else 1)
+            elif item_type == 'note' and ('note', index) in self._visible: self._redraw_annotation(index)
+
+    def _redraw_annotation(self, index):
+        """Recreates one note's items (its selection handle or size changed) below the edges and nodes."""
+        tag = f"note_{index}"; self.canvas.delete(tag); self.draw_annotation(self.annotations[index])
+        self.canvas.tag_lower(tag); self.canvas.tag_lower("grid_line")
+
+    def _move_item(self, item_type, index, dx, dy):
+        """Moves a step's or note's canvas items by (dx, dy) model units and re-files it in the index; a step's edges are re-routed by the caller."""
+        z = self.zoom_factor
+        self.canvas.move(f"{item_type}_{index}", dx*z, dy*z)
+        self._scene.insert((item_type, index), self._item_box(item_type, index))
+
+    def _reroute_edges(self, indices):
+        """Recomputes the route of every edge touching the given steps, each edge once, moving the materialized lines."""
+        edges = {id(edge): edge for index in indices for edge in self._edges_by_node.get(index, ())}
+        for edge in edges.values():
+            edge['points'] = self._connection_points(edge['source'], edge['target'], edge['curved'])
+            self._scene.insert(edge['key'], self._edge_box(edge))
+            if edge['id'] and edge['points']: self.canvas.coords(edge['id'], *[c for point in edge['points'] for c in point])
 
     def _draw_grid(self):
-        """Draws the grid lines on the flowchart canvas based on current settings."""
+        """Lays the grid over the visible area using a pool of line items. The lines cover the view plus
+        GRID_PAD cells on each side, so scrolling only repositions them once the view leaves that area and
+        the cost depends on the window size and spacing, never on the chart's extent."""
         try:
             spacing = self.grid_spacing.get() * self.zoom_factor
-            if spacing < 5: return # Avoid drawing too dense a grid
-
-            canvas_width = self.canvas.winfo_width()
-            canvas_height = self.canvas.winfo_height()
-            
-            scroll_region = self.canvas.bbox("all")
-            if not scroll_region:
-                x_start, y_start, x_end, y_end = 0, 0, canvas_width, canvas_height
-            else:
-                x_start, y_start, x_end, y_end = scroll_region
-
-            x_start = min(x_start, self.canvas.canvasx(0))
-            y_start = min(y_start, self.canvas.canvasy(0))
-            x_end = max(x_end, self.canvas.canvasx(canvas_width))
-            y_end = max(y_end, self.canvas.canvasy(canvas_height))
-
-            # --- Calculate color based on opacity ---
-            opacity = self.grid_opacity.get()
-            grid_hex = self.current_theme.get('accent_grey', '#5C6370').lstrip('#')
-            bg_hex = self.current_theme.get('canvas', '#21252B').lstrip('#')
-            
-            grid_rgb = tuple(int(grid_hex[i:i+2], 16) for i in (0, 2, 4))
-            bg_rgb = tuple(int(bg_hex[i:i+2], 16) for i in (0, 2, 4))
-            
-            final_rgb = tuple(int(gc * opacity + bgc * (1 - opacity)) for gc, bgc in zip(grid_rgb, bg_rgb))
-            final_color = self.rgb_to_hex(final_rgb)
-            # --- End color calculation ---
-
-            # Draw vertical lines
-            for x in range(int(x_start // spacing * spacing), int(x_end), int(spacing)):
-                self.canvas.create_line(x, y_start, x, y_end, fill=final_color, tags="grid_line")
-            
-            # Draw horizontal lines
-            for y in range(int(y_start // spacing * spacing), int(y_end), int(spacing)):
-                self.canvas.create_line(x_start, y, x_end, y, fill=final_color, tags="grid_line")
-            
-            self.canvas.tag_lower("grid_line")
+            visible = self.grid_visible.get() and spacing >= 5 # Avoid drawing too dense a grid
+            canvas = self.canvas
+            view = (canvas.canvasx(0), canvas.canvasy(0), canvas.canvasx(canvas.winfo_width()), canvas.canvasy(canvas.winfo_height()))
         except (ValueError, tk.TclError):
-            pass # Handles cases where spacing is invalid or window is not ready
-
-    def _calculate_node_size(self, index):
-        step = self.steps[index]; z = self.zoom_factor; title_font = tkfont.Font(family='Helvetica', size=int(9*z), weight='bold'); details_font = tkfont.Font(family='Helvetica', size=int(8*z))
-        title = f"Step {index+1}: {step.get('name', 'Unnamed')}"
-        action_text = step.get('action', '')
-        step_type_display = step['type'].title()
-        if step['type'] == 'location':
-            step_type_display = 'Click / Press'
-            action_text = step.get('action', 'Left Click')
-            if action_text == 'Key Press':
-                action_text = f"Press Key: {step.get('key_to_press', '')}"
-        elif step['type'] == 'logical':
-            if step.get('logical_type') == 'Number':
-                action_text = step.get('expression', '> 0')
-            elif step.get('logical_type') == 'Wait':
-                action_text = f"Wait for {step.get('max_time', 0)}s"
-            elif step.get('logical_type') == 'Type Text':
-                if step.get('text_source') == 'GE Interface':
-                    action_text = f"Type GE: {step.get('ge_data_field')}"
-                else:
-                    action_text = "Type Text"
-            elif step.get('logical_type') == 'GE Name Inject':
-                action_text = "GE Name Inject"
-            else:
-                action_text = step.get('logical_type', 'Execute')
-        
-        type_text = f"Type: {step_type_display}\nAction: {action_text}"; title_width = title_font.measure(title); details_width = max(details_font.measure(line) for line in type_text.split('\n'))
-        padding_x, padding_y = 20 * z, 20 * z; node_width = max(title_width, details_width, 140*z) + padding_x; node_height = (title_font.metrics("linespace") + details_font.metrics("linespace") * 2) + padding_y
-        step['_width'], step['_height'] = node_width, node_height
+            visible = False # Handles cases where spacing is invalid or window is not ready
+        if not visible:
+            if self._grid_area is not None:
+                for line in self._grid_lines: self.canvas.itemconfig(line, state='hidden')
+                self._grid_area = None
+            return
 
-    def draw_node(self, index):
-        step = self.steps[index]; x, y = step.get('x', 50), step.get('y', 50); z = self.zoom_factor; node_width, node_height = step.get('_width', 180*z), step.get('_height', 60*z)
-        theme = self.current_theme
-        node_colors = {"color": "#2c3a2c", "png": "#2a3a49", "location": "#4a4a4a", "logical": "#4d452c"}
+        # --- Calculate color based on opacity ---
+        opacity = self.grid_opacity.get()
+        grid_hex = self.current_theme.get('accent_grey', '#5C6370').lstrip('#')
+        bg_hex = self.current_theme.get('canvas', '#21252B').lstrip('#')
         
-        fill_color = node_colors.get(step['type'], "#555555")
-        is_selected = any(item['type'] == 'step' and item['index'] == index for item in self.selected_items)
-        border_color = "#2a9fd6" if is_selected else theme['node_border']; border_width = 3 if is_selected else 1; tag = f"step_{index}"
-        self.canvas.create_rectangle(x*z, y*z, (x + node_width/z)*z, (y + node_height/z)*z, fill=fill_color, outline=border_color, width=border_width, tags=(tag, "node"))
-        title = f"Step {index+1}: {step.get('name', 'Unnamed')}"; self.canvas.create_text((x + node_width/z/2)*z, (y + node_height/z * 0.25)*z, text=title, width=(node_width-15*z), justify=tk.CENTER, font=('Helvetica', int(9*z), 'bold'), tags=(tag, "node"), fill=theme['fg'])
+        grid_rgb = tuple(int(grid_hex[i:i+2], 16) for i in (0, 2, 4))
+        bg_rgb = tuple(int(bg_hex[i:i+2], 16) for i in (0, 2, 4))
         
+        final_rgb = tuple(int(gc * opacity + bgc * (1 - opacity)) for gc, bgc in zip(grid_rgb, bg_rgb))
+        final_color = self.rgb_to_hex(final_rgb)
+        # --- End color calculation ---
+
+        area = self._grid_area
+        if area and area[4:] == (spacing, final_color) and area[0] <= view[0] and area[1] <= view[1] and area[2] >= view[2] and area[3] >= view[3]: return
+        pad = self.GRID_PAD * spacing
+        x_start, y_start = math.floor((view[0] - pad) / spacing) * spacing, math.floor((view[1] - pad) / spacing) * spacing
+        x_end, y_end = view[2] + pad, view[3] + pad
+        lines = [(x_start + k * spacing, y_start, x_start + k * spacing, y_end) for k in range(int((x_end - x_start) // spacing) + 1)] # Vertical lines
+        lines += [(x_start, y_start + k * spacing, x_end, y_start + k * spacing) for k in range(int((y_end - y_start) // spacing) + 1)] # Horizontal lines
+
+        while len(self._grid_lines) < len(lines):
+            line = self.canvas.create_line(0, 0, 0, 0, tags="grid_line"); self.canvas.tag_lower(line); self._grid_lines.append(line)
+        for line, coords in zip(self._grid_lines, lines): self.canvas.coords(line, *coords); self.canvas.itemconfig(line, fill=final_color, state='normal')
+        for line in self._grid_lines[len(lines):]: self.canvas.itemconfig(line, state='hidden')
+        self._grid_area = (x_start, y_start, x_end, y_end, spacing, final_color)
+
+    # --- Node Layout ---
+    # Node sizes are memoized by (title, type text, zoom), so a redraw only measures steps whose
+    # displayed text changed; the Font objects are shared per zoom level by sizing and drawing.
+    def _node_fonts(self):
+        """(title font, details font) for the current zoom."""
+        z = self.zoom_factor; fonts = self._node_font_cache.get(z)
+        if fonts is None:
+            if len(self._node_font_cache) >= 32: self._node_font_cache.clear()
+            fonts = self._node_font_cache[z] = (tkfont.Font(family='Helvetica', size=int(9*z), weight='bold'), tkfont.Font(family='Helvetica', size=int(8*z)))
+        return fonts
+
+    def _node_texts(self, index):
+        """The title and the two 'Type:'/'Action:' lines shown in a step's node."""
+        step = self.steps[index]
+        title = f"Step {index+1}: {step.get('name', 'Unnamed')}"
         action_text = step.get('action', '')
         step_type_display = step['type'].title()
         if step['type'] == 'location':
@@ -143,15 +271,35 @@ class CanvasMixin:
                     action_text = f"Inject: {step.get('ge_inject_name', '')[:15]}"
             else:
                 action_text = step.get('logical_type', 'Execute')
+        return title, f"Type: {step_type_display}\nAction: {action_text}"
 
-        type_text = f"Type: {step_type_display}\nAction: {action_text}"
-        self.canvas.create_text((x + node_width/z/2)*z, (y + node_height/z * 0.65)*z, text=type_text, fill=theme['node_text_grey'], font=('Helvetica', int(8*z)), tags=(tag, "node"), justify=tk.CENTER)
+    def _calculate_node_size(self, index):
+        step = self.steps[index]; z = self.zoom_factor; key = self._node_texts(index) + (z,)
+        size = self._node_size_cache.get(key)
+        if size is None:
+            title, type_text, _ = key; title_font, details_font = self._node_fonts()
+            title_width = title_font.measure(title); details_width = max(details_font.measure(line) for line in type_text.split('\n'))
+            padding_x, padding_y = 20 * z, 20 * z; node_width = max(title_width, details_width, 140*z) + padding_x; node_height = (title_font.metrics("linespace") + details_font.metrics("linespace") * 2) + padding_y
+            if len(self._node_size_cache) >= 20000: self._node_size_cache.clear()
+            size = self._node_size_cache[key] = (node_width, node_height)
+        step['_width'], step['_height'] = size
 
-        if self.running and index == self.current_step_index: self.canvas.create_oval((x-10)*z, (y-10)*z, (x+10)*z, (y+10)*z, fill=theme['status_green'], outline="", tags=("runtime_highlight", tag))
+    def draw_node(self, index):
+        step = self.steps[index]; x, y = step.get('x', 50), step.get('y', 50); z = self.zoom_factor; node_width, node_height = step.get('_width', 180*z), step.get('_height', 60*z)
+        theme = self.current_theme
+        node_colors = {"color": "#2c3a2c", "png": "#2a3a49", "location": "#4a4a4a", "logical": "#4d452c"}
+        title, type_text = self._node_texts(index); title_font, details_font = self._node_fonts()
+        
+        fill_color = node_colors.get(step['type'], "#555555")
+        is_selected = self._is_selected('step', index)
+        border_color = "#2a9fd6" if is_selected else theme['node_border']; border_width = 3 if is_selected else 1; tag = f"step_{index}"
+        self._node_items[index] = self.canvas.create_rectangle(x*z, y*z, (x + node_width/z)*z, (y + node_height/z)*z, fill=fill_color, outline=border_color, width=border_width, tags=(tag, "node"))
+        self.canvas.create_text((x + node_width/z/2)*z, (y + node_height/z * 0.25)*z, text=title, width=(node_width-15*z), justify=tk.CENTER, font=title_font, tags=(tag, "node"), fill=theme['fg'])
+        self.canvas.create_text((x + node_width/z/2)*z, (y + node_height/z * 0.65)*z, text=type_text, fill=theme['node_text_grey'], font=details_font, tags=(tag, "node"), justify=tk.CENTER)
 
     def draw_annotation(self, note):
         x, y, w, h, z = note['x'], note['y'], note['width'], note['height'], self.zoom_factor; index = self.annotations.index(note)
-        is_selected = any(item['type'] == 'note' and item['index'] == index for item in self.selected_items)
+        is_selected = self._is_selected('note', index)
         border_color = "#2a9fd6" if is_selected else "#888888"; border_width = 3 if is_selected else 1; tag = f"note_{index}"
         opacity = note.get('opacity', '0% (Border Only)')
         fill_color = note['color'] if opacity != '0% (Border Only)' else ""
@@ -179,34 +327,40 @@ class CanvasMixin:
         
         return False
 
-    def draw_connection(self, source_index, action_key, goto_key):
-        step = self.steps[source_index]; action = step.get(action_key); target_index = -1; line_style = {}
+    def draw_connection(self, source_index, action_key, goto_key, source=None):
+        """Records the arrow for one of a step's actions; _materialize draws it once it is in view."""
+        step = source or self.steps[source_index]; action = step.get(action_key); target_index = -1; line_style = {}
         if action == 'Next Step':
             if source_index + 1 < len(self.steps): target_index = source_index + 1; line_style = {'fill': '#5c7a96', 'dash': (10, 5), 'width': 1.5 * self.zoom_factor}
         elif action == 'Go to Step':
             target_index = step.get(goto_key, 1) - 1
             if 'success' in action_key: line_style = {'fill': self.current_theme['status_green'], 'width': 2.0 * self.zoom_factor}
+            elif 'branch' in action_key: line_style = {'fill': self.current_theme['status_green'], 'dash': (2, 4), 'width': 2.0 * self.zoom_factor}
             elif 'count_reached' in action_key: line_style = {'fill': self.current_theme['status_red'], 'dash': (8, 2, 2, 2), 'width': 2.0 * self.zoom_factor}
             elif 'fail' in action_key: line_style = {'fill': self.current_theme['status_red'], 'dash': (4, 4), 'width': 2.0 * self.zoom_factor}
             else: line_style = {'fill': self.current_theme['status_orange'], 'dash': (6, 4), 'width': 2.0 * self.zoom_factor}
         
         if 0 <= target_index < len(self.steps) and target_index != source_index:
-            is_bidirectional = self._is_bidirectional(source_index, target_index)
-            start_pos_center = self.get_node_center(source_index); target_center = self.get_node_center(target_index)
-            target_step = self.steps[target_index]; z = self.zoom_factor; target_w = target_step.get('_width', 180*z)/z; target_h = target_step.get('_height', 60*z)/z
-            start_pos_z = (start_pos_center[0] * z, start_pos_center[1] * z); target_center_z = (target_center[0] * z, target_center[1] * z)
-            
-            if is_bidirectional and source_index > target_index:
-                dx, dy = target_center_z[0] - start_pos_z[0], target_center_z[1] - start_pos_z[1]; dist = math.hypot(dx, dy)
-                if dist < 1: return
-                mid_x, mid_y = start_pos_z[0] + dx*0.5, start_pos_z[1] + dy*0.5; perp_x, perp_y = -dy/dist, dx/dist
-                curve_amount = dist * 0.2
-                ctrl_point = (mid_x + curve_amount*perp_x, mid_y + curve_amount*perp_y)
-                end_pos = self._get_line_to_node_edge(ctrl_point, target_center_z, target_w*z, target_h*z)
-                self.canvas.create_line(start_pos_z, ctrl_point, end_pos, smooth=True, arrow=tk.LAST, **line_style)
-            else:
-                end_pos = self._get_line_to_node_edge(start_pos_z, target_center_z, target_w*z, target_h*z)
-                self.canvas.create_line(start_pos_z, end_pos, arrow=tk.LAST, **line_style)
+            curved = self._is_bidirectional(source_index, target_index) and source_index > target_index
+            edge = {'key': ('edge', len(self._edges)), 'source': source_index, 'target': target_index, 'curved': curved, 'style': line_style, 'id': None}
+            edge['points'] = self._connection_points(source_index, target_index, curved)
+            self._edges.append(edge); self._scene.insert(edge['key'], self._edge_box(edge))
+            self._edges_by_node.setdefault(source_index, []).append(edge); self._edges_by_node.setdefault(target_index, []).append(edge)
+
+    def _connection_points(self, source_index, target_index, curved):
+        """Canvas points of the arrow from the source's centre to the target's edge; curved arrows bow through a control point."""
+        start_pos_center = self.get_node_center(source_index); target_center = self.get_node_center(target_index)
+        target_step = self.steps[target_index]; z = self.zoom_factor; target_w = target_step.get('_width', 180*z)/z; target_h = target_step.get('_height', 60*z)/z
+        start_pos_z = (start_pos_center[0] * z, start_pos_center[1] * z); target_center_z = (target_center[0] * z, target_center[1] * z)
+        
+        if curved:
+            dx, dy = target_center_z[0] - start_pos_z[0], target_center_z[1] - start_pos_z[1]; dist = math.hypot(dx, dy)
+            if dist < 1: return None
+            mid_x, mid_y = start_pos_z[0] + dx*0.5, start_pos_z[1] + dy*0.5; perp_x, perp_y = -dy/dist, dx/dist
+            curve_amount = dist * 0.2
+            ctrl_point = (mid_x + curve_amount*perp_x, mid_y + curve_amount*perp_y)
+            return (start_pos_z, ctrl_point, self._get_line_to_node_edge(ctrl_point, target_center_z, target_w*z, target_h*z))
+        return (start_pos_z, self._get_line_to_node_edge(start_pos_z, target_center_z, target_w*z, target_h*z))
 
     def _get_line_to_node_edge(self, p1, p2, w, h):
         p1_x, p1_y = p1; p2_x, p2_y = p2; dx, dy = p2_x - p1_x, p2_y - p1_y
@@ -228,24 +382,10 @@ class CanvasMixin:
 
     def on_canvas_press(self, event):
         canvas_x, canvas_y = self.canvas.canvasx(event.x), self.canvas.canvasy(event.y)
-        overlapping = self.canvas.find_overlapping(canvas_x, canvas_y, canvas_x, canvas_y)
         is_shift_pressed = (event.state & 0x0001) != 0
+        previous_selection = list(self.selected_items)
 
-        clicked_item = None
-        for item_id in reversed(overlapping):
-            tags = self.canvas.gettags(item_id)
-            if any(t.startswith("step_") or t.startswith("note_") for t in tags):
-                for tag in tags:
-                    if tag.startswith("step_") or tag.startswith("note_"):
-                        item_type, index_str = tag.split('_')
-                        index = int(index_str)
-                        mode = "move"
-                        if "resize_handle" in tags and item_type == 'note':
-                            mode = "resize"
-                        clicked_item = {'type': item_type, 'index': index, 'mode': mode}
-                        break
-            if clicked_item:
-                break
+        clicked_item = self._item_at(canvas_x / self.zoom_factor, canvas_y / self.zoom_factor)
         
         if clicked_item:
             self._drag_data["item"] = f"{clicked_item['type']}_{clicked_item['index']}"
@@ -281,12 +421,13 @@ class CanvasMixin:
         else:
             if is_shift_pressed:
                 self._marquee_data = {"x": canvas_x, "y": canvas_y, "rect": (canvas_x, canvas_y, canvas_x, canvas_y)}
+                self._marquee_item = self.canvas.create_rectangle(self._marquee_data["rect"], outline="#3399ff", width=2, dash=(4,2), tags="marquee_rect")
             else:
                 self.selected_items = []
                 self._drag_data["item"] = None
         
         self.populate_properties_panel()
-        self.redraw_flowchart()
+        self._refresh_selection(previous_selection)
 
     def on_drag_motion(self, event):
         if self._marquee_data.get("x") is not None:
@@ -294,7 +435,7 @@ class CanvasMixin:
             x1 = self._marquee_data["x"]
             y1 = self._marquee_data["y"]
             self._marquee_data["rect"] = (x1, y1, canvas_x, canvas_y)
-            self.redraw_flowchart()
+            if self._marquee_item: self.canvas.coords(self._marquee_item, *self._marquee_data["rect"])
             return
 
         if self._drag_data["item"] is None or not self.selected_items:
@@ -313,7 +454,10 @@ class CanvasMixin:
             initial_dims = self._drag_data['initial_positions'][0]
             note['width'] = max(50, initial_dims['width'] + total_dx)
             note['height'] = max(30, initial_dims['height'] + total_dy)
+            self._scene.insert(('note', self.selected_items[0]['index']), self._item_box('note', self.selected_items[0]['index']))
+            self._redraw_annotation(self.selected_items[0]['index'])
         else:  # Move mode for one or more items
+            moved_steps = []
             for i, selected in enumerate(self.selected_items):
                 item_list = self.steps if selected['type'] == 'step' else self.annotations
                 item_obj = item_list[selected['index']]
@@ -324,6 +468,7 @@ class CanvasMixin:
                 
                 new_x = initial_pos['x'] + total_dx
                 new_y = initial_pos['y'] + total_dy
+                old_x, old_y = item_obj.get('x', 0), item_obj.get('y', 0)
                 
                 # Apply grid latching if enabled
                 if self.grid_latching.get():
@@ -339,26 +484,27 @@ class CanvasMixin:
                 else:
                     item_obj['x'] = new_x
                     item_obj['y'] = new_y
-        
-        self.redraw_flowchart()
+
+                if (item_obj['x'], item_obj['y']) != (old_x, old_y):
+                    self._move_item(selected['type'], selected['index'], item_obj['x'] - old_x, item_obj['y'] - old_y)
+                    if selected['type'] == 'step': moved_steps.append(selected['index'])
+            self._reroute_edges(moved_steps)
+            if self.current_step_index in moved_steps: self._show_runtime_highlight()
 
     def on_drag_release(self, event):
         if self._marquee_data:
             x1, y1, x2, y2 = self._marquee_data["rect"]
+            previous_selection = list(self.selected_items)
+            if self._marquee_item: self.canvas.delete(self._marquee_item); self._marquee_item = None
             
-            overlapping_ids = self.canvas.find_enclosed(min(x1, x2), min(y1, y2), max(x1, x2), max(y1, y2))
+            z = self.zoom_factor
+            enclosed = self._scene.enclosed((min(x1, x2)/z, min(y1, y2)/z, max(x1, x2)/z, max(y1, y2)/z))
             
             newly_selected = []
-            for item_id in overlapping_ids:
-                tags = self.canvas.gettags(item_id)
-                if any(t.startswith("step_") or t.startswith("note_") for t in tags):
-                    for tag in tags:
-                        if tag.startswith("step_") or tag.startswith("note_"):
-                            item_type, index_str = tag.split('_')
-                            item = {'type': item_type, 'index': int(index_str)}
-                            if item not in self.selected_items and item not in newly_selected:
-                                newly_selected.append(item)
-                            break
+            for item_type, index in sorted(enclosed): # Drawing order: notes before steps
+                if item_type == 'edge': continue
+                item = {'type': item_type, 'index': index}
+                if item not in self.selected_items: newly_selected.append(item)
             
             if newly_selected:
                 first_new_type = newly_selected[0]['type']
@@ -369,28 +515,45 @@ class CanvasMixin:
 
             self._marquee_data = {}
             self.populate_properties_panel()
-            self.redraw_flowchart()
+            self._refresh_selection(previous_selection)
             return
 
+        if self._drag_data["item"] is not None: self._update_scrollregion(); self._update_viewport(); self._update_minimap()
         self._drag_data = {"start_x": 0, "start_y": 0, "item": None, "mode": "move", "initial_positions": []}
 
     def get_node_center(self, index):
         step, z = self.steps[index], self.zoom_factor
         return (step.get('x', 50) + step.get('_width', 180*z)/z/2, step.get('y', 50) + step.get('_height', 60*z)/z/2)
 
-    def setup_hotkeys(self):
-        try: keyboard.add_hotkey('f2',lambda: self.start() if not self.running else self.stop()); keyboard.add_hotkey('f3',self.capture_from_hotkey); keyboard.add_hotkey('f4',self.select_area_mode)
-        except Exception as e: self.log(f"Failed to register hotkeys: {e}", "red")
-        self.root.bind("<Control-c>", self.copy_selection)
-        self.root.bind("<Control-v>", self.paste_selection)
-        self.root.bind("<Delete>", self.delete_selected_from_key)
-
     def _bind_mouse_scroll(self):
         def _on_mouse_wheel(event):
             is_ctrl, is_shift = (event.state & 0x0004) != 0, (event.state & 0x0001) != 0; scroll_dir = -1 if (event.num == 4 or event.delta > 0) else 1
-            if is_ctrl: self.zoom_factor *= 1.1 if scroll_dir == -1 else 0.9; self.zoom_factor = max(0.2, min(3.0, self.zoom_factor)); self.redraw_flowchart()
+            if is_ctrl: self._zoom_canvas(1.1 if scroll_dir == -1 else 0.9, event)
             elif is_shift: self.canvas.xview_scroll(scroll_dir, "units")
             else: self.canvas.yview_scroll(scroll_dir, "units")
         self.canvas.bind("<MouseWheel>", _on_mouse_wheel); self.canvas.bind("<Button-4>", _on_mouse_wheel); self.canvas.bind("<Button-5>", _on_mouse_wheel)
 
-
+    # --- Zoom ---
+    # A wheel tick scales the existing canvas items about the origin (canvas = model * zoom keeps holding)
+    # and scrolls so the point under the cursor stays put; text and line widths keep their size until
+    # the wheel has been still for ZOOM_SETTLE_MS and redraw_flowchart lays the chart out at the new zoom.
+    def _zoom_canvas(self, factor, event):
+        old_zoom = self.zoom_factor; self.zoom_factor = max(0.2, min(3.0, old_zoom * factor))
+        scale = self.zoom_factor / old_zoom
+        if scale == 1: return
+        canvas = self.canvas; cx, cy = canvas.canvasx(event.x), canvas.canvasy(event.y)
+        canvas.scale("all", 0, 0, scale, scale)
+        for step in self.steps: # Node sizes are stored in canvas units; keep their model size until the re-layout
+            if '_width' in step: step['_width'] *= scale; step['_height'] *= scale
+        scroll_region = str(canvas.cget("scrollregion")).split()
+        if scroll_region:
+            sr_x, sr_y, sr_x2, sr_y2 = [float(v) * scale for v in scroll_region]
+            canvas.config(scrollregion=(sr_x, sr_y, sr_x2, sr_y2))
+            if sr_x2 > sr_x and sr_y2 > sr_y:
+                canvas.xview_moveto(max(0.0, (cx * scale - event.x - sr_x) / (sr_x2 - sr_x))); canvas.yview_moveto(max(0.0, (cy * scale - event.y - sr_y) / (sr_y2 - sr_y)))
+        self._grid_area = None; self._draw_grid()
+        if self._zoom_after: self.root.after_cancel(self._zoom_after)
+        self._zoom_after = self.root.after(self.ZOOM_SETTLE_MS, self._finish_zoom)
+
+    def _finish_zoom(self):
+        self._zoom_after = None; self.redraw_flowchart()
@@ -17,7 +17,7 @@ class CaptureMixin:
         action_text_map = {'pick_color': "PICKING COLOR", 'pick_location': "GETTING LOCATION"}
         action_text = action_text_map.get(action, "CAPTURING")
         
-        self.status_label_color_state = 'orange'; self.status_label.config(text=f"{action_text}: Move mouse and press F3", foreground=self.current_theme['status_orange']); self.log(f"Entering picker mode. Press F3 to capture.", "orange")
+        self._show_status(f"{action_text}: Move mouse and press F3", 'orange'); self.log(f"Entering picker mode. Press F3 to capture.", "orange")
 
     def capture_from_hotkey(self):
         if self.f3_mode is None: return
@@ -46,7 +46,7 @@ class CaptureMixin:
             if self.hide_on_select.get():
                 self.root.config(bg=self.current_theme['bg'])
                 self.root.deiconify()
-            self.f3_mode = None; self.status_label_color_state = 'blue'; self.status_label.config(text="Status: Stopped", foreground=self.current_theme.get('status_blue', 'blue'))
+            self.f3_mode = None; self._show_status("Status: Stopped", 'blue')
 
     def select_area_for_step(self): 
         if self.selected_items and len(self.selected_items) == 1 and self.selected_items[0]['type'] == 'step': 
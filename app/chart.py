@@ -0,0 +1,73 @@
+import json
+
+# Tesseract page segmentation / engine modes as shown in the UI, mapped to their CLI values.
+PSM_OPTIONS = {
+    "0: Orientation and script detection (OSD) only.": "0", "1: Automatic page segmentation with OSD.": "1",
+    "3: Fully automatic page segmentation, but no OSD. (Default)": "3", "6: Assume a single uniform block of text.": "6",
+    "7: Treat the image as a single text line.": "7", "8: Treat the image as a single word.": "8",
+    "10: Treat the image as a single character.": "10", "13: Raw line. Treat the image as a single text line, bypassing hacks.": "13"
+}
+OEM_OPTIONS = { "0: Legacy Engine only.": "0", "1: Neural nets LSTM engine only.": "1", "2: Legacy + LSTM engines.": "2", "3: Default, based on what is available.": "3" }
+
+# Defaults used when an exported chart omits a global setting. The area defaults to the full screen.
+GLOBAL_SETTING_DEFAULTS = {
+    "mouse_move_mode": "Regular", "mouse_speed": 0.25, "pixels_per_second": 1000,
+    "min_move_time": 0.05, "max_move_time": 0.3, "scan_interval": 0.25, "hold_duration": 0.08,
+    "adaptive_scan": False, "min_scan_interval": 0.03, "max_scan_interval": 1.0, "type_interval": 0.05, "pipeline_detection": False,
+    "loc_offset_variance": 4, "speed_variance": 0.06, "hold_duration_variance": 0.03,
+    "area_x1": 0, "area_y1": 0, "hide_on_select": True, "start_at_stopped_pos": False,
+    "grid_visible": False, "grid_latching": False, "grid_spacing": 30, "grid_opacity": 0.3, "minimap_visible": True,
+    "input_backend_name": "pyautogui", "log_verbosity": "DEBUG", "ui_refresh_ms": 100,
+}
+
+# Exported 'ge_interface_settings' key -> (app attribute, default).
+GE_SETTINGS = {
+    'item_name': ('ge_interface_item_name', ''),
+    'quantity': ('ge_interface_item_quantity', '1'),
+    'buy_price_strategy': ('ge_interface_buy_price_strategy', 'Flip-Buy (use Insta-Sell)'),
+    'sell_price_strategy': ('ge_interface_sell_price_strategy', 'Flip-Sell (use Insta-Buy)'),
+    'buy_custom_price': ('ge_interface_buy_custom_price', '0'),
+    'sell_custom_price': ('ge_interface_sell_custom_price', '0'),
+    'buy_price_margin': ('ge_interface_buy_price_margin', '1'),
+    'sell_price_margin': ('ge_interface_sell_price_margin', '1'),
+}
+
+# Runtime-only step keys that are never written to an exported chart.
+RUNTIME_STEP_KEYS = ('_width', '_height', '_last_run_info', '_previous_frame_for_movement', '_scan_interval', '_scan_cost', '_scan_signature', '_scan_changed')
+
+
+def load_chart(filepath):
+    with open(filepath, 'r') as f: return json.load(f)
+
+
+def read_global_settings(gs, screen_size):
+    """Returns the exported global settings with defaults filled in and old keys migrated."""
+    settings = {key: gs.get(key, default) for key, default in GLOBAL_SETTING_DEFAULTS.items()}
+    # Handle backward compatibility for mouse mode
+    if "mouse_move_mode" not in gs:
+        settings["mouse_move_mode"] = "Dynamic" if gs.get("enable_dynamic_speed", False) else "Regular"
+    settings["area_x2"] = gs.get("area_x2", screen_size[0]); settings["area_y2"] = gs.get("area_y2", screen_size[1])
+    return settings
+
+
+def read_ge_settings(gis):
+    """Returns {app attribute: value} for an exported 'ge_interface_settings' block."""
+    return {attr: gis.get(key, default) for key, (attr, default) in GE_SETTINGS.items()}
+
+
+def clean_steps(steps, log):
+    """Migrates steps from older exports to the current format and drops unsupported ones."""
+    cleaned_steps = []
+    for s in steps:
+        if s.get('type') == 'ge':
+            log(f"Note: Old 'GE Step' ({s.get('name')}) was ignored during import.", "orange")
+            continue
+        if s.get('type') == 'number': s['type'] = 'logical'; s['logical_type'] = 'Number'
+        if s.get('type') == 'location' and s.get('action') == 'Click Object': s['action'] = 'Left Click'
+        if s.get('logical_type') == 'Timer': s['logical_type'] = 'Wait'
+        if s.get('logical_type') == 'Number':
+            if s.get('psm_mode') and s['psm_mode'].isdigit(): s['psm_mode'] = next((k for k, v in PSM_OPTIONS.items() if v == s['psm_mode']), "6: Assume a single uniform block of text.")
+            if s.get('oem_mode') and s['oem_mode'].isdigit(): s['oem_mode'] = next((k for k, v in OEM_OPTIONS.items() if v == s['oem_mode']), "3: Default, based on what is available.")
+        s['_last_run_info'] = {'timestamp': None, 'result': None, 'details': 'Imported, not yet run'}
+        cleaned_steps.append(s)
+    return cleaned_steps
@@ -2,19 +2,80 @@ import cv2
 import numpy as np
 import os
 import math
+import time
+
+def group_rectangles(rects, group_threshold, eps):
+    """
+    cv2.groupRectangles for [x, y, w, h] boxes (OpenCV 5 no longer has it): boxes whose
+    edges all lie within eps * (sum of their smaller sides) / 2 of each other are clustered
+    transitively, clusters of group_threshold boxes or fewer are dropped, the rest are
+    averaged, and an average lying inside a larger cluster's box is dropped as OpenCV does.
+    """
+    boxes = np.asarray(rects, dtype=float).reshape(-1, 4)
+    if not len(boxes): return []
+    # Sort into columns one largest-possible delta wide, then by y: a similar box later in this
+    # order is in the same or the next column, and within reach of the chunk's y range
+    reach = max(eps * (boxes[:, 2].max() + boxes[:, 3].max()) / 2, 1)
+    column = np.floor(boxes[:, 0] / reach)
+    boxes = boxes[np.lexsort((boxes[:, 1], column))]; column = np.sort(column); n = len(boxes)
+    x, y, w, h = boxes.T; right, bottom = x + w, y + h
+    column_end = np.searchsorted(column, column + 1, 'right')
+    # Union-find over the similar pairs, merged chunk by chunk so dense matches stay in memory
+    parent = np.arange(n)
+    for start in range(0, n, 32):
+        rows = np.arange(start, min(start + 32, n)); cols = np.arange(start, column_end[rows].max())
+        cols = cols[(y[cols] >= y[rows].min() - reach) & (y[cols] <= y[rows].max() + reach)]
+        delta = eps * (np.minimum.outer(w[rows], w[cols]) + np.minimum.outer(h[rows], h[cols])) / 2
+        similar = ((np.abs(np.subtract.outer(x[rows], x[cols])) <= delta) & (np.abs(np.subtract.outer(y[rows], y[cols])) <= delta)
+                   & (np.abs(np.subtract.outer(right[rows], right[cols])) <= delta) & (np.abs(np.subtract.outer(bottom[rows], bottom[cols])) <= delta)
+                   & (rows[:, None] < cols))
+        i, j = np.nonzero(similar); i, j = rows[i], cols[j]
+        while len(i):
+            # Hook the larger root under the smaller one, flatten, and repeat for pairs still apart
+            np.minimum.at(parent, np.maximum(parent[i], parent[j]), np.minimum(parent[i], parent[j]))
+            while True:
+                flat = parent[parent]
+                if np.array_equal(flat, parent): break
+                parent = flat
+            apart = parent[i] != parent[j]; i, j = i[apart], j[apart]
+    _, labels, counts = np.unique(parent, return_inverse=True, return_counts=True)
+    sums = np.zeros((len(counts), 4)); np.add.at(sums, labels, boxes)
+    kept = counts > group_threshold
+    averages, counts = np.round(sums[kept] / counts[kept, None]).astype(int), counts[kept]
+    # Drop an average inside another one's box grown by eps, unless it is the much stronger cluster
+    x, y, w, h = averages.T; dx, dy = np.round(w * eps).astype(int), np.round(h * eps).astype(int)
+    inside = ((x[:, None] >= x - dx) & (y[:, None] >= y - dy) & (x[:, None] + w[:, None] <= x + w + dx) & (y[:, None] + h[:, None] <= y + h + dy)
+              & ((counts > np.maximum(3, counts[:, None])) | (counts[:, None] < 3)))
+    np.fill_diagonal(inside, False)
+    return averages[~inside.any(axis=1)].tolist()
+
 
 class DetectionMixin:
-    def find_png(self, screen_cv, offset, step):
+    def _mark(self, step, phase, since):
+        """
+        Reports perf_counter() - since as phase through the step's '_profile' hook (set on
+        compiled plan configs only) and returns the current perf_counter() for the next phase.
+        """
+        now = time.perf_counter(); record = step.get('_profile')
+        if record: record(phase, now - since)
+        return now
+
+    def preprocess_screen(self, screen_cv, image_mode):
+        if image_mode == 'Grayscale': return cv2.cvtColor(screen_cv, cv2.COLOR_BGR2GRAY)
+        elif image_mode == 'Binary (B&W)': gray = cv2.cvtColor(screen_cv, cv2.COLOR_BGR2GRAY); _, screen_processed = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU); return screen_processed
+        return screen_cv
+
+    def resolve_templates(self, step):
+        """
+        Returns the list of (template, mask) pairs a PNG step matches against.
+        Folder-mode templates are loaded once and kept in the folder cache.
+        """
         image_mode = step.get('image_mode', 'Grayscale')
-        if image_mode == 'Grayscale': screen_processed = cv2.cvtColor(screen_cv, cv2.COLOR_BGR2GRAY)
-        elif image_mode == 'Binary (B&W)': gray = cv2.cvtColor(screen_cv, cv2.COLOR_BGR2GRAY); _, screen_processed = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
-        else: screen_processed = screen_cv
-        
-        templates_to_check = []
         if step['mode'] == 'file' and step['path']:
-            templates_to_check.append(self.load_template(step['path'], image_mode))
+            return [self.load_template(step['path'], image_mode)]
         elif step['mode'] == 'folder' and step['path'] and os.path.isdir(step['path']):
             folder_cache_key = f"{step['path']}|{image_mode}"
+            self.metrics.inc('template_cache_hits' if folder_cache_key in self.folder_image_cache else 'template_cache_misses')
             if folder_cache_key not in self.folder_image_cache:
                 self.folder_image_cache[folder_cache_key] = []
                 image_paths = [os.path.join(step['path'], fname) for fname in os.listdir(step['path']) if fname.lower().endswith('.png')]
@@ -22,7 +83,27 @@ class DetectionMixin:
                     template_data = self.load_template(fpath, image_mode)
                     if template_data[0] is not None:
                         self.folder_image_cache[folder_cache_key].append(template_data)
-            templates_to_check = self.folder_image_cache.get(folder_cache_key, [])
+            return self.folder_image_cache.get(folder_cache_key, [])
+        return []
+
+    def color_bounds(self, rgb, tolerance, color_space='HSV'):
+        """Returns the (lower, upper) cv2.inRange bounds for a target color, in BGR or HSV space."""
+        if color_space == 'RGB':
+            lower = np.array([max(0, rgb[2]-tolerance), max(0, rgb[1]-tolerance), max(0, rgb[0]-tolerance)])
+            upper = np.array([min(255, rgb[2]+tolerance), min(255, rgb[1]+tolerance), min(255, rgb[0]+tolerance)])
+            return lower, upper
+        target_hsv = cv2.cvtColor(np.uint8([[list(reversed(rgb))]]), cv2.COLOR_BGR2HSV)[0][0]
+        h, s, v = int(target_hsv[0]), int(target_hsv[1]), int(target_hsv[2]); h_tol, s_tol, v_tol = int(tolerance*1.8), int(tolerance*2.5), int(tolerance*2.5)
+        lower = np.array([max(0,h-h_tol), max(0,s-s_tol), max(0,v-v_tol)]); upper = np.array([min(179,h+h_tol), min(255,s+s_tol), min(255,v+v_tol)])
+        return lower, upper
+
+    def find_png(self, screen_cv, offset, step):
+        started = time.perf_counter()
+        screen_processed = self.preprocess_screen(screen_cv, step.get('image_mode', 'Grayscale'))
+        started = self._mark(step, 'convert', started)
+        # Compiled plans bind the template list up front; ad-hoc callers resolve it here.
+        templates_to_check = step.get('_templates')
+        if templates_to_check is None: templates_to_check = self.resolve_templates(step)
 
         find_first = step.get('find_first_match', False)
         if not find_first:
@@ -32,12 +113,14 @@ class DetectionMixin:
             match = self.find_template_in_region(screen_processed, offset, template_data, step['threshold'])
             if match and math.isfinite(match[2]):
                 if find_first:
+                    self._mark(step, 'match', started)
                     return match[0:2], match[2]
                 
                 if match[2] > max_confidence:
                     max_confidence = match[2]
                     best_match_pos = match[0:2]
 
+        self._mark(step, 'match', started)
         if find_first:
             return None, 0
         else:
@@ -48,27 +131,11 @@ class DetectionMixin:
         Finds all occurrences of template(s) in the screen region and returns the count.
         Uses an optimized, built-in OpenCV method to group overlapping matches.
         """
-        image_mode = step.get('image_mode', 'Grayscale')
-        if image_mode == 'Grayscale':
-            screen_processed = cv2.cvtColor(screen_cv, cv2.COLOR_BGR2GRAY)
-        elif image_mode == 'Binary (B&W)':
-            gray = cv2.cvtColor(screen_cv, cv2.COLOR_BGR2GRAY)
-            _, screen_processed = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
-        else:
-            screen_processed = screen_cv
-        
-        templates_to_check = []
-        if step['mode'] == 'file' and step['path']:
-            templates_to_check.append(self.load_template(step['path'], image_mode))
-        elif step['mode'] == 'folder' and step['path'] and os.path.isdir(step['path']):
-            folder_cache_key = f"{step['path']}|{image_mode}"
-            if folder_cache_key not in self.folder_image_cache: # Caching logic
-                self.folder_image_cache[folder_cache_key] = []
-                image_paths = [os.path.join(step['path'], fname) for fname in os.listdir(step['path']) if fname.lower().endswith('.png')]
-                for fpath in image_paths:
-                    template_data = self.load_template(fpath, image_mode)
-                    if template_data[0] is not None: self.folder_image_cache[folder_cache_key].append(template_data)
-            templates_to_check = self.folder_image_cache.get(folder_cache_key, [])
+        started = time.perf_counter()
+        screen_processed = self.preprocess_screen(screen_cv, step.get('image_mode', 'Grayscale'))
+        started = self._mark(step, 'convert', started)
+        templates_to_check = step.get('_templates')
+        if templates_to_check is None: templates_to_check = self.resolve_templates(step)
         
         all_rects = []
         threshold = step['threshold']
@@ -95,43 +162,38 @@ class DetectionMixin:
                 all_rects.append([pt[0], pt[1], w, h])
 
         if not all_rects:
+            self._mark(step, 'match', started)
             return 0
         
-        # Use OpenCV's optimized groupRectangles function to merge overlapping boxes.
-        grouped_rects, _ = cv2.groupRectangles(all_rects, groupThreshold=1, eps=0.2)
+        # Merge overlapping boxes the way cv2.groupRectangles did.
+        grouped_rects = group_rectangles(all_rects, group_threshold=1, eps=0.2)
 
+        self._mark(step, 'match', started)
         return len(grouped_rects)
 
     def find_and_count_color(self, screen_cv, offset, step):
         """
         Finds all occurrences of a color in the screen region and returns the count.
         """
-        rgb = step['rgb']
-        tolerance = step['tolerance']
         color_space = step.get('color_space', 'HSV')
         min_area = step.get('min_pixel_area', 10)
+        lower, upper = step.get('_bounds') or self.color_bounds(step['rgb'], step['tolerance'], color_space)
         
-        if color_space == 'RGB':
-            lower = np.array([max(0, rgb[2]-tolerance), max(0, rgb[1]-tolerance), max(0, rgb[0]-tolerance)]) 
-            upper = np.array([min(255, rgb[2]+tolerance), min(255, rgb[1]+tolerance), min(255, rgb[0]+tolerance)])
-            mask = cv2.inRange(screen_cv, lower, upper)
-        else: # HSV
-            hsv = cv2.cvtColor(screen_cv, cv2.COLOR_BGR2HSV)
-            target_hsv = cv2.cvtColor(np.uint8([[list(reversed(rgb))]]), cv2.COLOR_BGR2HSV)[0][0]
-            h, s, v = int(target_hsv[0]), int(target_hsv[1]), int(target_hsv[2])
-            h_tol, s_tol, v_tol = int(tolerance*1.8), int(tolerance*2.5), int(tolerance*2.5)
-            lower = np.array([max(0,h-h_tol), max(0,s-s_tol), max(0,v-v_tol)])
-            upper = np.array([min(179,h+h_tol), min(255,s+s_tol), min(255,v+v_tol)])
-            mask = cv2.inRange(hsv, lower, upper)
+        started = time.perf_counter()
+        if color_space != 'RGB': # HSV
+            screen_cv = cv2.cvtColor(screen_cv, cv2.COLOR_BGR2HSV); started = self._mark(step, 'convert', started)
+        mask = cv2.inRange(screen_cv, lower, upper)
 
         contours, _ = cv2.findContours(mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
         
         valid_contours = [c for c in contours if cv2.contourArea(c) > min_area]
         
+        self._mark(step, 'match', started)
         return len(valid_contours)
 
     def load_template(self, path, image_mode='Grayscale'):
         cache_key = f"{path}|{image_mode}"
+        self.metrics.inc('template_cache_hits' if cache_key in self.template_cache else 'template_cache_misses')
         if cache_key not in self.template_cache:
             try:
                 img = cv2.imread(path, cv2.IMREAD_UNCHANGED)
@@ -172,11 +234,12 @@ class DetectionMixin:
         return thresh
 
     def find_color_on_screen_hsv(self,img_bgr,offset,step):
-        rgb = step.get('rgb', (255,0,0)); tolerance = step.get('tolerance', 2); min_area = step.get('min_pixel_area', 10)
-        hsv = cv2.cvtColor(img_bgr, cv2.COLOR_BGR2HSV); target_hsv = cv2.cvtColor(np.uint8([[list(reversed(rgb))]]), cv2.COLOR_BGR2HSV)[0][0]
-        h, s, v = int(target_hsv[0]), int(target_hsv[1]), int(target_hsv[2]); h_tol, s_tol, v_tol = int(tolerance*1.8), int(tolerance*2.5), int(tolerance*2.5)
-        lower = np.array([max(0,h-h_tol), max(0,s-s_tol), max(0,v-v_tol)]); upper = np.array([min(179,h+h_tol), min(255,s+s_tol), min(255,v+v_tol)])
+        min_area = step.get('min_pixel_area', 10)
+        lower, upper = step.get('_bounds') or self.color_bounds(step.get('rgb', (255,0,0)), step.get('tolerance', 2), 'HSV')
+        started = time.perf_counter()
+        hsv = cv2.cvtColor(img_bgr, cv2.COLOR_BGR2HSV); started = self._mark(step, 'convert', started)
         mask = cv2.inRange(hsv, lower, upper); contours, _ = cv2.findContours(mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+        self._mark(step, 'match', started)
         if contours:
             largest = max(contours, key=cv2.contourArea); area = cv2.contourArea(largest)
             if area > min_area:
@@ -185,11 +248,12 @@ class DetectionMixin:
         return None, 0
 
     def find_color_on_screen_rgb(self, img_bgr, offset, step):
-        rgb = step.get('rgb', (255,0,0)); tolerance = step.get('tolerance', 2); min_area = step.get('min_pixel_area', 10)
-        lower = np.array([max(0, rgb[2]-tolerance), max(0, rgb[1]-tolerance), max(0, rgb[0]-tolerance)]) 
-        upper = np.array([min(255, rgb[2]+tolerance), min(255, rgb[1]+tolerance), min(255, rgb[0]+tolerance)])
+        min_area = step.get('min_pixel_area', 10)
+        lower, upper = step.get('_bounds') or self.color_bounds(step.get('rgb', (255,0,0)), step.get('tolerance', 2), 'RGB')
+        started = time.perf_counter()
         mask = cv2.inRange(img_bgr, lower, upper)
         contours, _ = cv2.findContours(mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+        self._mark(step, 'match', started)
         if contours:
             largest = max(contours, key=cv2.contourArea); area = cv2.contourArea(largest)
             if area > min_area:
@@ -197,6 +261,32 @@ class DetectionMixin:
                 if M['m00'] != 0: return (int(M['m10']/M['m00'])+offset[0], int(M['m01']/M['m00'])+offset[1]), area
         return None, 0
 
+    def frame_change_percent(self, previous_frame, current_frame):
+        """Percentage of pixels whose grayscale value changed by more than 30 between two same-sized frames."""
+        diff = cv2.absdiff(previous_frame, current_frame)
+        _, thresholded_diff = cv2.threshold(diff, 30, 255, cv2.THRESH_BINARY)
+        total_pixels = thresholded_diff.size
+        return (np.count_nonzero(thresholded_diff) / total_pixels) * 100 if total_pixels > 0 else 0
+
+    def find_pixel_color(self, screen_cv, offset, step):
+        """
+        Checks a 1x1 capture taken at the step's 'pixel_coords' against the target color.
+        HSV comparisons wrap around the hue circle; '_target_hsv' may be precomputed.
+        """
+        started = time.perf_counter()
+        b, g, r = (int(c) for c in screen_cv[0, 0][:3])
+        target_rgb, tolerance = step.get('rgb'), step.get('tolerance')
+        if step.get('color_space', 'HSV') == 'RGB':
+            match = all(abs(c1 - c2) <= tolerance for c1, c2 in zip((r, g, b), target_rgb))
+        else:
+            h, s, v = step.get('_target_hsv') or (int(c) for c in cv2.cvtColor(np.uint8([[list(reversed(target_rgb))]]), cv2.COLOR_BGR2HSV)[0][0])
+            current_hsv = cv2.cvtColor(np.uint8([[[b, g, r]]]), cv2.COLOR_BGR2HSV)[0][0]
+            h_tol, s_tol, v_tol = int(tolerance*1.8), int(tolerance*2.5), int(tolerance*2.5)
+            h_diff = abs(int(current_hsv[0]) - h)
+            match = min(h_diff, 180 - h_diff) <= h_tol and abs(int(current_hsv[1]) - s) <= s_tol and abs(int(current_hsv[2]) - v) <= v_tol
+        self._mark(step, 'match', started)
+        return (step['pixel_coords'], 1) if match else (None, 0)
+
     def find_template_in_region(self, screen_processed, offset, template_data, threshold):
         """
         Finds a template in a pre-processed screen region using an optimized matching method.
@@ -0,0 +1,161 @@
+import functools
+import json
+import sys
+
+from app.backends import create_backend
+from app.chart import GLOBAL_SETTING_DEFAULTS, PSM_OPTIONS, OEM_OPTIONS, read_global_settings, read_ge_settings, clean_steps
+from app.detection import DetectionMixin
+from app.executor import ExecutorMixin
+from app.logfile import LEVELS, level_for_color
+from app.ge_prices import API_HEADERS, GEPriceProvider
+from app.mouse_actions import MouseActionsMixin
+from app.motion import MotionEngine
+from app.metrics import Metrics, MetricsServer
+from app.profiler import StepProfiler
+from app.trace import TraceRecorder
+from app.scheduler import AsyncioScheduler
+
+
+class Variable:
+    """Minimal stand-in for a tk Variable: holds a value behind get()/set()."""
+    __slots__ = ('_value',)
+
+    def __init__(self, value=None): self._value = value
+
+    def get(self): return self._value
+
+    def set(self, value): self._value = value
+
+
+class HeadlessEngine(ExecutorMixin, DetectionMixin, MouseActionsMixin):
+    """
+    Runs a chart produced by 'Export to JSON' without Tk. The executor, detectors, input
+    backend and GE price provider are the same ones the app uses; progress is reported as
+    one JSON object per event through emit (JSON lines on stdout by default).
+    """
+    def __init__(self, chart, input_backend=None, emit=None, verbose=False, trace_path=None, metrics_port=None, scheduler=None, outcome_script=None, log_file=None):
+        self.scheduler = scheduler or AsyncioScheduler() # Run in the caller's thread by run(); a VirtualScheduler simulates
+        self.input_backend = input_backend or create_backend(chart.get("global_settings", {}).get("input_backend_name", GLOBAL_SETTING_DEFAULTS["input_backend_name"]))
+        self.motion = MotionEngine()
+        self.outcome_script = outcome_script # Replaces capture and detection when given (see app.simulation)
+        self.emit = emit or self._print_event
+        self.verbose = verbose
+        self.log_file = log_file # LogFileSink; the caller closes it
+        self.engine_start_time = self.scheduler.time()
+        self.final_status = None
+
+        # --- Global & GE Settings (from the chart, with the app's defaults) ---
+        for key, value in read_global_settings(chart.get("global_settings", {}), self.input_backend.size()).items():
+            setattr(self, key, Variable(value))
+        for attr, value in read_ge_settings(chart.get("ge_interface_settings", {})).items():
+            setattr(self, attr, Variable(value))
+        self.ge_prices = GEPriceProvider(API_HEADERS, self.log)
+        self.ge_interface_last_data = None
+        self.psm_options = PSM_OPTIONS
+        self.oem_options = OEM_OPTIONS
+
+        # --- Core Data Structures ---
+        self.steps = clean_steps(chart.get("steps", []), self.log)
+        self.template_cache = {}
+        self.folder_image_cache = {}
+
+        # --- Execution State ---
+        self.running = False
+        self.current_step_index = 0
+        self.plan = ()
+        self.settings = {}
+        self.current_step_start_time = 0
+        self.executor_after_id = None
+        self.delay_countdown_id = None
+        self.timeout_countdown_id = None
+        self.step_generation = 0
+        self.rescan_due = None
+        self.predetection = None
+        self.last_action_at = 0.0
+        self.race_pool = None
+        self.log_rank = 0
+        self.log_counts = {level: [0, 0] for level in LEVELS}
+        self.profiler = StepProfiler()
+        self.metrics = Metrics()
+        self.metrics_server = MetricsServer(self.collect_metrics, metrics_port) if metrics_port else None
+        self.trace = TraceRecorder(clock=self.scheduler.time)
+        self.trace_path = trace_path
+        self.trace_step = None
+        self.stop_requested = False
+        self.start_step = Variable('1')
+        self.automation_start_time = 0
+        self.f3_mode = None
+
+    def run(self, start_step=1, duration=None):
+        """
+        Runs the chart until it stops. Returns a process exit code: 0 when the run ended
+        normally, 1 when it stopped on an error and 2 when it could not start.
+        """
+        self.start_step.set(str(start_step))
+        if self.metrics_server:
+            try: self.metrics_server.start(); self._event('metrics', url=f"http://127.0.0.1:{self.metrics_server.port}/metrics")
+            except OSError as e: self._event('error', title="Metrics Error", message=f"Could not serve metrics on port {self.metrics_server.port}: {e}"); self.metrics_server = None
+        self.start()
+        if not self.running: return 2
+        if duration: self.scheduler.after(int(duration * 1000), self.stop, "Status: Duration elapsed", 'blue')
+        try:
+            self.scheduler.run()
+        except KeyboardInterrupt:
+            self.stop("Status: Interrupted", 'orange'); self.scheduler.run()
+        finally:
+            if self.metrics_server: self.metrics_server.stop()
+        return 1 if self.final_status and self.final_status[1] == 'red' else 0
+
+    def _finalize_stop_ui(self, message, color_state):
+        super()._finalize_stop_ui(message, color_state)
+        self.final_status = (message, color_state)
+        self._event('stopped', status=message, state=color_state, step=self.current_step_index + 1, elapsed=round(self.scheduler.time() - self.engine_start_time, 3))
+        self.scheduler.quit()
+
+    # --- Progress Events ---
+    def _print_event(self, event):
+        sys.stdout.write(json.dumps(event, default=str) + "\n"); sys.stdout.flush()
+
+    def _event(self, event, **fields):
+        self.emit({'t': round(self.scheduler.time() - self.engine_start_time, 3), 'event': event, **fields})
+
+    def log(self, message, color_name=None, level=None):
+        self._event('log', level=color_name or 'info', message=message)
+        if self.log_file: self.log_file.write(message, level or level_for_color(color_name))
+
+    # --- Executor UI Hooks ---
+    def _show_status(self, text, color_state): self._event('status', text=text, state=color_state)
+
+    def _show_detection(self, text):
+        if self.verbose: self._event('detection', step=self.current_step_index + 1, text=text)
+
+    def _show_scan_interval(self, interval, adaptive):
+        if self.verbose: self._event('scan_interval', step=self.current_step_index + 1, interval=round(interval, 4), adaptive=adaptive)
+
+    def _show_countdown(self, kind, deadline): pass
+
+    def _show_current_step(self):
+        if self.running and 0 <= self.current_step_index < len(self.steps):
+            self._event('step', step=self.current_step_index + 1, name=self.steps[self.current_step_index].get('name', ''))
+
+    def _set_running_ui(self, running): pass
+
+    def _show_error(self, title, message): self._event('error', title=title, message=message)
+
+    def _show_settings_changed(self): pass
+
+    def _store_setting(self, name, value): getattr(self, name).set(value)
+
+    def _open_trace_file(self):
+        if self.trace_path: self.trace.open(self.trace_path, 'binary' if self.trace_path.lower().endswith('.bin') else 'jsonl')
+
+    # --- GE Interface ---
+    def update_ge_interface_price(self, item_name=None):
+        if item_name is None: item_name = self.ge_interface_item_name.get()
+        if not item_name: self.log("GE Interface: Please enter an item name.", "orange"); return
+        self.scheduler.submit(functools.partial(self._store_ge_price, item_name), self.ge_prices.get_item_price, item_name)
+
+    def _store_ge_price(self, item_name, price_data, error):
+        self.ge_interface_last_data = price_data
+        if isinstance(price_data, dict): self.log(f"GE Interface: Updated prices for {item_name}.")
+        else: self.log(f"GE Interface: Failed to process data for '{item_name}'.", "red")
@@ -1,13 +1,64 @@
-import tkinter as tk
-from tkinter import messagebox
 import time
-import threading
 import os
+import functools
+import itertools
+from concurrent.futures import ThreadPoolExecutor
 import cv2
 import numpy as np
-import pyautogui
+try:
+    import pytesseract
+    from PIL import Image
+except ImportError:
+    pytesseract = None
+
+from app.plan import PlanError, StepPlan, parse_comparison, parse_condition, predicate_name, resolve_successor
+from app.logfile import LEVEL_RANK, level_for_color
+from app.ge_prices import calculate_price
+from app.metrics import RATE_WINDOW, sample
+from app.trace import STEP_ENTER, STEP_EXIT, DETECTION, ACTION, JUMP, TIMEOUT, OUTCOMES, ACTIONS
 
 class ExecutorMixin:
+    """
+    The automation state machine. It has no Tk dependency: timers and awaited work go through
+    self.scheduler (Tk-style after()/after_cancel() plus submit(), see AsyncioScheduler; its time() is the run's clock), input and
+    capture through self.input_backend (mouse actions played by self.motion), and all display updates through the _show_*/_set_running_ui
+    hooks provided by the host class. Hooks are called on the scheduler's thread. The host's setting variables belong to its UI
+    thread: start() copies the RUN_SETTINGS into self.settings, and steps that change a setting write it back through _store_setting.
+    """
+    # Compiled step kind -> handler method. Handlers take (entry, step) and return
+    # (succeeded, target_pos), or None when they already changed the flow themselves.
+    STEP_HANDLERS = {
+        'color_count': '_run_count_step', 'png_count': '_run_count_step',
+        'location': '_run_location_step', 'key_press': '_run_location_step',
+        'png': '_run_detection_step', 'color': '_run_detection_step', 'pixel': '_run_detection_step',
+        'count': '_run_counter_step', 'wait': '_run_wait_step', 'type_text': '_run_type_text_step',
+        'ge_inject': '_run_ge_inject_step', 'settings_inject': '_run_settings_inject_step',
+        'movement': '_run_movement_step', 'number': '_run_number_step', 'wait_any': '_run_wait_any_step',
+        'condition': '_run_condition_step', 'logical': '_run_unknown_logical_step',
+    }
+    LOGICAL_KINDS = {
+        'Count': 'count', 'Wait': 'wait', 'Type Text': 'type_text', 'GE Inject': 'ge_inject',
+        'Settings Inject': 'settings_inject', 'Movement Detect': 'movement', 'Number': 'number',
+        'Wait for Any': 'wait_any', 'Condition': 'condition',
+    }
+    AREA_KINDS = ('color_count', 'png_count', 'png', 'color', 'movement', 'number', 'wait_any', 'condition')
+    TIMEOUT_KINDS = ('png', 'color', 'pixel', 'movement', 'number', 'wait_any', 'condition')
+    FAILABLE_KINDS = TIMEOUT_KINDS + ('color_count', 'png_count')
+    PREDETECT_KINDS = ('png', 'color', 'pixel', 'png_count', 'color_count') # Steps whose scan is a plain capture + detect
+    COUNT_LABELS = {'color_count': ('Color Count', 'blob(s)', 'color blobs'), 'png_count': ('PNG Count', 'instance(s)', 'instances')}
+    RACE_WORKERS = 4 # Threads a Wait for Any step runs its targets' detectors on
+    # Assumed seconds per evaluation of a Condition predicate until its own cost has been measured.
+    PREDICATE_COST_PRIORS = {'Color': 0.002, 'Color Count': 0.003, 'PNG': 0.01, 'PNG Count': 0.02, 'Number': 0.08}
+    PREDICATE_STATS_WEIGHT = 0.2 # Weight of the newest sample in a predicate's running cost and pass rate
+    # Settings a run reads on the scheduler's thread, as plain values in self.settings
+    RUN_SETTINGS = (
+        'scan_interval', 'adaptive_scan', 'min_scan_interval', 'max_scan_interval', 'pipeline_detection', 'type_interval', 'start_at_stopped_pos',
+        'loc_offset_variance', 'speed_variance', 'mouse_move_mode', 'mouse_speed', 'min_move_time', 'max_move_time', 'pixels_per_second',
+        'hold_duration', 'hold_duration_variance', 'ge_interface_item_name', 'ge_interface_item_quantity',
+        'ge_interface_buy_price_strategy', 'ge_interface_buy_custom_price', 'ge_interface_buy_price_margin',
+        'ge_interface_sell_price_strategy', 'ge_interface_sell_custom_price', 'ge_interface_sell_price_margin',
+    )
+
     def _pre_cache_folder_templates(self):
         """
         Proactively loads and caches templates for all PNG steps in folder mode.
@@ -17,32 +68,181 @@ class ExecutorMixin:
         count = 0
         for i, step in enumerate(self.steps):
             if step.get('type') == 'png' and step.get('mode') == 'folder' and step.get('path') and os.path.isdir(step['path']):
-                image_mode = step.get('image_mode', 'Grayscale')
-                folder_cache_key = f"{step['path']}|{image_mode}"
-                
-                if folder_cache_key not in self.folder_image_cache:
-                    self.folder_image_cache[folder_cache_key] = []
-                    image_paths = [os.path.join(step['path'], fname) for fname in os.listdir(step['path']) if fname.lower().endswith('.png')]
-                    for fpath in image_paths:
-                        template_data = self.load_template(fpath, image_mode)
-                        if template_data[0] is not None:
-                            self.folder_image_cache[folder_cache_key].append(template_data)
-                    
-                    num_cached = len(self.folder_image_cache[folder_cache_key])
-                    if num_cached > 0:
-                        self.log(f" > Cached {num_cached} templates for Step {i+1} from '{os.path.basename(step['path'])}'.")
-                        count += num_cached
+                if f"{step['path']}|{step.get('image_mode', 'Grayscale')}" in self.folder_image_cache: continue
+                num_cached = len(self.resolve_templates(step))
+                if num_cached > 0:
+                    self.log(f" > Cached {num_cached} templates for Step {i+1} from '{os.path.basename(step['path'])}'.")
+                    count += num_cached
         if count > 0:
             self.log(f"Finished pre-caching {count} total templates.", "green")
         else:
             self.log("No new PNG Folder steps found to pre-cache.")
 
+    def log_execution(self, message, color_name=None):
+        """Logs a message during script execution, respecting the step's log setting and the log verbosity."""
+        if self._log_enabled(level_for_color(color_name)): self.log(message, color_name)
+
+    def log_step(self, template, *args, color_name=None, level=None):
+        """
+        Logs template.format(*args) like log_execution, but only formats it once the step's
+        log setting and the log verbosity let it through, so a filtered message costs a dict
+        lookup. level defaults to color_name's (see app.logfile); per-scan messages pass 'DEBUG'.
+        """
+        level = level or level_for_color(color_name)
+        if self._log_enabled(level): self.log(template.format(*args) if args else template, color_name, level)
+
+    def _log_enabled(self, level):
+        """Counts a message of level in log_counts ([emitted, suppressed]) and says whether to emit it."""
+        counts = self.log_counts[level]; index = self.current_step_index
+        if LEVEL_RANK[level] >= self.log_rank and (not self.running or not (0 <= index < len(self.steps)) or self.steps[index].get('enable_logging', True)):
+            counts[0] += 1; return True
+        counts[1] += 1; return False
+
+    def _read_log_verbosity(self, *args): self.log_rank = LEVEL_RANK.get(self.log_verbosity.get(), 0)
+
+    # --- Plan Compilation ---
+    def compile_plan(self):
+        """
+        Compiles self.steps into an immutable tuple of StepPlan entries. Raises PlanError
+        for anything that would otherwise only fail once the run reaches that step.
+        """
+        global_area = (self.area_x1.get(), self.area_y1.get(), self.area_x2.get(), self.area_y2.get())
+        return tuple(self._compile_step(i, step, global_area) for i, step in enumerate(self.steps))
+
+    def _step_kind(self, index, step):
+        step_type, action = step.get('type'), step.get('action')
+        if step_type == 'color':
+            if action == 'Color Count': return 'color_count'
+            return 'pixel' if step.get('pixel_detect_enabled') else 'color'
+        if step_type == 'png': return 'png_count' if action == 'PNG Count' else 'png'
+        if step_type == 'location': return 'key_press' if action == 'Key Press' else 'location'
+        if step_type == 'logical': return self.LOGICAL_KINDS.get(step.get('logical_type'), 'logical')
+        raise PlanError(index, f"Unknown step type '{step_type}'.")
+
+    def _compile_step(self, index, step, global_area):
+        kind = self._step_kind(index, step)
+        fields = {'index': index, 'kind': kind, 'run': getattr(self, self.STEP_HANDLERS[kind]), 'timeout': 0, 'config': step,
+                  'success_next': resolve_successor(self.steps, index, 'on_success_action', 'on_success_goto_step'),
+                  'success_delay': step.get('delay_after', 0)}
+
+        if kind in self.AREA_KINDS:
+            area = tuple(step.get('area') or global_area); w, h = area[2] - area[0], area[3] - area[1]
+            fields['area'] = area; fields['region'] = (area[0], area[1], w, h) if w >= 1 and h >= 1 else None
+        if kind in self.TIMEOUT_KINDS: fields['timeout'] = step.get('timeout', 0)
+        if kind in self.FAILABLE_KINDS: fields['timeout_next'] = resolve_successor(self.steps, index, 'on_timeout_action', 'on_timeout_goto_step')
+
+        try:
+            if kind in ('color_count', 'png_count'): fields['compare'] = parse_comparison(step.get('count_expression', '>= 1'), int)
+            elif kind == 'number': fields['compare'] = parse_comparison(step.get('expression', '> 0'), float)
+        except ValueError as e: raise PlanError(index, f"Invalid expression: {e}")
+
+        # Detectors report their convert/match phases through '_profile' on their config copy.
+        profile = functools.partial(self.profiler.record, index)
+        if kind in ('png', 'png_count'):
+            fields['config'] = dict(step, _templates=self.resolve_templates(step), _profile=profile)
+            fields['detect'] = self.find_png if kind == 'png' else self.find_and_count_png
+        elif kind in ('color', 'color_count'):
+            color_space = step.get('color_space', 'HSV')
+            fields['config'] = dict(step, _bounds=self.color_bounds(step.get('rgb', (255,0,0)), step.get('tolerance', 2), color_space), _profile=profile)
+            if kind == 'color_count': fields['detect'] = self.find_and_count_color
+            else: fields['detect'] = self.find_color_on_screen_rgb if color_space == 'RGB' else self.find_color_on_screen_hsv
+        elif kind == 'pixel':
+            coords = step.get('pixel_coords')
+            if not coords: raise PlanError(index, "Pixel detection is enabled but no pixel has been selected.")
+            target_hsv = cv2.cvtColor(np.uint8([[list(reversed(step.get('rgb')))]]), cv2.COLOR_BGR2HSV)[0][0]
+            fields['config'] = dict(step, _target_hsv=tuple(int(c) for c in target_hsv), _profile=profile)
+            fields['area'] = (coords[0], coords[1], coords[0] + 1, coords[1] + 1); fields['region'] = (coords[0], coords[1], 1, 1)
+            fields['detect'] = self.find_pixel_color
+        elif kind == 'number':
+            fields['config'] = dict(step, _ocr_config=self._ocr_config(step))
+        elif kind == 'wait_any':
+            targets = tuple(self._compile_race_target(index, n, target, profile) for n, target in enumerate(step.get('targets') or ()))
+            if not targets: raise PlanError(index, "Wait for Any needs at least one target.")
+            fields['config'] = dict(step, _targets=targets)
+        elif kind == 'condition':
+            predicates = tuple(self._compile_predicate(index, predicate_name(n), spec, profile) for n, spec in enumerate(step.get('targets') or ()))
+            if not predicates: raise PlanError(index, "Condition needs at least one predicate.")
+            try: tree = parse_condition(step.get('condition', ''), len(predicates))
+            except ValueError as e: raise PlanError(index, f"Invalid condition: {e}")
+            fields['config'] = dict(step, _predicates=predicates, _condition=tree)
+        elif kind == 'count':
+            fields['count_reached_next'] = resolve_successor(self.steps, index, 'on_count_reached_action', 'on_count_reached_goto_step')
+            fields['count_reached_delay'] = step.get('on_count_reached_delay', 0)
+        elif kind == 'settings_inject':
+            fields['config'] = self._compile_settings_inject(index, step)
+
+        if kind == 'key_press': fields['act'] = functools.partial(self._press_step_key, step.get('key_to_press'))
+        elif kind in ('location', 'png', 'color', 'pixel'): fields['act'] = functools.partial(self.execute_action_on_pos, step.get('action'))
+        return StepPlan(**fields)
+
+    def _ocr_config(self, step):
+        psm_mode = self.psm_options.get(step.get('psm_mode'), '6'); oem_mode = self.oem_options.get(step.get('oem_mode'), '3')
+        return f'--oem {oem_mode} --psm {psm_mode} -c tessedit_char_whitelist=0123456789:;,.-'
+
+    def _compile_predicate(self, index, label, spec, profile):
+        """
+        Compiles one detection of a Wait for Any or Condition step (PNG, Color, PNG Count, Color
+        Count or Number) into a dict with its detector, bound config, comparison and running stats.
+        """
+        predicate_type = spec.get('type', 'PNG')
+        compiled = {'label': label, 'type': predicate_type, 'detect': None, 'compare': None,
+                    'cost': self.PREDICATE_COST_PRIORS.get(predicate_type, 0.01), 'pass_rate': 0.5}
+        if predicate_type in ('PNG', 'PNG Count'):
+            if not spec.get('path'): raise PlanError(index, f"{label} has no image.")
+            config = dict(spec, mode='file', threshold=spec.get('threshold', 0.8))
+            compiled['config'] = dict(config, _templates=self.resolve_templates(config), _profile=profile)
+            compiled['detect'] = self.find_png if predicate_type == 'PNG' else self.find_and_count_png
+        elif predicate_type in ('Color', 'Color Count'):
+            color_space = spec.get('color_space', 'HSV')
+            compiled['config'] = dict(spec, _bounds=self.color_bounds(spec.get('rgb', (255,0,0)), spec.get('tolerance', 2), color_space), _profile=profile)
+            if predicate_type == 'Color Count': compiled['detect'] = self.find_and_count_color
+            else: compiled['detect'] = self.find_color_on_screen_rgb if color_space == 'RGB' else self.find_color_on_screen_hsv
+        elif predicate_type == 'Number':
+            if pytesseract is None: raise PlanError(index, f"{label} reads a number, but pytesseract is not installed.")
+            compiled['config'] = dict(spec, _ocr_config=self._ocr_config(spec))
+        else: raise PlanError(index, f"{label} has unknown type '{predicate_type}'.")
+        try:
+            if predicate_type == 'Number': compiled['compare'] = parse_comparison(spec.get('expression', '> 0'), float)
+            elif predicate_type in ('PNG Count', 'Color Count'): compiled['compare'] = parse_comparison(spec.get('count_expression', '>= 1'), int)
+        except ValueError as e: raise PlanError(index, f"{label} has an invalid expression: {e}")
+        return compiled
+
+    def _compile_race_target(self, index, n, target, profile):
+        """Compiles target n of a Wait for Any step: a predicate plus the 0-based step it jumps to and its click."""
+        label = f"Target {n + 1}"
+        try: goto = int(target.get('goto_step'))
+        except (TypeError, ValueError): raise PlanError(index, f"{label} has no valid step to go to.")
+        if not (1 <= goto <= len(self.steps)): raise PlanError(index, f"{label} goes to Step {goto}, which does not exist.")
+        return dict(self._compile_predicate(index, label, target, profile), next=goto - 1, action=target.get('action', 'Detect Object'))
+
+    def _compile_settings_inject(self, index, step):
+        setting_name = step.get('inject_setting_name')
+        new_value_str = step.get('inject_setting_value')
+        setting_map = {
+            "Location Offset (±px)": {'setting': 'loc_offset_variance', 'type': int},
+            "Speed Variance (±s)": {'setting': 'speed_variance', 'type': float},
+            "Hold Variance (±s)": {'setting': 'hold_duration_variance', 'type': float},
+            "Scan Interval (s)": {'setting': 'scan_interval', 'type': float},
+            "Base Hold Duration (s)": {'setting': 'hold_duration', 'type': float}
+        }
+        if setting_name not in setting_map: raise PlanError(index, f"Unknown setting '{setting_name}' to inject.")
+        setting_info = setting_map[setting_name]
+        try: converted_value = setting_info['type'](new_value_str)
+        except (TypeError, ValueError) as e: raise PlanError(index, f"Invalid value '{new_value_str}' for {setting_name}. Error: {e}")
+        return {'name': setting_name, 'setting': setting_info['setting'], 'value': converted_value}
+
     def start(self):
         if self.running or self.f3_mode: return
-        if not self.steps: messagebox.showerror("Error", "No steps defined."); return
-        
+        if not self.steps: self._show_error("Error", "No steps defined."); return
+        try:
+            start_index = int(self.start_step.get()) - 1
+            if not (0 <= start_index < len(self.steps)): self._show_error("Invalid Start Step", f"Start step must be between 1 and {len(self.steps)}."); return
+        except ValueError: self._show_error("Invalid Input", "Start step must be a valid number."); return
+
         self._pre_cache_folder_templates()
-        
+        try: self.plan = self.compile_plan()
+        except PlanError as e: self.log(f"Cannot start: {e}", "red"); self._show_error("Invalid Flowchart", str(e)); return
+
         resetted_items = []
         for i, step in enumerate(self.steps):
             if step.get('type') == 'logical' and step.get('reset_on_start'):
@@ -58,60 +258,56 @@ class ExecutorMixin:
                     resetted_items.append(f"Movement Comparison for Step {i+1}")
 
         if resetted_items: self.log(f"Reset on start: {', '.join(resetted_items)}.")
-        try:
-            start_index = int(self.start_step.get()) - 1
-            if not (0 <= start_index < len(self.steps)): messagebox.showerror("Invalid Start Step", f"Start step must be between 1 and {len(self.steps)}."); return
-            self.current_step_index = start_index
-        except ValueError: messagebox.showerror("Invalid Input", "Start step must be a valid number."); return
-        
+        self.settings = {name: getattr(self, name).get() for name in self.RUN_SETTINGS}
+        self._read_log_verbosity()
+        self.current_step_index = start_index
+
         # --- FIX: Set running flag to True BEFORE starting the timer loop ---
         self.running = True
-        self.automation_start_time = time.time()
-        self.cycle_time_display.set("Cycle Time: 00:00:00")
-        self._update_cycle_time()
-        
-        self.status_label_color_state = 'green'
+        self.predetection = None; self.last_action_at = 0.0
+        self.automation_start_time = self.scheduler.time()
+        self._open_trace_file()
+
         self.log("Automation started.", 'green')
-        self.start_btn.config(state=tk.DISABLED)
-        self.stop_btn.config(state=tk.NORMAL)
-        self.advance_step()
+        self._set_running_ui(True)
+        # The first step runs on the scheduler's thread, like every step after it.
+        self.executor_after_id = self.scheduler.after(0, self.advance_step)
 
     def stop(self, message="Status: Stopped", color_state='blue'):
         """
-        Stops the automation script. This method is designed to be thread-safe,
-        as it can be called from the keyboard listener thread.
+        Stops the automation script. It can be called from any thread (F2 runs on the keyboard
+        listener's): a mouse move in progress is cancelled at once, and the execution state is
+        torn down on the scheduler's thread, the only one that reads it.
         """
         # Use a flag to prevent re-entry from multiple rapid presses
         if self.stop_requested:
             return
         self.stop_requested = True
-        
-        # 1. Immediately set the main running flag to False. This is the primary
-        #    mechanism to halt the execution loops and interruptible moves.
+        self.motion.cancel() # Interrupts a mouse move between two of its points
+        if self.scheduler.in_loop_thread(): self._stop(message, color_state)
+        else: self.scheduler.after(0, self._stop, message, color_state)
+
+    def _stop(self, message, color_state):
+        # 1. Clear the main running flag. This is the primary mechanism to halt the execution loops.
         self.running = False
-        
-        # 2. Cancel any pending `after` calls, which schedule future work.
-        #    This is thread-safe according to Tkinter's documentation.
-        if self.executor_after_id: self.root.after_cancel(self.executor_after_id)
-        if self.delay_countdown_id: self.root.after_cancel(self.delay_countdown_id)
-        if self.timeout_countdown_id: self.root.after_cancel(self.timeout_countdown_id)
-        if self.cycle_time_updater_id: self.root.after_cancel(self.cycle_time_updater_id); self.cycle_time_updater_id = None
-
-        # 3. Safely handle the background detection thread state.
-        with self.detection_lock:
-            self.detection_thread = None
-            self.detection_result = None
-
-        # 4. Schedule the final state changes and UI updates to run in the main Tkinter thread.
-        self.root.after(0, self._finalize_stop_ui, message, color_state)
+        self.motion.cancel() # Also any move an action started before this ran
+        self.predetection = None
+        self._trace_step_exit('stopped', None)
+
+        # 2. Cancel any pending timers and orphan any scan still in flight.
+        self._leave_step()
+        if self.delay_countdown_id: self.scheduler.after_cancel(self.delay_countdown_id)
+
+        # 3. Schedule the final state changes and UI updates.
+        self.scheduler.after(0, self._finalize_stop_ui, message, color_state)
 
     def _finalize_stop_ui(self, message, color_state):
         """
         Performs the final, non-thread-safe actions to complete the stop process.
-        This method MUST be called from the main Tkinter thread via `root.after()`.
+        This method MUST be called from the scheduler thread via `scheduler.after()`.
         """
         if self.automation_start_time > 0:
-            final_elapsed = time.time() - self.automation_start_time
+            final_elapsed = self.scheduler.time() - self.automation_start_time
             total_seconds = int(final_elapsed)
             hours = total_seconds // 3600
             minutes = (total_seconds % 3600) // 60
@@ -121,647 +317,742 @@ class ExecutorMixin:
             self.automation_start_time = 0
 
         # Update the 'Start Step' field if the option is enabled.
-        if self.start_at_stopped_pos.get() and self.current_step_index < len(self.steps):
+        if self.settings.get('start_at_stopped_pos') and self.current_step_index < len(self.steps):
             next_start_step = str(self.current_step_index + 1)
-            self.start_step.set(next_start_step)
+            self._store_setting('start_step', next_start_step)
             self.log(f"Next start step set to {next_start_step}.")
 
+        self.trace.close() # Flushes whatever the writer has not written yet
+
         # Reset internal state variables that hold `after` IDs.
         self.executor_after_id = None
         self.delay_countdown_id = None
         self.timeout_countdown_id = None
 
         # Update all UI elements to reflect the stopped state.
-        self.start_btn.config(state=tk.NORMAL)
-        self.stop_btn.config(state=tk.DISABLED)
-        self.status_label_color_state = color_state
-        color = self.current_theme.get(f"status_{color_state}", self.current_theme.get('status_blue'))
-        self.status_label.config(text=message, foreground=color)
-        self.delay_countdown_label.config(text="")
-        self.timeout_countdown_label.config(text="")
-        self.redraw_flowchart() # Redraw to remove the 'current step' highlight
-        
+        self._set_running_ui(False)
+        self._show_status(message, color_state)
+        self._show_countdown('delay', None)
+        self._show_countdown('timeout', None)
+        self._show_current_step() # Redraw to remove the 'current step' highlight
+
         # Reset the request flag after everything is done.
         self.stop_requested = False
 
     def advance_step(self):
+        self.delay_countdown_id = None
         if not self.running or not self.steps: self.stop(); return
-        if self.timeout_countdown_id: self.root.after_cancel(self.timeout_countdown_id); self.timeout_countdown_id = None
-        self.timeout_countdown_label.config(text=""); self.last_detection_info.set("Detection: N/A")
-        
-        with self.detection_lock:
-            self.detection_thread = None
-            self.detection_result = None
-
-        if self.current_step_index >= len(self.steps): self.log("Completed all steps.", "green"); self.stop("Status: Completed all steps", color_state='green'); return
-        self.current_step_start_time = time.time(); self.redraw_flowchart(); self.run_step_executor()
-
-    def _update_cycle_time(self):
-        if self.running:
-            elapsed = time.time() - self.automation_start_time
-            total_seconds = int(elapsed)
-            hours = total_seconds // 3600
-            minutes = (total_seconds % 3600) // 60
-            seconds = total_seconds % 60
-            time_str = f"{hours:02}:{minutes:02}:{seconds:02}"
-            self.cycle_time_display.set(f"Cycle Time: {time_str}")
-            self.cycle_time_updater_id = self.root.after(100, self._update_cycle_time)
+        self._show_countdown('delay', None); self._show_countdown('timeout', None); self._show_detection("Detection: N/A")
 
-    def _perform_png_detection_in_thread(self, screen_cv, offset, step):
-        """
-        Runs the find_png method in a separate thread to avoid blocking the GUI.
-        The result is stored in self.detection_result.
-        """
-        try:
-            target_pos, confidence = self.find_png(screen_cv, offset, step)
-            with self.detection_lock:
-                if self.detection_thread is threading.current_thread():
-                    self.detection_result = ('png', target_pos, confidence)
-        except Exception as e:
-            print(f"Error in detection thread: {e}")
-            with self.detection_lock:
-                if self.detection_thread is threading.current_thread():
-                    self.detection_result = ('png', None, 0)
+        if self.current_step_index >= len(self.plan): self.log("Completed all steps.", "green"); self.stop("Status: Completed all steps", color_state='green'); return
+        entry = self.plan[self.current_step_index]
+        self.current_step_start_time = self.scheduler.time(); self._show_current_step(); self.metrics.inc('steps_executed')
+        self.trace.record(STEP_ENTER, entry.index, value=entry.timeout); self.trace_step = entry.index
+        if entry.timeout > 0:
+            # One real timer per step visit; the UI renders the countdown from the deadline.
+            self.timeout_countdown_id = self.scheduler.after(int(entry.timeout * 1000), self._on_step_timeout, self.step_generation)
+            self._show_countdown('timeout', self.current_step_start_time + entry.timeout)
+        self.run_step_executor()
 
-    def _perform_color_detection_in_thread(self, screen_cv, offset, step):
+    def _leave_step(self):
         """
-        Runs color detection in a separate thread. The result is stored in self.detection_result.
+        Ends the current step visit: cancels its rescan and timeout timers and bumps the
+        generation so results of scans still in flight are discarded when they arrive.
         """
-        try:
-            target_pos, contour_area = None, 0
-            if step.get('pixel_detect_enabled', False):
-                coords = step.get('pixel_coords')
-                if coords:
-                    current_rgb = pyautogui.pixel(coords[0], coords[1])
-                    target_rgb = step.get('rgb'); tolerance = step.get('tolerance'); color_space = step.get('color_space', 'HSV')
-                    match = False
-                    if color_space == 'RGB':
-                        match = all(abs(c1 - c2) <= tolerance for c1, c2 in zip(current_rgb, target_rgb))
-                    else: 
-                        current_bgr = np.uint8([[list(reversed(current_rgb))]])
-                        target_bgr = np.uint8([[list(reversed(target_rgb))]])
-                        current_hsv = cv2.cvtColor(current_bgr, cv2.COLOR_BGR2HSV)[0][0]
-                        target_hsv = cv2.cvtColor(target_bgr, cv2.COLOR_BGR2HSV)[0][0]
-                        h, s, v = int(target_hsv[0]), int(target_hsv[1]), int(target_hsv[2])
-                        h_tol, s_tol, v_tol = int(tolerance*1.8), int(tolerance*2.5), int(tolerance*2.5)
-                        h_diff = abs(int(current_hsv[0]) - h); h_match = min(h_diff, 180 - h_diff) <= h_tol
-                        s_match = abs(int(current_hsv[1]) - s) <= s_tol
-                        v_match = abs(int(current_hsv[2]) - v) <= v_tol
-                        match = h_match and s_match and v_match
-                    if match:
-                        target_pos, contour_area = coords, 1 
-            else: 
-                color_space = step.get('color_space', 'HSV')
-                if color_space == 'RGB':
-                    target_pos, contour_area = self.find_color_on_screen_rgb(screen_cv, offset, step)
-                else:
-                    target_pos, contour_area = self.find_color_on_screen_hsv(screen_cv, offset, step)
-            
-            with self.detection_lock:
-                if self.detection_thread is threading.current_thread():
-                    self.detection_result = ('color', target_pos, contour_area)
-        except Exception as e:
-            print(f"Error in color detection thread: {e}")
-            with self.detection_lock:
-                if self.detection_thread is threading.current_thread():
-                    self.detection_result = ('color', None, 0)
+        self.step_generation += 1; self.rescan_due = None
+        if self.executor_after_id: self.scheduler.after_cancel(self.executor_after_id); self.executor_after_id = None
+        if self.timeout_countdown_id: self.scheduler.after_cancel(self.timeout_countdown_id); self.timeout_countdown_id = None
+
+    def _trace_step_exit(self, outcome, next_index, delay=0.0):
+        """Traces leaving the step being run and, unless the run was stopped, the jump it took."""
+        if self.trace_step is None: return
+        index, self.trace_step = self.trace_step, None
+        code, target = OUTCOMES.index(outcome), -1 if next_index is None else next_index
+        self.trace.record(STEP_EXIT, index, code, target, value=self.scheduler.time() - self.current_step_start_time)
+        if outcome != 'stopped': self.trace.record(JUMP, index, code, target, value=delay)
+
+    def _on_step_timeout(self, generation):
+        if not self.running or generation != self.step_generation: return
+        self.timeout_countdown_id = None
+        self.handle_timeout()
 
-    def _perform_movement_detection_in_thread(self, current_frame_cv, previous_frame, step):
+    def _schedule_rescan(self):
+        entry = self.plan[self.current_step_index]
+        interval = self._next_scan_interval(entry, self.steps[entry.index])
+        self.rescan_due = time.perf_counter() + interval # For the profiler's 'schedule' phase
+        self.executor_after_id = self.scheduler.after(int(interval * 1000), self.run_step_executor)
+
+    def _next_scan_interval(self, entry, step):
         """
-        Runs movement comparison logic in a separate thread.
+        Delay before the step's next scan. Without adaptive scanning this is the global Scan
+        Interval. With it, the step's own interval halves while its region keeps changing and
+        grows by half on a static screen, never drops below twice the measured scan cost, is
+        capped at a quarter of the time left before the step times out, and stays in [min, max].
         """
-        try:
-            if previous_frame.shape != current_frame_cv.shape:
-                raise ValueError("Frame dimension mismatch during movement detection.")
-
-            diff = cv2.absdiff(previous_frame, current_frame_cv)
-            _, thresholded_diff = cv2.threshold(diff, 30, 255, cv2.THRESH_BINARY)
-            
-            non_zero_count = np.count_nonzero(thresholded_diff)
-            total_pixels = thresholded_diff.size
-            change_percentage = (non_zero_count / total_pixels) * 100 if total_pixels > 0 else 0
-            
-            tolerance = step.get('movement_tolerance', 5.0)
-            is_still = change_percentage <= tolerance
-
-            with self.detection_lock:
-                if self.detection_thread is threading.current_thread():
-                    self.detection_result = ('movement', is_still, change_percentage)
-        except Exception as e:
-            print(f"Error in movement detection thread: {e}")
-            with self.detection_lock:
-                if self.detection_thread is threading.current_thread():
-                     self.detection_result = ('movement', False, -1) # Indicate error
+        settings = self.settings; adaptive = settings['adaptive_scan']
+        if not adaptive: interval = settings['scan_interval']
+        else:
+            lo = settings['min_scan_interval']; hi = max(lo, settings['max_scan_interval'])
+            interval = step.get('_scan_interval', settings['scan_interval'])
+            interval = interval * 0.5 if step.get('_scan_changed') else interval * 1.5
+            interval = max(interval, 2 * step.get('_scan_cost', 0))
+            if entry.timeout > 0: interval = min(interval, (self.current_step_start_time + entry.timeout - self.scheduler.time()) / 4)
+            interval = min(max(interval, lo), hi)
+            step['_scan_interval'] = interval
+        self._show_scan_interval(interval, adaptive)
+        return interval
+
+    def _press_step_key(self, key, pos, on_done):
+        started = time.perf_counter()
+        self.trace.record(ACTION, self.current_step_index, ACTIONS.index('Key Press'))
+        self.input_backend.press(key)
+        self.profiler.record(self.current_step_index, 'input', time.perf_counter() - started)
+        self.log_execution(f"Step {self.current_step_index + 1}: Pressed key '{key}'.")
+        on_done(True, None)
 
     def run_step_executor(self):
+        self.executor_after_id = None
         if not self.running: return
-        if not (0 <= self.current_step_index < len(self.steps)):
+        if not (0 <= self.current_step_index < len(self.plan)):
             self.log(f"Error: Invalid step index {self.current_step_index} detected. Stopping.", "red"); self.stop("Status: Stopped due to invalid index", "red"); return
 
-        step = self.steps[self.current_step_index]
+        entry = self.plan[self.current_step_index]; step = self.steps[entry.index]
+        started = time.perf_counter()
+        if self.rescan_due: self.profiler.record(entry.index, 'schedule', started - self.rescan_due); self.rescan_due = None
+        self.profiler.count_poll(entry.index)
         step['_last_run_info'] = {'timestamp': time.time(), 'result': 'Running', 'details': 'Executing...'}
-        self.status_label.config(text=f"Running Step {self.current_step_index + 1}: {step.get('name', '')}", foreground=self.current_theme['status_green'])
-        
-        is_timeout_step = (step.get('type') in ['color', 'png']) or \
-                          (step.get('logical_type') in ['Number', 'Movement Detect'])
-
-        if is_timeout_step and step.get('timeout', 0) > 0:
-            if time.time() - self.current_step_start_time > step['timeout']: self.handle_timeout(); return
-            self.update_timeout_countdown(self.current_step_start_time, step['timeout'])
-            
-        target_pos, step_succeeded = None, False
+        self._show_status(f"Running Step {self.current_step_index + 1}: {step.get('name', '')}", 'green')
+        self._complete_tick(entry.run, entry, step)
+        self.profiler.record(entry.index, 'tick', time.perf_counter() - started)
+
+    def _complete_tick(self, handler, entry, *args):
+        """Calls handler(entry, *args) and acts on its (succeeded, target_pos) outcome."""
         try:
-            if step['type'] == 'color' and step.get('action') == 'Color Count':
-                area = step.get('area') or (self.area_x1.get(), self.area_y1.get(), self.area_x2.get(), self.area_y2.get())
-                w, h = area[2] - area[0], area[3] - area[1]
-                if w < 1 or h < 1:
-                    self.log_execution(f"Step {self.current_step_index + 1}: Invalid area for Color Count. Failing.", "red")
-                    self.handle_timeout(); return
-
-                screenshot = pyautogui.screenshot(region=(area[0], area[1], w, h))
-                screen_cv = cv2.cvtColor(np.array(screenshot), cv2.COLOR_RGB2BGR)
-                
-                count = self.find_and_count_color(screen_cv, area[0:2], step)
-                expression_str = step.get('count_expression', '>= 1')
-                
-                step.setdefault('_count_current_cycle', 0)
-                max_cycles = step.get('count_max_cycles', 1)
-                
-                self.last_detection_info.set(f"Color Count: Found {count} blobs. Condition: {expression_str}")
-                
-                try:
-                    expression = expression_str.split()
-                    if len(expression) != 2: raise ValueError("Expression must have 2 parts (e.g., '>= 5')")
-                    op, val = expression[0], int(expression[1])
-                    op_map = {'>': count > val, '<': count < val, '>=': count >= val, '<=': count <= val, '==': count == val, '!=': count != val}
-                    result = op_map.get(op, False)
-                    
-                    if result:
-                        self.log_execution(f"Step {self.current_step_index + 1}: Color Count SUCCEEDED. Found {count} blob(s). Condition '{expression_str}' is TRUE.", "green")
-                        step['_last_run_info'] = {'timestamp': time.time(), 'result': True, 'details': f"Found {count} color blobs. Expression '{count} {op} {val}' was {result}."}
-                        step['_count_current_cycle'] = 0
-                        step_succeeded = True
-                    else:
-                        self.log_execution(f"Step {self.current_step_index + 1}: Color Count FAILED. Found {count} blob(s). Condition '{expression_str}' is FALSE.", "orange")
-                        step['_last_run_info'] = {'timestamp': time.time(), 'result': False, 'details': f"Found {count} color blobs. Expression '{count} {op} {val}' was {result}."}
-                        step['_count_current_cycle'] += 1
-                        self.last_detection_info.set(f"Color Count: Failed. Cycle {step['_count_current_cycle']}/{max_cycles}")
-                        if step['_count_current_cycle'] >= max_cycles:
-                            self.log_execution(f"Step {self.current_step_index + 1}: Color Count failed after {max_cycles} cycle(s).", "orange")
-                            step['_count_current_cycle'] = 0
-                            self.handle_timeout()
-                            return
-                        else:
-                            self.executor_after_id = self.root.after(int(self.scan_interval.get() * 1000), self.run_step_executor)
-                            return
-                except (ValueError, IndexError) as e:
-                    self.log_execution(f"Step {self.current_step_index + 1}: Invalid expression '{expression_str}'. Failing: {e}", "red")
-                    step['_count_current_cycle'] = 0
-                    self.handle_timeout()
-                    return
-
-            elif step['type'] == 'png' and step.get('action') == 'PNG Count':
-                area = step.get('area') or (self.area_x1.get(), self.area_y1.get(), self.area_x2.get(), self.area_y2.get())
-                w, h = area[2] - area[0], area[3] - area[1]
-                if w < 1 or h < 1:
-                    self.log_execution(f"Step {self.current_step_index + 1}: Invalid area for PNG Count. Failing.", "red")
-                    self.handle_timeout(); return
-
-                screenshot = pyautogui.screenshot(region=(area[0], area[1], w, h))
-                screen_cv = cv2.cvtColor(np.array(screenshot), cv2.COLOR_RGB2BGR)
-                
-                count = self.find_and_count_png(screen_cv, area[0:2], step)
-                expression_str = step.get('count_expression', '>= 1')
-                
-                step.setdefault('_count_current_cycle', 0)
-                max_cycles = step.get('count_max_cycles', 1)
-                
-                self.last_detection_info.set(f"PNG Count: Found {count}. Condition: {expression_str}")
-                
-                try:
-                    expression = expression_str.split()
-                    if len(expression) != 2: raise ValueError("Expression must have 2 parts (e.g., '>= 5')")
-                    op, val = expression[0], int(expression[1])
-                    op_map = {'>': count > val, '<': count < val, '>=': count >= val, '<=': count <= val, '==': count == val, '!=': count != val}
-                    result = op_map.get(op, False)
-                    
-                    if result:
-                        self.log_execution(f"Step {self.current_step_index + 1}: PNG Count SUCCEEDED. Found {count} instance(s). Condition '{expression_str}' is TRUE.", "green")
-                        step['_last_run_info'] = {'timestamp': time.time(), 'result': True, 'details': f"Found {count} instances. Expression '{count} {op} {val}' was {result}."}
-                        step['_count_current_cycle'] = 0
-                        step_succeeded = True
-                    else:
-                        self.log_execution(f"Step {self.current_step_index + 1}: PNG Count FAILED. Found {count} instance(s). Condition '{expression_str}' is FALSE.", "orange")
-                        step['_last_run_info'] = {'timestamp': time.time(), 'result': False, 'details': f"Found {count} instances. Expression '{count} {op} {val}' was {result}."}
-                        step['_count_current_cycle'] += 1
-                        self.last_detection_info.set(f"PNG Count: Failed. Cycle {step['_count_current_cycle']}/{max_cycles}")
-                        if step['_count_current_cycle'] >= max_cycles:
-                            self.log_execution(f"Step {self.current_step_index + 1}: PNG Count failed after {max_cycles} cycle(s).", "orange")
-                            step['_count_current_cycle'] = 0
-                            self.handle_timeout()
-                            return
-                        else:
-                            self.executor_after_id = self.root.after(int(self.scan_interval.get() * 1000), self.run_step_executor)
-                            return
-                except (ValueError, IndexError) as e:
-                    self.log_execution(f"Step {self.current_step_index + 1}: Invalid expression '{expression_str}'. Failing: {e}", "red")
-                    step['_count_current_cycle'] = 0
-                    self.handle_timeout()
-                    return
-            
-            elif step['type'] == 'location': 
-                target_pos, step_succeeded = step['coords'], True
-                action_text = f"Press Key '{step.get('key_to_press')}'" if step.get('action') == 'Key Press' else f"{step.get('action')} at {step.get('coords')}"
-                self.last_detection_info.set(f"Action: {action_text}")
-                step['_last_run_info'] = {'timestamp': time.time(), 'result': True, 'details': f"Action '{step.get('action')}' scheduled."}
-
-            elif step['type'] == 'logical':
-                step_succeeded, should_return = self.execute_logical_step(step)
-                if should_return: return
-
-            else: # Threaded Detection for regular PNG, Color
-                with self.detection_lock:
-                    if self.detection_thread and self.detection_thread.is_alive():
-                        self.executor_after_id = self.root.after(int(self.scan_interval.get() * 1000), self.run_step_executor); return
-                    
-                    if self.detection_result:
-                        result_type, target_pos, confidence = self.detection_result
-                        current_step_type = step.get('logical_type') or step.get('type')
-                        
-                        if result_type == current_step_type:
-                            if result_type == 'png':
-                                if target_pos:
-                                    step_succeeded = True
-                                    self.last_detection_info.set(f"PNG Found: {confidence*100:.1f}%")
-                                    self.log_execution(f"Step {self.current_step_index + 1}: PNG FOUND at {target_pos} with {confidence*100:.1f}% confidence.", "green")
-                                    step['_last_run_info'] = {'timestamp': time.time(), 'result': True, 'details': f"Found at {target_pos} with {confidence*100:.1f}% confidence."}
-                            
-                            elif result_type == 'color':
-                                contour_area = confidence # In color detection, confidence holds the area
-                                if target_pos:
-                                    step_succeeded = True
-                                    self.last_detection_info.set(f"Color Found: Area {contour_area:.0f}px")
-                                    if step.get('pixel_detect_enabled'):
-                                        self.log_execution(f"Step {self.current_step_index + 1}: Pixel Color FOUND at {target_pos}.", "green")
-                                        step['_last_run_info'] = {'timestamp': time.time(), 'result': True, 'details': f"Found pixel at {target_pos}."}
-                                    else:
-                                        self.log_execution(f"Step {self.current_step_index + 1}: Color Area FOUND at {target_pos} with area {contour_area:.0f}px.", "green")
-                                        step['_last_run_info'] = {'timestamp': time.time(), 'result': True, 'details': f"Found at {target_pos} with area {contour_area:.0f}px."}
-                        
-                        self.detection_result = None
-
-                if not step_succeeded:
-                    area = step.get('area') or (self.area_x1.get(),self.area_y1.get(),self.area_x2.get(),self.area_y2.get())
-                    w,h = area[2]-area[0],area[3]-area[1]
-                    if w < 1 or h < 1: 
-                        self.executor_after_id = self.root.after(int(self.scan_interval.get()*1000),self.run_step_executor); return
-                    
-                    screenshot = pyautogui.screenshot(region=(area[0],area[1],w,h))
-                    screen_cv = cv2.cvtColor(np.array(screenshot),cv2.COLOR_RGB2BGR)
-
-                    if step['type'] == 'png':
-                        self.last_detection_info.set(f"PNG: Searching for {os.path.basename(step.get('path'))}...")
-                        self.log_execution(f"Step {self.current_step_index + 1}: Searching for PNG '{os.path.basename(step.get('path'))}' in area {area} (Thresh: {step.get('threshold')}).")
-                        self.detection_thread = threading.Thread(target=self._perform_png_detection_in_thread, args=(screen_cv, area[0:2], step), daemon=True)
-                    elif step['type'] == 'color':
-                        if step.get('pixel_detect_enabled'):
-                            self.last_detection_info.set(f"Color: Searching for RGB {step.get('rgb')} at pixel {step.get('pixel_coords')}...")
-                            self.log_execution(f"Step {self.current_step_index + 1}: Checking for Color {step.get('rgb')} at pixel {step.get('pixel_coords')} (Tol: {step.get('tolerance')}, Space: {step.get('color_space')}).")
-                        else:
-                            self.last_detection_info.set(f"Color: Searching for RGB {step.get('rgb')}...")
-                            self.log_execution(f"Step {self.current_step_index + 1}: Searching for Color {step.get('rgb')} in area {area} (Tol: {step.get('tolerance')}, Space: {step.get('color_space')}).")
-                        self.detection_thread = threading.Thread(target=self._perform_color_detection_in_thread, args=(screen_cv, area[0:2], step), daemon=True)
-                    
-                    if self.detection_thread: self.detection_thread.start()
-                    self.executor_after_id = self.root.after(int(self.scan_interval.get()*1000), self.run_step_executor)
-                    return
+            outcome = handler(entry, *args)
+            if outcome is None: return
+            step_succeeded, target_pos = outcome
 
             # --- ACTION AND FLOW CONTROL (After a step succeeds) ---
             if step_succeeded:
-                if self.timeout_countdown_id:
-                    self.root.after_cancel(self.timeout_countdown_id)
-                    self.timeout_countdown_id = None
-                self.timeout_countdown_label.config(text="")
-                
-                if step['type'] == 'location':
-                    if step.get('action') == 'Key Press':
-                        pyautogui.press(step.get('key_to_press'))
-                        self.log_execution(f"Step {self.current_step_index + 1}: Pressed key '{step.get('key_to_press')}'.")
-                    else: 
-                        self.execute_action_on_pos(step.get('action'), target_pos)
-                elif step['type'] != 'logical': # For regular PNG and Color
-                    self.execute_action_on_pos(step.get('action'), target_pos)
-                
-                self.handle_flow_control('on_success_action', 'on_success_goto_step')
+                self._end_step_wait(entry)
+                if entry.act: self._predetect(entry.success_next, before_action=True)
+                # Actions may finish later (mouse moves play on the motion thread); the flow continues in _on_action_done.
+                if entry.act: entry.act(target_pos, functools.partial(self._on_action_done, self.step_generation))
+                else: self.handle_flow_control('on_success_action', 'on_success_goto_step')
             else:
-                 self.executor_after_id = self.root.after(int(self.scan_interval.get()*1000), self.run_step_executor)
+                self._schedule_rescan()
 
         except Exception as e:
-            messagebox.showerror("Execution Error", str(e)); self.log(f"Execution Error: {e}", "red"); self.stop("Status: Stopped due to error", color_state='red'); return
-
-    def execute_logical_step(self, step):
-        logical_type = step.get('logical_type')
-        if logical_type == 'Count':
-            current_val = step.get('counter_value', 0)
-            max_count = step.get('max_count', 0)
-            self.last_detection_info.set(f"Count: {current_val + 1} / {max_count if max_count > 0 else '∞'}")
-            step['counter_value'] = current_val + 1
-            step['_last_run_info'] = {'timestamp': time.time(), 'result': True, 'details': f"Counter incremented to {step['counter_value']}."}
-            self.log_execution(f"Step {self.current_step_index + 1}: Count is now {step['counter_value']}/{max_count if max_count > 0 else '∞'}.")
-            
-            if max_count > 0 and step['counter_value'] >= max_count:
-                step['_last_run_info']['result'] = 'Reached'
-                step['_last_run_info']['details'] += f" Max count of {max_count} reached."
-                self.log_execution(f"Step {self.current_step_index + 1}: Max count of {max_count} reached.", "orange")
-                self.handle_flow_control('on_count_reached_action', 'on_count_reached_goto_step')
-                if step.get('reset_on_reach', False):
-                    step['counter_value'] = 0
-                    self.log_execution(f"Step {self.current_step_index + 1}: Counter reset after reaching max count.")
-                return False, True 
-            return True, False
-
-        elif logical_type == 'Wait':
-            if step.get('timer_start_time') is None:
-                step['timer_start_time'] = time.time()
-            elapsed = time.time() - step['timer_start_time']
-            max_time = step.get('max_time', 0)
-            self.last_detection_info.set(f"Wait: {elapsed:.1f}s / {max_time:.1f}s")
-            step['_last_run_info'] = {'timestamp': time.time(), 'result': 'Waiting', 'details': f"Elapsed: {elapsed:.1f}s"}
-            if elapsed >= max_time:
-                step['_last_run_info']['result'] = True
-                step['_last_run_info']['details'] = f"Waited for {elapsed:.2f}s."
-                self.log_execution(f"Step {self.current_step_index + 1}: Wait timer of {max_time}s finished.")
-                step['last_cycle_time'] = round(elapsed, 2); step['timer_start_time'] = None
-                return True, False
+            self._stop_on_error(e)
+
+    def _end_step_wait(self, entry):
+        """Counts a successful poll and stops the step's timeout, as its detection is done."""
+        self.profiler.count_poll(entry.index, succeeded=True)
+        if self.timeout_countdown_id:
+            self.scheduler.after_cancel(self.timeout_countdown_id)
+            self.timeout_countdown_id = None
+        self._show_countdown('timeout', None)
+
+    def _on_action_done(self, generation, completed, error, branch=None):
+        if not self.running or generation != self.step_generation: return
+        self.last_action_at = time.perf_counter()
+        if error is not None: self._stop_on_error(error); return
+        if completed: self.handle_flow_control('on_success_action', 'on_success_goto_step', branch)
+
+    def _stop_on_error(self, e):
+        self._show_error("Execution Error", str(e)); self.log(f"Execution Error: {e}", "red"); self.stop("Status: Stopped due to error", color_state='red')
+
+    # --- Awaited Scans ---
+    def _probe(self, entry, work, judge, *args):
+        """
+        Awaits work(entry, *args) (capture, detection, OCR) on a worker thread through the
+        scheduler, then has judge(entry, step, result) decide the tick the way a handler would.
+        Returns None so the calling handler leaves the flow to the judge. While simulating, the
+        outcome script stands in for work.
+        """
+        if self.outcome_script: work = self.outcome_script.work
+        if self.predetection is not None and self._take_predetection(entry, work, judge): return None
+        self.scheduler.submit(functools.partial(self._on_probe_done, entry, judge, self.step_generation, time.perf_counter()), work, entry, *args)
+        return None
+
+    def _on_probe_done(self, entry, judge, generation, started, result, error):
+        if not self.running or generation != self.step_generation: return
+        step = self.steps[entry.index]; cost = time.perf_counter() - started
+        self.profiler.record(entry.index, 'scan', cost); self.metrics.inc('detections', mark=True)
+        step['_scan_cost'] = 0.7 * step['_scan_cost'] + 0.3 * cost if '_scan_cost' in step else cost
+        if error is not None:
+            self._show_detection("Scan Error: Retrying...")
+            self.log_execution(f"Step {self.current_step_index + 1}: Scan error: {error}", "red")
+            self._schedule_rescan(); return
+        self._complete_tick(judge, entry, step, result)
+
+    # --- Pipelined Pre-detection ---
+    def _predetect(self, index, before_action=False):
+        """
+        With 'Pre-detect Next Step' on, starts step index's scan while the current step's action
+        and delay run, so the detection latency hides behind them. Scans started before the
+        action only run for steps marked 'Safe to Pre-detect'; all others start once the
+        action is done, so their frame never predates it.
+        """
+        if not self.settings['pipeline_detection'] or index is None or not (0 <= index < len(self.plan)): return
+        entry = self.plan[index]
+        if entry.kind not in self.PREDETECT_KINDS or entry.region is None: return
+        if before_action and not self.steps[index].get('predetect_safe', False): return
+        if self.predetection and self.predetection['index'] == index: return
+        spec = {'index': index, 'submitted': time.perf_counter(), 'safe': before_action, 'done': False, 'result': None, 'error': None, 'cost': 0.0, 'waiter': None}
+        self.predetection = spec
+        work = self.outcome_script.work if self.outcome_script else self._capture_and_detect
+        self.scheduler.submit(functools.partial(self._on_predetect_done, spec), work, entry)
+
+    def _on_predetect_done(self, spec, result, error):
+        spec.update(done=True, result=result, error=error, cost=time.perf_counter() - spec['submitted'])
+        if spec['waiter']: waiter, spec['waiter'] = spec['waiter'], None; waiter()
+
+    def _take_predetection(self, entry, work, judge):
+        """
+        Hands the step's first scan to its pre-detection, if one was started for it. Returns
+        False when there is none or its frame predates the last action (a fresh scan is needed).
+        """
+        spec, self.predetection = self.predetection, None
+        if spec['index'] != entry.index: return False
+        if not spec['safe'] and spec['submitted'] < self.last_action_at: self.metrics.inc('predetections_discarded'); return False
+        use = functools.partial(self._use_predetection, entry, work, judge, self.step_generation, spec)
+        if spec['done']: self.scheduler.after(0, use)
+        else: spec['waiter'] = use
+        return True
+
+    def _use_predetection(self, entry, work, judge, generation, spec):
+        """Judges a pre-detected hit as the step's scan; a miss or error is rescanned, as the screen may have changed since."""
+        if not self.running or generation != self.step_generation: return
+        result = spec['result']
+        if spec['error'] is None and (entry.compare(result) if entry.compare else bool(result[0])):
+            self.metrics.inc('predetection_hits')
+            self._on_probe_done(entry, judge, generation, time.perf_counter() - spec['cost'], result, None)
+        else:
+            self.metrics.inc('predetection_misses')
+            self._probe(entry, work, judge)
+
+    def _grab_region(self, entry, conversion=cv2.COLOR_RGB2BGR):
+        """
+        Captures the step's region and records whether it changed since the step's last scan,
+        judged on a 16x16 thumbnail so it costs next to nothing (see _next_scan_interval).
+        """
+        started = time.perf_counter()
+        frame = self.input_backend.grab(entry.region, conversion)
+        self._record_since(entry, 'capture', started); self.metrics.inc('captures', mark=True)
+        step = self.steps[entry.index]; signature = cv2.resize(frame, (16, 16), interpolation=cv2.INTER_AREA).astype(np.int16)
+        previous = step.get('_scan_signature')
+        step['_scan_changed'] = previous is not None and previous.shape == signature.shape and float(np.abs(signature - previous).mean()) > 2.0
+        step['_scan_signature'] = signature
+        return frame
+
+    def _record_since(self, entry, phase, started):
+        """Records the time since started under phase for the entry's step and returns the current time."""
+        now = time.perf_counter(); self.profiler.record(entry.index, phase, now - started)
+        return now
+
+    def _capture_and_detect(self, entry):
+        return entry.detect(self._grab_region(entry), entry.area[0:2], entry.config)
+
+    # --- Metrics ---
+    def collect_metrics(self):
+        """Samples for the metrics endpoint, read from executor, detector and price client internals."""
+        m = self.metrics
+        hits, misses = m.get('template_cache_hits'), m.get('template_cache_misses')
+        samples = [
+            sample('running', 'gauge', "1 while a chart is running.", int(self.running)),
+            sample('uptime_seconds', 'gauge', "Seconds since the process started.", round(time.time() - m.started, 3)),
+            sample('steps_executed_total', 'counter', "Steps entered.", m.get('steps_executed')),
+            sample('detections_total', 'counter', "Completed scans (capture plus detection or OCR).", m.get('detections')),
+            sample('detections_per_second', 'gauge', f"Completed scans per second over the last {RATE_WINDOW}s.", m.rate('detections')),
+            sample('timeouts_total', 'counter', "Steps that timed out or failed.", m.get('timeouts')),
+            sample('captures_total', 'counter', "Screen region captures.", m.get('captures')),
+            sample('capture_fps', 'gauge', f"Captures per second over the last {RATE_WINDOW}s.", m.rate('captures')),
+            sample('predetection_hits_total', 'counter', "Steps whose first scan was a pre-detected hit.", m.get('predetection_hits')),
+            sample('predetection_misses_total', 'counter', "Pre-detections that found nothing and were rescanned.", m.get('predetection_misses')),
+            sample('predetections_discarded_total', 'counter', "Pre-detections dropped because their frame predated the last action.", m.get('predetections_discarded')),
+            sample('template_cache_hits_total', 'counter', "Template and folder cache hits.", hits),
+            sample('template_cache_misses_total', 'counter', "Template and folder cache misses (templates read from disk).", misses),
+            sample('template_cache_hit_ratio', 'gauge', "Template cache hits / lookups.", round(hits / (hits + misses), 4) if hits + misses else None),
+            sample('tk_event_loop_lag_seconds', 'gauge', "How late the Tk UI queue drain last ran.", m.get('tk_event_loop_lag_seconds', None)),
+            sample('tk_event_loop_lag_max_seconds', 'gauge', "Largest Tk UI queue drain lag seen.", m.get('tk_event_loop_lag_max_seconds', None)),
+        ]
+        for level, (emitted, suppressed) in self.log_counts.items():
+            samples.append(sample('log_messages_total', 'counter', "Execution log messages by level, emitted or filtered by the step's log setting and the verbosity.", emitted, level=level, emitted='true'))
+            samples.append(sample('log_messages_total', 'counter', "Execution log messages by level, emitted or filtered by the step's log setting and the verbosity.", suppressed, level=level, emitted='false'))
+        for (endpoint, status), count in sorted(self.ge_prices.request_count_snapshot().items()):
+            samples.append(sample('ge_api_requests_total', 'counter', "GE price API requests by endpoint and HTTP status.", count, endpoint=endpoint, status=status))
+        for index, (count, mean, p95) in sorted(self.profiler.phase_stats('scan').items()):
+            samples.append(sample('detection_latency_seconds', 'gauge', "Scan latency (submit to result) per step.", round(mean, 6), step=index + 1, stat='mean'))
+            samples.append(sample('detection_latency_seconds', 'gauge', "Scan latency (submit to result) per step.", round(p95, 6), step=index + 1, stat='p95'))
+        return samples
+
+    # --- Step Handlers ---
+    def _run_count_step(self, entry, step):
+        if entry.region is None:
+            label = self.COUNT_LABELS[entry.kind][0]
+            self.log_execution(f"Step {self.current_step_index + 1}: Invalid area for {label}. Failing.", "red")
+            self.handle_timeout(); return None
+        return self._probe(entry, self._capture_and_detect, self._judge_count)
+
+    def _judge_count(self, entry, step, count):
+        label, noun, details_noun = self.COUNT_LABELS[entry.kind]
+        expression_str = str(entry.compare)
+        step.setdefault('_count_current_cycle', 0)
+        max_cycles = step.get('count_max_cycles', 1)
+        self._show_detection(f"{label}: Found {count} {noun}. Condition: {expression_str}")
+
+        result = entry.compare(count)
+        self.trace.record(DETECTION, entry.index, int(result), value=count)
+        details = f"Found {count} {details_noun}. Expression '{count} {expression_str}' was {result}."
+        if result:
+            self.log_step("Step {}: {} SUCCEEDED. Found {} {}. Condition '{}' is TRUE.", self.current_step_index + 1, label, count, noun, expression_str, color_name="green")
+            step['_last_run_info'] = {'timestamp': time.time(), 'result': True, 'details': details}
+            step['_count_current_cycle'] = 0
+            return True, None
+
+        self.log_step("Step {}: {} FAILED. Found {} {}. Condition '{}' is FALSE.", self.current_step_index + 1, label, count, noun, expression_str, color_name="orange", level='DEBUG')
+        step['_last_run_info'] = {'timestamp': time.time(), 'result': False, 'details': details}
+        step['_count_current_cycle'] += 1
+        self._show_detection(f"{label}: Failed. Cycle {step['_count_current_cycle']}/{max_cycles}")
+        if step['_count_current_cycle'] >= max_cycles:
+            self.log_execution(f"Step {self.current_step_index + 1}: {label} failed after {max_cycles} cycle(s).", "orange")
+            step['_count_current_cycle'] = 0
+            self.handle_timeout(); return None
+        return False, None
+
+    def _run_location_step(self, entry, step):
+        action_text = f"Press Key '{step.get('key_to_press')}'" if entry.kind == 'key_press' else f"{step.get('action')} at {step.get('coords')}"
+        self._show_detection(f"Action: {action_text}")
+        step['_last_run_info'] = {'timestamp': time.time(), 'result': True, 'details': f"Action '{step.get('action')}' scheduled."}
+        return True, step['coords']
+
+    def _run_detection_step(self, entry, step):
+        """Awaited detection for regular PNG, Color area and single-pixel Color steps."""
+        if entry.region is None: return False, None
+
+        if entry.kind == 'png':
+            self._show_detection(f"PNG: Searching for {os.path.basename(step.get('path'))}...")
+            self.log_step("Step {}: Searching for PNG '{}' in area {} (Thresh: {}).", self.current_step_index + 1, os.path.basename(step.get('path')), entry.area, step.get('threshold'), level='DEBUG')
+        elif entry.kind == 'pixel':
+            self._show_detection(f"Color: Searching for RGB {step.get('rgb')} at pixel {step.get('pixel_coords')}...")
+            self.log_step("Step {}: Checking for Color {} at pixel {} (Tol: {}, Space: {}).", self.current_step_index + 1, step.get('rgb'), step.get('pixel_coords'), step.get('tolerance'), step.get('color_space'), level='DEBUG')
+        else:
+            self._show_detection(f"Color: Searching for RGB {step.get('rgb')}...")
+            self.log_step("Step {}: Searching for Color {} in area {} (Tol: {}, Space: {}).", self.current_step_index + 1, step.get('rgb'), entry.area, step.get('tolerance'), step.get('color_space'), level='DEBUG')
+        return self._probe(entry, self._capture_and_detect, self._judge_detection)
+
+    def _judge_detection(self, entry, step, found):
+        target_pos, confidence = found
+        if not target_pos: self.trace.record(DETECTION, entry.index, 0); return False, None
+        self.trace.record(DETECTION, entry.index, 1, x=int(target_pos[0]), y=int(target_pos[1]), value=confidence)
+        if entry.kind == 'png':
+            self._show_detection(f"PNG Found: {confidence*100:.1f}%")
+            self.log_step("Step {}: PNG FOUND at {} with {:.1f}% confidence.", self.current_step_index + 1, target_pos, confidence * 100, color_name="green")
+            step['_last_run_info'] = {'timestamp': time.time(), 'result': True, 'details': f"Found at {target_pos} with {confidence*100:.1f}% confidence."}
+        elif entry.kind == 'pixel':
+            self._show_detection(f"Color Found: Area {confidence:.0f}px")
+            self.log_step("Step {}: Pixel Color FOUND at {}.", self.current_step_index + 1, target_pos, color_name="green")
+            step['_last_run_info'] = {'timestamp': time.time(), 'result': True, 'details': f"Found pixel at {target_pos}."}
+        else: # In color detection, confidence holds the area
+            self._show_detection(f"Color Found: Area {confidence:.0f}px")
+            self.log_step("Step {}: Color Area FOUND at {} with area {:.0f}px.", self.current_step_index + 1, target_pos, confidence, color_name="green")
+            step['_last_run_info'] = {'timestamp': time.time(), 'result': True, 'details': f"Found at {target_pos} with area {confidence:.0f}px."}
+        return True, target_pos
+
+    def _run_counter_step(self, entry, step):
+        current_val = step.get('counter_value', 0)
+        max_count = step.get('max_count', 0)
+        self._show_detection(f"Count: {current_val + 1} / {max_count if max_count > 0 else '∞'}")
+        step['counter_value'] = current_val + 1
+        step['_last_run_info'] = {'timestamp': time.time(), 'result': True, 'details': f"Counter incremented to {step['counter_value']}."}
+        self.log_step("Step {}: Count is now {}/{}.", self.current_step_index + 1, step['counter_value'], max_count if max_count > 0 else '∞')
+
+        if max_count > 0 and step['counter_value'] >= max_count:
+            step['_last_run_info']['result'] = 'Reached'
+            step['_last_run_info']['details'] += f" Max count of {max_count} reached."
+            self.log_execution(f"Step {self.current_step_index + 1}: Max count of {max_count} reached.", "orange")
+            self.handle_flow_control('on_count_reached_action', 'on_count_reached_goto_step')
+            if step.get('reset_on_reach', False):
+                step['counter_value'] = 0
+                self.log_execution(f"Step {entry.index + 1}: Counter reset after reaching max count.")
+            return None
+        return True, None
+
+    def _run_wait_step(self, entry, step):
+        if step.get('timer_start_time') is None:
+            step['timer_start_time'] = self.scheduler.time()
+        elapsed = self.scheduler.time() - step['timer_start_time']
+        max_time = step.get('max_time', 0)
+        self._show_detection(f"Wait: {elapsed:.1f}s / {max_time:.1f}s")
+        step['_last_run_info'] = {'timestamp': time.time(), 'result': 'Waiting', 'details': f"Elapsed: {elapsed:.1f}s"}
+        if elapsed >= max_time:
+            step['_last_run_info']['result'] = True
+            step['_last_run_info']['details'] = f"Waited for {elapsed:.2f}s."
+            self.log_execution(f"Step {self.current_step_index + 1}: Wait timer of {max_time}s finished.")
+            step['last_cycle_time'] = round(elapsed, 2); step['timer_start_time'] = None
+            return True, None
+        # Sleep on a single timer for the rest of the wait instead of rescanning.
+        self.executor_after_id = self.scheduler.after(int((max_time - elapsed) * 1000) + 1, self.run_step_executor)
+        return None
+
+    def _run_type_text_step(self, entry, step):
+        text_to_type = ""
+        source = step.get('text_source', 'Static Text')
+        if source == 'GE Interface':
+            field = step.get('ge_data_field')
+            if field == "Item Name":
+                text_to_type = self.settings['ge_interface_item_name']
+            elif field == "Quantity":
+                text_to_type = self.settings['ge_interface_item_quantity']
             else:
-                self.executor_after_id = self.root.after(int(self.scan_interval.get()*1000), self.run_step_executor)
-                return False, True
-
-        elif logical_type == 'Type Text':
-            text_to_type = ""
-            source = step.get('text_source', 'Static Text')
-            if source == 'GE Interface':
-                field = step.get('ge_data_field')
-                if field == "Item Name":
-                    text_to_type = self.ge_interface_item_name.get()
-                elif field == "Quantity":
-                    text_to_type = self.ge_interface_item_quantity.get()
+                if self.ge_interface_last_data:
+                    try:
+                        data = self.ge_interface_last_data
+                        high_price = int(data.get('high', 0))
+                        low_price = int(data.get('low', 0))
+                        quantity = int(self.settings['ge_interface_item_quantity'])
+
+                        if field == "Calculated Buy Price":
+                            text_to_type = self._ge_price('buy', high_price, low_price)
+                        elif field == "Calculated Sell Price":
+                            text_to_type = self._ge_price('sell', high_price, low_price)
+                        elif field == "Calculated Buy Total":
+                            price = self._ge_price('buy', high_price, low_price)
+                            text_to_type = price * quantity
+                        elif field == "Calculated Sell Total":
+                            price = self._ge_price('sell', high_price, low_price)
+                            text_to_type = price * quantity
+
+                    except (ValueError, TypeError) as e:
+                        self.log_execution(f"Step {self.current_step_index + 1}: Error processing GE data: {e}", "red")
+                        text_to_type = "ERROR"
                 else:
-                    if self.ge_interface_last_data:
-                        try:
-                            data = self.ge_interface_last_data
-                            high_price = int(data.get('high', 0))
-                            low_price = int(data.get('low', 0))
-                            quantity = int(self.ge_interface_item_quantity.get())
-                            
-                            if field == "Calculated Buy Price":
-                                text_to_type = self._calculate_ge_price('buy', high_price, low_price)
-                            elif field == "Calculated Sell Price":
-                                text_to_type = self._calculate_ge_price('sell', high_price, low_price)
-                            elif field == "Calculated Buy Total":
-                                price = self._calculate_ge_price('buy', high_price, low_price)
-                                text_to_type = price * quantity
-                            elif field == "Calculated Sell Total":
-                                price = self._calculate_ge_price('sell', high_price, low_price)
-                                text_to_type = price * quantity
-                            
-                        except (ValueError, TypeError) as e:
-                            self.log_execution(f"Step {self.current_step_index + 1}: Error processing GE data: {e}", "red")
-                            text_to_type = "ERROR"
-                    else:
-                        self.log_execution(f"Step {self.current_step_index + 1}: No GE data available to type. Fetch data first.", "orange")
-                        text_to_type = ""
-            else: 
-                text_to_type = step.get('text_to_type', '')
-            
-            self.last_detection_info.set(f"Type Text: Typing '{str(text_to_type)[:25]}...'")
-            pyautogui.write(str(text_to_type).replace(',', ''), interval=0.05)
-            if step.get('press_enter', False):
-                delay = step.get('enter_press_delay', 0.1)
-                time.sleep(delay)
-                pyautogui.press('enter')
-            
-            step['_last_run_info'] = {'timestamp': time.time(), 'result': True, 'details': f"Typed '{text_to_type}' from {source}."}
-            self.log_execution(f"Step {self.current_step_index + 1}: Typed text '{text_to_type}' from {source}.")
-            return True, False
-
-        elif logical_type == 'GE Inject':
-            field = step.get('ge_inject_field', 'Name')
-            if field == 'Quantity':
-                quantity_to_inject = step.get('ge_inject_quantity', '1')
-                self.ge_interface_item_quantity.set(quantity_to_inject)
-                self.last_detection_info.set(f"GE Inject: Set quantity to '{quantity_to_inject}'")
-                step['_last_run_info'] = {'timestamp': time.time(), 'result': True, 'details': f"Injected quantity '{quantity_to_inject}'."}
-                self.log_execution(f"Step {self.current_step_index + 1}: Injected quantity '{quantity_to_inject}' into GE Interface.")
-            else: # Default to Name
-                item_name = step.get('ge_inject_name', '')
-                self.ge_interface_item_name.set(item_name)
-                self.last_detection_info.set(f"GE Inject: Set item to '{item_name}'")
-                step['_last_run_info'] = {'timestamp': time.time(), 'result': True, 'details': f"Injected item name '{item_name}'."}
-                self.log_execution(f"Step {self.current_step_index + 1}: Injected item name '{item_name}' into GE Interface.")
-            
-            if step.get('ge_inject_refresh', False):
-                self.log_execution(f"Step {self.current_step_index + 1}: Triggering GE price refresh after inject.")
-                self.update_ge_interface_price()
-
-            return True, False
-        
-        elif logical_type == 'Settings Inject':
-            setting_name = step.get('inject_setting_name')
-            new_value_str = step.get('inject_setting_value')
-            
-            setting_map = {
-                "Location Offset (±px)": {'model': self.loc_offset_variance, 'type': int},
-                "Speed Variance (±s)": {'model': self.speed_variance, 'type': float},
-                "Hold Variance (±s)": {'model': self.hold_duration_variance, 'type': float},
-                "Scan Interval (s)": {'model': self.scan_interval, 'type': float},
-                "Base Hold Duration (s)": {'model': self.hold_duration, 'type': float}
-            }
-
-            if setting_name in setting_map:
-                try:
-                    setting_info = setting_map[setting_name]
-                    converted_value = setting_info['type'](new_value_str)
-                    setting_info['model'].set(converted_value)
-                    self._sync_global_settings_ui_from_model() # Update UI
-                    
-                    self.last_detection_info.set(f"Inject: Set {setting_name} to {converted_value}")
-                    details = f"Injected '{setting_name}' = {converted_value}"
-                    step['_last_run_info'] = {'timestamp': time.time(), 'result': True, 'details': details}
-                    self.log_execution(f"Step {self.current_step_index + 1}: {details}.")
-                    return True, False
-                except (ValueError, tk.TclError) as e:
-                    details = f"Invalid value '{new_value_str}' for {setting_name}. Error: {e}"
-                    step['_last_run_info'] = {'timestamp': time.time(), 'result': False, 'details': details}
-                    self.log_execution(f"Step {self.current_step_index + 1}: {details}", "red")
-            else:
-                details = f"Unknown setting '{setting_name}' to inject."
-                step['_last_run_info'] = {'timestamp': time.time(), 'result': False, 'details': details}
-                self.log_execution(f"Step {self.current_step_index + 1}: {details}", "red")
-
-            return False, False
-
-        elif logical_type == 'Movement Detect':
-            area = step.get('area') or (self.area_x1.get(), self.area_y1.get(), self.area_x2.get(), self.area_y2.get())
-            w, h = area[2] - area[0], area[3] - area[1]
-            if w < 1 or h < 1:
-                self.log_execution(f"Step {self.current_step_index + 1}: Invalid area for Movement Detect. Failing.", "red")
-                self.handle_timeout()
-                return False, True
-
-            screenshot = pyautogui.screenshot(region=(area[0], area[1], w, h))
-            current_frame_cv = cv2.cvtColor(np.array(screenshot), cv2.COLOR_RGB2GRAY)
-            
-            previous_frame = step.get('_previous_frame_for_movement')
-
-            if previous_frame is None:
-                step['_previous_frame_for_movement'] = current_frame_cv
-                self.last_detection_info.set("Movement: 1st frame captured. Waiting for 2nd...")
-                self.log_execution(f"Step {self.current_step_index + 1}: Captured first frame for movement comparison.")
+                    self.log_execution(f"Step {self.current_step_index + 1}: No GE data available to type. Fetch data first.", "orange")
+                    text_to_type = ""
+        else:
+            text_to_type = step.get('text_to_type', '')
+
+        self._show_detection(f"Type Text: Typing '{str(text_to_type)[:25]}...'")
+        self.trace.record(ACTION, entry.index, ACTIONS.index('Type Text'))
+        # Typing takes the Type Interval per key (plus the pause before Enter), so it runs on a worker thread.
+        # A Type Interval of 0 lets the XTest backend send the text as one batch; the 0.05 s default types key by key
+        self.scheduler.submit(functools.partial(self._on_text_typed, entry, text_to_type, source, self.step_generation, time.perf_counter()), self._type_text,
+                              str(text_to_type).replace(',', ''), self.settings['type_interval'], step.get('press_enter', False), step.get('enter_press_delay', 0.1))
+        return None
+
+    def _type_text(self, text, interval, press_enter, enter_delay):
+        self.input_backend.write(text, interval=interval)
+        if press_enter:
+            time.sleep(enter_delay)
+            self.input_backend.press('enter')
+
+    def _on_text_typed(self, entry, text_to_type, source, generation, started, result, error):
+        if not self.running or generation != self.step_generation: return
+        self._record_since(entry, 'input', started)
+        if error is not None: self._stop_on_error(error); return
+        step = self.steps[entry.index]
+        step['_last_run_info'] = {'timestamp': time.time(), 'result': True, 'details': f"Typed '{text_to_type}' from {source}."}
+        self.log_execution(f"Step {self.current_step_index + 1}: Typed text '{text_to_type}' from {source}.")
+        self._complete_tick(lambda entry: (True, None), entry)
+
+    def _run_ge_inject_step(self, entry, step):
+        field = step.get('ge_inject_field', 'Name')
+        if field == 'Quantity':
+            quantity_to_inject = step.get('ge_inject_quantity', '1')
+            self._change_setting('ge_interface_item_quantity', quantity_to_inject)
+            self._show_detection(f"GE Inject: Set quantity to '{quantity_to_inject}'")
+            step['_last_run_info'] = {'timestamp': time.time(), 'result': True, 'details': f"Injected quantity '{quantity_to_inject}'."}
+            self.log_execution(f"Step {self.current_step_index + 1}: Injected quantity '{quantity_to_inject}' into GE Interface.")
+        else: # Default to Name
+            item_name = step.get('ge_inject_name', '')
+            self._change_setting('ge_interface_item_name', item_name)
+            self._show_detection(f"GE Inject: Set item to '{item_name}'")
+            step['_last_run_info'] = {'timestamp': time.time(), 'result': True, 'details': f"Injected item name '{item_name}'."}
+            self.log_execution(f"Step {self.current_step_index + 1}: Injected item name '{item_name}' into GE Interface.")
+
+        if step.get('ge_inject_refresh', False):
+            self.log_execution(f"Step {self.current_step_index + 1}: Triggering GE price refresh after inject.")
+            self.update_ge_interface_price(self.settings['ge_interface_item_name'])
+        return True, None
+
+    def _run_settings_inject_step(self, entry, step):
+        setting_name, converted_value = entry.config['name'], entry.config['value']
+        self._change_setting(entry.config['setting'], converted_value)
+        self._show_settings_changed() # Update UI
+        self._show_detection(f"Inject: Set {setting_name} to {converted_value}")
+        details = f"Injected '{setting_name}' = {converted_value}"
+        step['_last_run_info'] = {'timestamp': time.time(), 'result': True, 'details': details}
+        self.log_execution(f"Step {self.current_step_index + 1}: {details}.")
+        return True, None
+
+    def _change_setting(self, name, value):
+        """Sets a run setting for the rest of the run and stores it in the host's variable."""
+        self.settings[name] = value; self._store_setting(name, value)
+
+    def _ge_price(self, action_type, high_price, low_price):
+        """The GE interface's buy or sell price under the run's price settings (see calculate_price)."""
+        prefix = f"ge_interface_{action_type}_"; settings = self.settings
+        return calculate_price(action_type, settings[prefix + 'price_strategy'], high_price, low_price, int(settings[prefix + 'custom_price']), int(settings[prefix + 'price_margin']))
+
+    def _run_movement_step(self, entry, step):
+        if entry.region is None:
+            self.log_execution(f"Step {self.current_step_index + 1}: Invalid area for Movement Detect. Failing.", "red")
+            self.handle_timeout(); return None
+        return self._probe(entry, self._capture_movement, self._judge_movement, step.get('_previous_frame_for_movement'))
+
+    def _capture_movement(self, entry, previous_frame):
+        """Grabs a grayscale frame and returns (frame, % of pixels changed since previous_frame or None)."""
+        current_frame_cv = self._grab_region(entry, cv2.COLOR_RGB2GRAY)
+        if previous_frame is None or previous_frame.shape != current_frame_cv.shape: return current_frame_cv, None
+
+        started = time.perf_counter()
+        change_percentage = self.frame_change_percent(previous_frame, current_frame_cv)
+        self._record_since(entry, 'match', started)
+        return current_frame_cv, change_percentage
+
+    def _judge_movement(self, entry, step, capture):
+        current_frame_cv, change_percentage = capture
+        if change_percentage is None:
+            if step.get('_previous_frame_for_movement') is None:
+                self._show_detection("Movement: 1st frame captured. Waiting for 2nd...")
+                self.log_step("Step {}: Captured first frame for movement comparison.", self.current_step_index + 1, level='DEBUG')
                 step['_last_run_info'] = {'timestamp': time.time(), 'result': 'Waiting', 'details': 'First frame captured.'}
-                self.executor_after_id = self.root.after(int(self.scan_interval.get() * 1000), self.run_step_executor)
-                return False, True
             else:
-                if previous_frame.shape != current_frame_cv.shape:
-                    self.log_execution(f"Step {self.current_step_index + 1}: Frame dimension mismatch. Resetting comparison.", "orange")
-                    step['_previous_frame_for_movement'] = current_frame_cv
-                    self.executor_after_id = self.root.after(int(self.scan_interval.get() * 1000), self.run_step_executor)
-                    return False, True
-
-                diff = cv2.absdiff(previous_frame, current_frame_cv)
-                _, thresholded_diff = cv2.threshold(diff, 30, 255, cv2.THRESH_BINARY)
-                
-                non_zero_count = np.count_nonzero(thresholded_diff)
-                total_pixels = thresholded_diff.size
-                change_percentage = (non_zero_count / total_pixels) * 100 if total_pixels > 0 else 0
-                
-                tolerance = step.get('movement_tolerance', 5.0)
-                
-                self.last_detection_info.set(f"Movement: {change_percentage:.2f}% changed (Tolerance: {tolerance}%)")
-                
-                step['_previous_frame_for_movement'] = None
-
-                if change_percentage <= tolerance:
-                    self.log_execution(f"Step {self.current_step_index + 1}: Stillness detected between cycles ({change_percentage:.2f}% <= {tolerance}%). Success.")
-                    step['_last_run_info'] = {'timestamp': time.time(), 'result': True, 'details': f"Stillness detected. Change: {change_percentage:.2f}%."}
-                    return True, False
-                else:
-                    self.log_execution(f"Step {self.current_step_index + 1}: Movement detected between cycles ({change_percentage:.2f}%). Continuing.")
-                    step['_last_run_info'] = {'timestamp': time.time(), 'result': 'Waiting', 'details': f"Movement ongoing. Change: {change_percentage:.2f}%."}
-                    self.executor_after_id = self.root.after(int(self.scan_interval.get() * 1000), self.run_step_executor)
-                    return False, True
-        
-        elif logical_type == 'Number':
-            area = step.get('area') or (self.area_x1.get(), self.area_y1.get(), self.area_x2.get(), self.area_y2.get())
-            expression_str = step.get('expression', '> 0')
-            w, h = area[2] - area[0], area[3] - area[1]
-            if w < 1 or h < 1:
-                return False, False 
-            
-            self.log_execution(f"Step {self.current_step_index + 1}: Performing OCR in area {area} with expression '{expression_str}'.")
-            try:
-                screenshot = pyautogui.screenshot(region=(area[0], area[1], w, h))
-                screen_cv = cv2.cvtColor(np.array(screenshot), cv2.COLOR_RGB2BGR)
-
-                image_mode = step.get('image_mode', 'Grayscale')
-                gray = cv2.cvtColor(screen_cv, cv2.COLOR_BGR2GRAY)
-
-                if image_mode == 'Binary (B&W)':
-                    inverted = cv2.bitwise_not(gray)
-                    _, processed_for_ocr = cv2.threshold(inverted, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
-                elif image_mode == 'Grayscale':
-                    processed_for_ocr = cv2.bitwise_not(gray)
-                else: 
-                    processed_for_ocr = cv2.cvtColor(screen_cv, cv2.COLOR_BGR2RGB)
-
-                psm_mode = self.psm_options.get(step.get('psm_mode'), '6')
-                oem_mode = self.oem_options.get(step.get('oem_mode'), '3')
-                ocr_config = f'--oem {oem_mode} --psm {psm_mode} -c tessedit_char_whitelist=0123456789:;,.-'
-                ocr_text = pytesseract.image_to_string(Image.fromarray(processed_for_ocr), config=ocr_config)
-                cleaned_text = "".join(filter(lambda x: x in '0123456789.-', ocr_text))
-
-                self.log_execution(f" > OCR Raw Text: '{ocr_text.strip()}'. Cleaned Number: '{cleaned_text}'.")
-                
-                if not cleaned_text:
-                    self.last_detection_info.set("OCR: No number detected in area.")
-                    self.log_execution(" > OCR FAILED: No valid number characters found in area.", "orange")
-                    return False, False 
-
-                num = float(cleaned_text)
-                expression = expression_str.split()
-                if len(expression) != 2: raise ValueError("Invalid expression format")
-                
-                op, val = expression[0], float(expression[1])
-                op_map = {'>': num > val, '<': num < val, '>=': num >= val, '<=': num <= val, '==': num == val, '!=': num != val}
-                result = op_map.get(op, False)
-
-                self.last_detection_info.set(f"OCR: '{num}'. Condition met: {result}")
-                step['_last_run_info'] = {'timestamp': time.time(), 'result': result, 'details': f"OCR found '{num}'. Condition success: {result}."}
-                
-                if result:
-                    self.log_execution(f" > Evaluation: '{num} {op} {val}' is TRUE. SUCCEEDED.", "green")
-                else:
-                    self.log_execution(f" > Evaluation: '{num} {op} {val}' is FALSE. FAILED.", "orange")
+                self.log_execution(f"Step {self.current_step_index + 1}: Frame dimension mismatch. Resetting comparison.", "orange")
+            step['_previous_frame_for_movement'] = current_frame_cv
+            return False, None
 
-                return result, False
+        tolerance = step.get('movement_tolerance', 5.0)
+        self.trace.record(DETECTION, entry.index, int(change_percentage <= tolerance), value=change_percentage)
+        self._show_detection(f"Movement: {change_percentage:.2f}% changed (Tolerance: {tolerance}%)")
+        step['_previous_frame_for_movement'] = None
 
-            except Exception as e:
-                self.last_detection_info.set(f"OCR Error: Retrying...")
-                self.log_execution(f" > OCR ERROR: {e}", "red")
-                print(f"Error during OCR in step {self.current_step_index + 1}: {e}")
-                return False, False
+        if change_percentage <= tolerance:
+            self.log_step("Step {}: Stillness detected between cycles ({:.2f}% <= {}%). Success.", self.current_step_index + 1, change_percentage, tolerance)
+            step['_last_run_info'] = {'timestamp': time.time(), 'result': True, 'details': f"Stillness detected. Change: {change_percentage:.2f}%."}
+            return True, None
+        self.log_step("Step {}: Movement detected between cycles ({:.2f}%). Continuing.", self.current_step_index + 1, change_percentage, level='DEBUG')
+        step['_last_run_info'] = {'timestamp': time.time(), 'result': 'Waiting', 'details': f"Movement ongoing. Change: {change_percentage:.2f}%."}
+        return False, None
 
-        return False, False
+    def _run_number_step(self, entry, step):
+        if entry.region is None: return False, None
+        self.log_step("Step {}: Performing OCR in area {} with expression '{}'.", self.current_step_index + 1, entry.area, entry.compare, level='DEBUG')
+        return self._probe(entry, self._read_number_text, self._judge_number)
 
+    def _read_number_text(self, entry):
+        return self._ocr_frame(entry, self._grab_region(entry), entry.config)
+
+    def _ocr_frame(self, entry, screen_cv, config):
+        """OCRs a captured frame with config's image mode and '_ocr_config'; returns the raw text."""
+        started = time.perf_counter()
+
+        image_mode = config.get('image_mode', 'Grayscale')
+        if image_mode == 'Binary (B&W)':
+            inverted = cv2.bitwise_not(cv2.cvtColor(screen_cv, cv2.COLOR_BGR2GRAY))
+            _, processed_for_ocr = cv2.threshold(inverted, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
+        elif image_mode == 'Grayscale':
+            processed_for_ocr = cv2.bitwise_not(cv2.cvtColor(screen_cv, cv2.COLOR_BGR2GRAY))
+        else:
+            processed_for_ocr = cv2.cvtColor(screen_cv, cv2.COLOR_BGR2RGB)
+
+        started = self._record_since(entry, 'convert', started)
+        if pytesseract is None: raise RuntimeError("pytesseract is not installed.")
+        ocr_text = pytesseract.image_to_string(Image.fromarray(processed_for_ocr), config=config['_ocr_config'])
+        self._record_since(entry, 'ocr', started)
+        return ocr_text
+
+    def _judge_number(self, entry, step, ocr_text):
+        cleaned_text = "".join(filter(lambda x: x in '0123456789.-', ocr_text))
+        self.log_step(" > OCR Raw Text: '{}'. Cleaned Number: '{}'.", ocr_text.strip(), cleaned_text, level='DEBUG')
+
+        if not cleaned_text:
+            self._show_detection("OCR: No number detected in area.")
+            self.log_step(" > OCR FAILED: No valid number characters found in area.", color_name="orange", level='DEBUG')
+            return False, None
+        try: num = float(cleaned_text)
+        except ValueError as e:
+            self._show_detection(f"OCR Error: Retrying...")
+            self.log_execution(f" > OCR ERROR: {e}", "red")
+            return False, None
+
+        result = entry.compare(num)
+        self.trace.record(DETECTION, entry.index, int(result), value=num)
+        self._show_detection(f"OCR: '{num}'. Condition met: {result}")
+        step['_last_run_info'] = {'timestamp': time.time(), 'result': result, 'details': f"OCR found '{num}'. Condition success: {result}."}
+
+        if result:
+            self.log_step(" > Evaluation: '{} {}' is TRUE. SUCCEEDED.", num, entry.compare, color_name="green")
+        else:
+            self.log_step(" > Evaluation: '{} {}' is FALSE. FAILED.", num, entry.compare, color_name="orange", level='DEBUG')
+        return result, None
+
+    def _run_wait_any_step(self, entry, step):
+        if entry.region is None:
+            self.log_execution(f"Step {self.current_step_index + 1}: Invalid area for Wait for Any. Failing.", "red")
+            self.handle_timeout(); return None
+        self._show_detection(f"Wait for Any: Checking {len(entry.config['_targets'])} target(s)...")
+        return self._probe(entry, self._capture_and_race, self._judge_race)
+
+    def _capture_and_race(self, entry):
+        """
+        Grabs the step's area once and runs every target's detector on that same frame at the
+        same time (OpenCV and Tesseract release the GIL); returns (hit, pos, value) per target.
+        """
+        frame = self._grab_region(entry); offset = entry.area[0:2]; targets = entry.config['_targets']
+        if len(targets) == 1: return [self._race_target(entry, targets[0], frame, offset)]
+        if self.race_pool is None: self.race_pool = ThreadPoolExecutor(max_workers=self.RACE_WORKERS, thread_name_prefix="race")
+        return list(self.race_pool.map(functools.partial(self._evaluate_predicate, entry), targets, itertools.repeat(frame), itertools.repeat(offset)))
+
+    def _evaluate_predicate(self, entry, predicate, frame, offset):
+        """Runs one compiled predicate on a captured frame; returns (hit, pos or None, found value)."""
+        if predicate['type'] == 'Number':
+            cleaned_text = "".join(filter(lambda x: x in '0123456789.-', self._ocr_frame(entry, frame, predicate['config'])))
+            try: num = float(cleaned_text)
+            except ValueError: return False, None, None
+            return predicate['compare'](num), None, num
+        if predicate['compare']: # PNG Count / Color Count
+            count = predicate['detect'](frame, offset, predicate['config'])
+            return predicate['compare'](count), None, count
+        pos, value = predicate['detect'](frame, offset, predicate['config'])
+        return pos is not None, pos, value
+
+    def _judge_race(self, entry, step, results):
+        """Takes the branch of the first target (in list order) that matched, clicking it if the target says so."""
+        targets = entry.config['_targets']
+        match = next((n for n, (hit, _, _) in enumerate(results) if hit), None)
+        if match is None:
+            self.trace.record(DETECTION, entry.index, 0)
+            self._show_detection(f"Wait for Any: No match among {len(targets)} target(s)")
+            return False, None
+
+        _, pos, value = results[match]; target = targets[match]
+        self.trace.record(DETECTION, entry.index, match + 1, x=int(pos[0]) if pos else 0, y=int(pos[1]) if pos else 0, value=value or 0)
+        found_at = f" at {pos}" if pos else f" ('{value}')"
+        self._show_detection(f"Wait for Any: {target['label']} ({target['type']}) matched")
+        self.log_execution(f"Step {self.current_step_index + 1}: {target['label']} ({target['type']}) MATCHED{found_at}. Going to Step {target['next'] + 1}.", "green")
+        step['_last_run_info'] = {'timestamp': time.time(), 'result': True, 'details': f"{target['label']} ({target['type']}) matched{found_at}."}
+
+        self._end_step_wait(entry)
+        if pos and target['action'] != 'Detect Object':
+            self.execute_action_on_pos(target['action'], pos, functools.partial(self._on_action_done, self.step_generation, branch=target['next']))
+        else: self.handle_flow_control('on_success_action', 'on_success_goto_step', target['next'])
+        return None
+
+    def _run_condition_step(self, entry, step):
+        if entry.region is None:
+            self.log_execution(f"Step {self.current_step_index + 1}: Invalid area for Condition. Failing.", "red")
+            self.handle_timeout(); return None
+        self._show_detection(f"Condition: Checking '{step.get('condition', '')}'...")
+        return self._probe(entry, self._capture_and_test, self._judge_condition)
+
+    def _capture_and_test(self, entry):
+        """
+        Grabs the step's area once and evaluates the condition on that frame, short-circuiting
+        so a predicate only runs when the result still depends on it. Returns (result,
+        [(predicate, hit, value), ...] in the order they ran).
+        """
+        frame = self._grab_region(entry); offset = entry.area[0:2]; ran = []
+        return self._test_node(entry, entry.config['_condition'], frame, offset, ran), ran
+
+    def _test_node(self, entry, node, frame, offset, ran):
+        op = node[0]
+        if op == 'pred':
+            predicate = entry.config['_predicates'][node[1]]
+            started = time.perf_counter()
+            hit, _, value = self._evaluate_predicate(entry, predicate, frame, offset)
+            # Running cost and pass rate order the next evaluations (see _order_nodes).
+            weight = self.PREDICATE_STATS_WEIGHT
+            predicate['cost'] += weight * (time.perf_counter() - started - predicate['cost'])
+            predicate['pass_rate'] += weight * (float(hit) - predicate['pass_rate'])
+            ran.append((predicate, hit, value))
+            return hit
+        if op == 'not': return not self._test_node(entry, node[1], frame, offset, ran)
+        for child in self._order_nodes(entry, op, node[1]):
+            if self._test_node(entry, child, frame, offset, ran) == (op == 'or'): return op == 'or'
+        return op == 'and'
+
+    def _order_nodes(self, entry, op, nodes):
+        """
+        Orders the operands of an and/or so the cheapest way to settle it runs first: ascending
+        expected cost / chance of settling it (failing an and, passing an or).
+        """
+        def rank(node):
+            cost, pass_rate = self._estimate_node(entry, node)
+            settles = 1 - pass_rate if op == 'and' else pass_rate
+            return cost / max(settles, 0.01)
+        return sorted(nodes, key=rank)
+
+    def _estimate_node(self, entry, node):
+        """(expected seconds, chance of being true) of a condition subtree, from its predicates' stats."""
+        op = node[0]
+        if op == 'pred':
+            predicate = entry.config['_predicates'][node[1]]
+            return predicate['cost'], predicate['pass_rate']
+        if op == 'not':
+            cost, pass_rate = self._estimate_node(entry, node[1])
+            return cost, 1 - pass_rate
+        cost, reach = 0.0, 1.0 # reach: chance the next operand still has to run
+        for child in self._order_nodes(entry, op, node[1]):
+            child_cost, child_pass = self._estimate_node(entry, child)
+            cost += reach * child_cost; reach *= child_pass if op == 'and' else 1 - child_pass
+        return cost, reach if op == 'and' else 1 - reach
+
+    def _judge_condition(self, entry, step, outcome):
+        result, ran = outcome
+        predicates = entry.config['_predicates']
+        self.trace.record(DETECTION, entry.index, int(result), value=len(ran))
+        summary = ", ".join(f"{p['label']}={'T' if hit else 'F'}" + (f" ({value})" if p['compare'] and value is not None else "") for p, hit, value in ran)
+        skipped = len(predicates) - len(ran)
+        details = f"'{step.get('condition', '')}' was {result}" + (f": {summary}" if summary else "") + (f"; {skipped} predicate(s) skipped." if skipped else ".")
+        self._show_detection(f"Condition: {result} ({len(ran)}/{len(predicates)} checked)")
+        step['_last_run_info'] = {'timestamp': time.time(), 'result': result, 'details': details}
+        self.log_execution(f"Step {self.current_step_index + 1}: Condition {details}", "green" if result else None)
+        return result, None
+
+    def _run_unknown_logical_step(self, entry, step):
+        return False, None
+
+    # --- Flow Control ---
     def handle_timeout(self):
-        step = self.steps[self.current_step_index]
-        
-        is_count_fail = (step.get('type') == 'png' and step.get('action') == 'PNG Count') or \
-                        (step.get('type') == 'color' and step.get('action') == 'Color Count')
-        is_number_fail = step.get('logical_type') == 'Number'
-        
-        if is_count_fail or is_number_fail:
+        entry = self.plan[self.current_step_index]; step = self.steps[entry.index]
+        self._leave_step(); self.metrics.inc('timeouts')
+        self.trace.record(TIMEOUT, entry.index, value=entry.timeout); self._trace_step_exit('timeout', entry.timeout_next)
+
+        if entry.kind in ('color_count', 'png_count', 'number'):
             log_msg = f"Step {self.current_step_index+1} failed."
         else:
             log_msg = f"Step {self.current_step_index+1} timed out."
 
         self.log_execution(log_msg, "orange")
-        
+
         step['_last_run_info']['result'] = 'Timeout'
         step['_last_run_info']['details'] = f"Step failed or timed out after {step.get('timeout', 0)}s."
 
-        action = step['on_timeout_action']
-        if action == 'Stop': self.stop(f"Status: Stopped on timeout at Step {self.current_step_index + 1}", color_state='orange'); return
-        
-        next_index = self.current_step_index + 1 if action == 'Next Step' else step['on_timeout_goto_step'] - 1
-        self.current_step_index = next_index
-        
+        if entry.timeout_next is None: self.stop(f"Status: Stopped on timeout at Step {self.current_step_index + 1}", color_state='orange'); return
+        self.current_step_index = entry.timeout_next
+
         # Schedule advance_step to break any potential recursion loops.
-        self.executor_after_id = self.root.after(1, self.advance_step)
+        self.executor_after_id = self.scheduler.after(1, self.advance_step)
 
-    def handle_flow_control(self, action_key, goto_key):
-        step = self.steps[self.current_step_index]; action = step.get(action_key, 'Stop')
-        if action == 'Stop': self.stop(f"Status: Stopped by flow control at Step {self.current_step_index + 1}", color_state='orange'); return
-        next_index = self.current_step_index + 1 if action == 'Next Step' else step.get(goto_key, 1) - 1
+    def handle_flow_control(self, action_key, goto_key, branch=None):
+        """Leaves the step for its success or count-reached successor; branch overrides the success step (Wait for Any)."""
+        entry = self.plan[self.current_step_index]
+        self._leave_step()
+        if action_key == 'on_count_reached_action': next_index, delay = entry.count_reached_next, entry.count_reached_delay
+        else: next_index, delay = entry.success_next if branch is None else branch, entry.success_delay
+        self._trace_step_exit('count_reached' if action_key == 'on_count_reached_action' else 'success', next_index, delay)
+        if next_index is None: self.stop(f"Status: Stopped by flow control at Step {self.current_step_index + 1}", color_state='orange'); return
         self.current_step_index = next_index
-        delay_key = 'delay_after'
-        if action_key == 'on_count_reached_action': delay_key = 'on_count_reached_delay'
-        self.start_delay_countdown(step.get(delay_key, 0))
+        if delay > 0: self._predetect(next_index)
+        self.start_delay_countdown(delay)
 
     def start_delay_countdown(self, delay_seconds, next_action_func=None):
-        if self.delay_countdown_id: self.root.after_cancel(self.delay_countdown_id)
+        """Runs next_action_func (advance_step by default) after a single timer of delay_seconds."""
+        if self.delay_countdown_id: self.scheduler.after_cancel(self.delay_countdown_id); self.delay_countdown_id = None
         if next_action_func is None: next_action_func = self.advance_step
-        if delay_seconds > 0: end_time = time.time() + delay_seconds; self.update_delay_countdown(end_time, next_action_func)
-        else: next_action_func()
-
-    def update_delay_countdown(self, end_time, next_action_func):
-        remaining = end_time - time.time()
-        if remaining > 0 and self.running: self.delay_countdown_label.config(text=f"Next step in {remaining:.1f}s..."); self.delay_countdown_id = self.root.after(100, lambda: self.update_delay_countdown(end_time, next_action_func))
-        elif self.running: self.delay_countdown_label.config(text=""); next_action_func()
-
-    def update_timeout_countdown(self, start_time, total_timeout):
-        if not self.running: return
-        remaining = total_timeout - (time.time() - start_time)
-        if remaining > 0: self.timeout_countdown_label.config(text=f"Timeout in {remaining:.1f}s..."); self.timeout_countdown_id = self.root.after(100, lambda: self.update_timeout_countdown(start_time, total_timeout))
-        else: self.timeout_countdown_label.config(text="")
-
+        if delay_seconds > 0:
+            self._show_countdown('delay', self.scheduler.time() + delay_seconds)
+            self.delay_countdown_id = self.scheduler.after(int(delay_seconds * 1000), next_action_func)
+        else: self.delay_countdown_id = self.scheduler.after(0, next_action_func) # Not a direct call: chains of instant steps would recurse
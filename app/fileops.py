@@ -4,6 +4,8 @@ import json
 import copy
 import os
 
+from app.chart import GE_SETTINGS, RUNTIME_STEP_KEYS, load_chart, read_global_settings, read_ge_settings, clean_steps
+
 class FileOpsMixin:
     def add_step(self, step_type):
         new_x, new_y = 50, 50
@@ -43,7 +45,7 @@ class FileOpsMixin:
                 'on_count_reached_action': 'Stop', 'on_count_reached_goto_step': 1, 'on_count_reached_delay': 1.0,
                 'expression': '> 0', 'area': None, 'timeout': 5, 'on_timeout_action': 'Next Step', 
                 'image_mode': 'Grayscale', 'psm_mode': '6: Assume a single uniform block of text.', 'oem_mode': '3: Default, based on what is available.',
-                'movement_tolerance': 5.0,
+                'movement_tolerance': 5.0, 'targets': [], 'condition': 'A',
                 '_previous_frame_for_movement': None
             })
         self.steps.append(step_defaults); self.log(f"Added Step {len(self.steps)}: {step_name}"); 
@@ -74,11 +76,19 @@ class FileOpsMixin:
                 current_goto = step.get(goto_key, 0)
                 if current_goto > index_to_remove + 1: step[goto_key] -= 1
                 elif current_goto == index_to_remove + 1: step[goto_key] = 1
+            self._remap_branch_targets(step, lambda goto: goto - 1 if goto > index_to_remove + 1 else (None if goto == index_to_remove + 1 else goto))
         self.log(f"Removed step {index_to_remove + 1}.")
         self.selected_items = []
         self.populate_properties_panel()
         self.redraw_flowchart()
 
+    def _remap_branch_targets(self, step, remap):
+        """Rewrites the 'goto_step' of each Wait for Any branch target with remap(old step number), which returns
+        the new number or None when the target step is gone; a cleared target makes the chart fail to start
+        with a clear error instead of branching to an unrelated step."""
+        for target in step.get('targets', []):
+            if target.get('goto_step') is not None: target['goto_step'] = remap(int(target['goto_step']))
+
     def remove_note(self):
         if not (self.selected_items and len(self.selected_items) == 1 and self.selected_items[0]['type'] == 'note'): return
         index_to_remove = self.selected_items[0]['index']
@@ -95,6 +105,7 @@ class FileOpsMixin:
         new_index = len(self.steps)
         if new_step.get('on_success_goto_step') == index + 1: new_step['on_success_goto_step'] = new_index + 1
         if new_step.get('on_timeout_goto_step') == index + 1: new_step['on_timeout_goto_step'] = new_index + 1
+        self._remap_branch_targets(new_step, lambda goto: new_index + 1 if goto == index + 1 else goto)
         self.steps.append(new_step); self.log(f"Duplicated Step {index + 1} to new Step {len(self.steps)}."); 
         self.selected_items = [{'type': 'step', 'index': len(self.steps) - 1}]
         self.populate_properties_panel()
@@ -141,6 +152,7 @@ class FileOpsMixin:
                     continue
                 old_target = step.get(goto_key, 1) - 1
                 step[goto_key] = index_map.get(old_target, 0) + 1
+            self._remap_branch_targets(step, lambda goto: index_map[goto - 1] + 1 if goto - 1 in index_map else None)
 
         self.log(f"Removed {len(remove_set)} steps.")
         self.selected_items = []
@@ -168,6 +180,8 @@ class FileOpsMixin:
                 elif action == 'Next Step':
                     next_original_index = original_index + 1
                     if next_original_index not in old_to_new_index_map: new_step[action_key] = 'Stop'
+            # Branches into the duplicated group follow it; others are cleared, as the goto keys above are set to 'Stop'
+            self._remap_branch_targets(new_step, lambda goto: old_to_new_index_map[goto - 1] + 1 if goto - 1 in old_to_new_index_map else None)
         min_x = min(self.steps[i].get('x', 0) for i in original_indices); max_y = 0
         for i in original_indices:
             self._calculate_node_size(i)
@@ -198,10 +212,7 @@ class FileOpsMixin:
         if not filepath: return
         steps_to_save = copy.deepcopy(self.steps)
         for s in steps_to_save:
-            s.pop('_width', None)
-            s.pop('_height', None)
-            s.pop('_last_run_info', None)
-            s.pop('_previous_frame_for_movement', None)
+            for key in RUNTIME_STEP_KEYS: s.pop(key, None)
         settings = {
             "global_settings": {
                 "mouse_move_mode": self.mouse_move_mode.get(),
@@ -210,6 +221,14 @@ class FileOpsMixin:
                 "min_move_time": self.min_move_time.get(),
                 "max_move_time": self.max_move_time.get(),
                 "scan_interval": self.scan_interval.get(), 
+                "adaptive_scan": self.adaptive_scan.get(),
+                "min_scan_interval": self.min_scan_interval.get(),
+                "max_scan_interval": self.max_scan_interval.get(),
+                "type_interval": self.type_interval.get(),
+                "pipeline_detection": self.pipeline_detection.get(),
+                "input_backend_name": self.input_backend_name.get(),
+                "log_verbosity": self.log_verbosity.get(),
+                "ui_refresh_ms": self.ui_refresh_ms.get(),
                 "hold_duration": self.hold_duration.get(), 
                 "loc_offset_variance": self.loc_offset_variance.get(), 
                 "speed_variance": self.speed_variance.get(), 
@@ -221,7 +240,8 @@ class FileOpsMixin:
                 "grid_visible": self.grid_visible.get(),
                 "grid_latching": self.grid_latching.get(),
                 "grid_spacing": self.grid_spacing.get(),
-                "grid_opacity": self.grid_opacity.get()
+                "grid_opacity": self.grid_opacity.get(),
+                "minimap_visible": self.minimap_visible.get()
             }, 
             "steps": steps_to_save, 
             "annotations": self.annotations 
@@ -229,16 +249,7 @@ class FileOpsMixin:
         
         ge_step_exists = any(s.get('logical_type') == 'GE Inject' or s.get('text_source') == 'GE Interface' for s in steps_to_save)
         if ge_step_exists:
-            settings["ge_interface_settings"] = {
-                'item_name': self.ge_interface_item_name.get(),
-                'quantity': self.ge_interface_item_quantity.get(),
-                'buy_price_strategy': self.ge_interface_buy_price_strategy.get(),
-                'sell_price_strategy': self.ge_interface_sell_price_strategy.get(),
-                'buy_custom_price': self.ge_interface_buy_custom_price.get(),
-                'sell_custom_price': self.ge_interface_sell_custom_price.get(),
-                'buy_price_margin': self.ge_interface_buy_price_margin.get(),
-                'sell_price_margin': self.ge_interface_sell_price_margin.get()
-            }
+            settings["ge_interface_settings"] = {key: getattr(self, attr).get() for key, (attr, default) in GE_SETTINGS.items()}
             self.log("GE Interface settings included in export.")
             
         try:
@@ -251,68 +262,22 @@ class FileOpsMixin:
         filepath = filedialog.askopenfilename(filetypes=[("JSON Files","*.json")], title="Import and Append Flowchart");
         if not filepath: return
         try:
-            with open(filepath, 'r') as f: loaded_data = json.load(f)
+            loaded_data = load_chart(filepath)
             if "global_settings" in loaded_data:
-                gs = loaded_data["global_settings"]
-                
-                # Handle backward compatibility for mouse mode
-                if "mouse_move_mode" in gs:
-                    self.mouse_move_mode.set(gs.get("mouse_move_mode", "Regular"))
-                elif gs.get("enable_dynamic_speed", False):
-                    self.mouse_move_mode.set("Dynamic")
-                else:
-                    self.mouse_move_mode.set("Regular")
-
-                self.mouse_speed.set(gs.get("mouse_speed", 0.25))
-                self.pixels_per_second.set(gs.get("pixels_per_second", 1000))
-                self.min_move_time.set(gs.get("min_move_time", 0.05))
-                self.max_move_time.set(gs.get("max_move_time", 0.3))
-                self.scan_interval.set(gs.get("scan_interval", 0.25))
-                self.hold_duration.set(gs.get("hold_duration", 0.08))
-                self.loc_offset_variance.set(gs.get("loc_offset_variance", 4))
-                self.speed_variance.set(gs.get("speed_variance", 0.06))
-                self.hold_duration_variance.set(gs.get("hold_duration_variance", 0.03))
-                self.area_x1.set(gs.get("area_x1", 0)); self.area_y1.set(gs.get("area_y1", 0))
-                screen_w, screen_h = pyautogui.size()
-                self.area_x2.set(gs.get("area_x2", screen_w)); self.area_y2.set(gs.get("area_y2", screen_h)); self.hide_on_select.set(gs.get("hide_on_select", True))
-                self.start_at_stopped_pos.set(gs.get("start_at_stopped_pos", False))
-                # --- Grid Settings ---
-                self.grid_visible.set(gs.get("grid_visible", False))
-                self.grid_latching.set(gs.get("grid_latching", False))
-                self.grid_spacing.set(gs.get("grid_spacing", 30))
-                self.grid_opacity.set(gs.get("grid_opacity", 0.3))
+                for key, value in read_global_settings(loaded_data["global_settings"], self.input_backend.size()).items():
+                    getattr(self, key).set(value)
                 self._sync_global_settings_ui_from_model(); self.apply_theme(); self.log("Loaded global settings from file.")
 
             if "ge_interface_settings" in loaded_data:
-                gis = loaded_data["ge_interface_settings"]
-                self.ge_interface_item_name.set(gis.get('item_name', ''))
-                self.ge_interface_item_quantity.set(gis.get('quantity', '1'))
-                self.ge_interface_buy_price_strategy.set(gis.get('buy_price_strategy', 'Flip-Buy (use Insta-Sell)'))
-                self.ge_interface_sell_price_strategy.set(gis.get('sell_price_strategy', 'Flip-Sell (use Insta-Buy)'))
-                self.ge_interface_buy_custom_price.set(gis.get('buy_custom_price', '0'))
-                self.ge_interface_sell_custom_price.set(gis.get('sell_custom_price', '0'))
-                self.ge_interface_buy_price_margin.set(gis.get('buy_price_margin', '1'))
-                self.ge_interface_sell_price_margin.set(gis.get('sell_price_margin', '1'))
+                for attr, value in read_ge_settings(loaded_data["ge_interface_settings"]).items():
+                    getattr(self, attr).set(value)
                 self.log("Loaded GE Interface settings from file.")
                 # --- FIX: Manually trigger UI update for margin widgets ---
                 self._toggle_ge_buy_options()
                 self._toggle_ge_sell_options()
 
-            steps, notes = loaded_data.get("steps", []), loaded_data.get("annotations", [])
-            
-            cleaned_steps = []
-            for s in steps:
-                if s.get('type') == 'ge':
-                    self.log(f"Note: Old 'GE Step' ({s.get('name')}) was ignored during import.", "orange")
-                    continue
-                if s.get('type') == 'number': s['type'] = 'logical'; s['logical_type'] = 'Number'
-                if s.get('type') == 'location' and s.get('action') == 'Click Object': s['action'] = 'Left Click'
-                if s.get('logical_type') == 'Timer': s['logical_type'] = 'Wait'
-                if s.get('logical_type') == 'Number':
-                    if s.get('psm_mode') and s['psm_mode'].isdigit(): s['psm_mode'] = next((k for k, v in self.psm_options.items() if v == s['psm_mode']), "6: Assume a single uniform block of text.")
-                    if s.get('oem_mode') and s['oem_mode'].isdigit(): s['oem_mode'] = next((k for k, v in self.oem_options.items() if v == s['oem_mode']), "3: Default, based on what is available.")
-                s['_last_run_info'] = {'timestamp': None, 'result': None, 'details': 'Imported, not yet run'}
-                cleaned_steps.append(s)
+            notes = loaded_data.get("annotations", [])
+            cleaned_steps = clean_steps(loaded_data.get("steps", []), self.log)
 
             if not cleaned_steps and not notes: self.log("Imported file contains no compatible steps or notes.", "orange"); return
             count = len(self.steps)
@@ -325,6 +290,7 @@ class FileOpsMixin:
                 for key in ['on_success_goto_step', 'on_timeout_goto_step', 'on_count_reached_goto_step']:
                     if s.get(key): s[key] += count
                 if s.get('on_success_action') == 'Next Step' and 'on_success_goto_step' in s: s['on_success_goto_step'] += count
+                self._remap_branch_targets(s, lambda goto: goto + count)
                 s['y'] = s.get('y', 50) + y_offset
             for n in notes: n['y'] = n.get('y', 50) + y_offset
             self.steps.extend(cleaned_steps); self.annotations.extend(notes); self.redraw_flowchart(); self.log(f"Appended {len(cleaned_steps)} steps and {len(notes)} notes from {os.path.basename(filepath)}.")
@@ -400,6 +366,8 @@ class FileOpsMixin:
                     else:
                         # This step's successor is outside the pasted group, so default to Stop
                         new_step[action_key] = 'Stop'
+            # Branches into the pasted group follow it; others are cleared, like the goto keys above
+            self._remap_branch_targets(new_step, lambda goto: old_to_new_index_map[goto - 1] + 1 if goto - 1 in old_to_new_index_map else None)
         
         self.steps.extend(new_steps)
         self.log(f"Pasted {len(new_steps)} steps.")
@@ -0,0 +1,142 @@
+import urllib.request
+import urllib.error
+import json
+import threading
+import time
+
+API_BASE_URL = "https://prices.runescape.wiki/api/v1/osrs"
+API_HEADERS = {'User-Agent': 'Flowchart Automation Tool - Contact on GitHub'}
+
+
+def calculate_price(action_type, strategy, high_price, low_price, custom_price, margin):
+    """Calculates a final price based on the strategy for either 'buy' or 'sell'."""
+    if action_type == 'buy':
+        if strategy == 'Insta-Buy': return high_price
+        if strategy == '+5%': return int(high_price * 1.05)
+        if strategy == '-5%': return int(high_price * 0.95)
+        if strategy == 'Custom Price': return custom_price
+        if strategy == 'Flip-Buy (use Insta-Sell)': return low_price
+        if strategy == 'Flip-Buy (Insta-Sell + Margin)': return low_price + margin
+        return high_price # Default
+    else: # sell
+        if strategy == 'Insta-Sell': return low_price
+        if strategy == '+5%': return int(low_price * 1.05)
+        if strategy == '-5%': return int(low_price * 0.95)
+        if strategy == 'Custom Price': return custom_price
+        if strategy == 'Flip-Sell (use Insta-Buy)': return high_price
+        if strategy == 'Flip-Sell (Insta-Buy - Margin)': return high_price - margin
+        return low_price # Default
+
+
+class GEPriceProvider:
+    """
+    Client for the OSRS Wiki price API with the item map, per-item and bulk caches.
+    Has no UI dependencies so it can be shared by the app and the headless engine.
+    """
+    def __init__(self, headers, log):
+        self.headers = headers
+        self.log = log
+        self.item_mapping_cache = None; self.item_price_cache = {}; self.all_item_prices_cache = None; self.hourly_volume_cache = None
+        self.request_counts = {} # (endpoint, HTTP status or 'error') -> count
+        self._counts_lock = threading.Lock()
+
+    def _open(self, endpoint, url):
+        """urlopen() for an API endpoint, counting each request by endpoint and HTTP status."""
+        try: response = urllib.request.urlopen(urllib.request.Request(url, headers=self.headers))
+        except Exception as e:
+            self._count_request(endpoint, str(e.code) if isinstance(e, urllib.error.HTTPError) else 'error'); raise
+        self._count_request(endpoint, str(response.status))
+        return response
+
+    def request_count_snapshot(self):
+        with self._counts_lock: return dict(self.request_counts)
+
+    def _count_request(self, endpoint, status):
+        with self._counts_lock: self.request_counts[(endpoint, status)] = self.request_counts.get((endpoint, status), 0) + 1
+
+    def get_item_mapping(self):
+        if self.item_mapping_cache is not None: return self.item_mapping_cache
+        url = f"{API_BASE_URL}/mapping"
+        try:
+            with self._open('mapping', url) as response:
+                if response.status == 200:
+                    data = json.loads(response.read().decode())
+                    self.item_mapping_cache = {'by_name': {item['name'].lower(): item for item in data}, 'by_id': {item['id']: item for item in data}}
+                    self.log("Successfully downloaded and cached OSRS item map.")
+                    return self.item_mapping_cache
+                else: self.log(f"API Error: Failed to get item map (Status: {response.status})", "red"); return None
+        except Exception as e: self.log(f"API Request Error: {e}", "red"); return None
+
+    def get_item_price(self, item_name):
+        item_map_data = self.get_item_mapping()
+        if not item_map_data:
+            return None
+        item_map = item_map_data.get('by_name')
+        if not item_map:
+            return None
+
+        item_data = item_map.get(item_name.lower())
+        if not item_data:
+            self.log(f"Item '{item_name}' not found in the mapping.", "orange")
+            return None
+
+        item_id = item_data['id']
+        if item_id in self.item_price_cache:
+            cached_data, timestamp = self.item_price_cache[item_id]
+            if (time.time() - timestamp) < 60:
+                return cached_data
+
+        url = f"{API_BASE_URL}/latest?id={item_id}"
+        try:
+            with self._open('latest_item', url) as response:
+                if response.status == 200:
+                    response_json = json.loads(response.read().decode())
+                    if not response_json or 'data' not in response_json or response_json['data'] is None:
+                        self.log(f"API Error: Malformed data response for {item_name}", "red")
+                        return None
+
+                    data = response_json['data']
+                    if str(item_id) in data:
+                        item_price_info = data[str(item_id)]
+                        self.item_price_cache[item_id] = (item_price_info, time.time())
+                        return item_price_info
+                    else:
+                        self.log(f"API Warning: Price data not available for {item_name} (ID: {item_id})", "orange")
+                        return None
+                else:
+                    self.log(f"API Error: Failed to get price for {item_name} (Status: {response.status})", "red")
+                    return None
+        except Exception as e:
+            self.log(f"API Request Error for {item_name}: {e}", "red")
+            return None
+
+    def get_all_latest_prices(self):
+        if self.all_item_prices_cache:
+            cached_data, timestamp = self.all_item_prices_cache
+            if (time.time() - timestamp) < 300: return cached_data
+
+        url = f"{API_BASE_URL}/latest"
+        try:
+            with self._open('latest', url) as response:
+                if response.status == 200:
+                    data = json.loads(response.read().decode())['data']
+                    self.all_item_prices_cache = (data, time.time()); self.log("Successfully downloaded latest prices for all items.")
+                    return data
+                else: self.log(f"API Error: Failed to get all prices (Status: {response.status})", "red"); return None
+        except Exception as e: self.log(f"API Request Error (all prices): {e}", "red"); return None
+
+    def get_all_hourly_volumes(self):
+        if self.hourly_volume_cache:
+            cached_data, timestamp = self.hourly_volume_cache
+            if (time.time() - timestamp) < 300: return cached_data
+
+        url = f"{API_BASE_URL}/1h"
+        try:
+            with self._open('1h', url) as response:
+                if response.status == 200:
+                    data = json.loads(response.read().decode())['data']
+                    self.hourly_volume_cache = (data, time.time())
+                    self.log("Successfully downloaded 1-hour volumes for all items.")
+                    return data
+                else: self.log(f"API Error: Failed to get all volumes (Status: {response.status})", "red"); return None
+        except Exception as e: self.log(f"API Request Error (all volumes): {e}", "red"); return None
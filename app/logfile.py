@@ -0,0 +1,102 @@
+import gzip
+import os
+import queue
+import shutil
+import sys
+import threading
+import time
+
+# Severity of a log line, from the colour it is logged with; every other colour is INFO.
+LEVELS = ('DEBUG', 'INFO', 'WARNING', 'ERROR')
+LEVEL_RANK = {level: rank for rank, level in enumerate(LEVELS)}
+COLOR_LEVELS = {'orange': 'WARNING', 'red': 'ERROR'}
+MB = 1024 * 1024
+_STOP = object()
+
+
+def level_for_color(color_name): return COLOR_LEVELS.get(color_name, 'INFO')
+
+
+class LogFileSink:
+    """
+    Appends log lines to a text file from a background thread. write() only puts the line
+    on a queue, so it can be called from the executor's hot path and from any thread; the
+    writer drains everything queued in one go and flushes once per batch. The file is
+    rotated before it grows past max_bytes or once it is rotate_seconds old (0 disables
+    either): it is renamed with a timestamp suffix, gzipped when compress is set, and only
+    the newest 'backups' rotated files are kept. Lines below min_level are not queued.
+    """
+    def __init__(self, filepath, max_bytes=10 * MB, rotate_seconds=0, compress=False, backups=10, min_level='INFO'):
+        self.filepath = filepath
+        self.max_bytes = max_bytes
+        self.rotate_seconds = rotate_seconds
+        self.compress = compress
+        self.backups = backups
+        self.min_rank = LEVEL_RANK[min_level]
+        self.written = 0; self.rotations = 0
+        self.error = None # The last OSError of the writer; lines are dropped while the file cannot be written
+        self._queue = queue.SimpleQueue()
+        self._file = None; self._size = 0; self._opened_at = 0.0
+        self._open_file()
+        self._writer = threading.Thread(target=self._write_loop, name="log-writer", daemon=True); self._writer.start()
+
+    def write(self, message, level='INFO'):
+        if LEVEL_RANK[level] >= self.min_rank: self._queue.put((time.time(), level, message))
+
+    def close(self):
+        """Writes every queued line and closes the file."""
+        if self._writer is None: return
+        self._queue.put(_STOP); self._writer.join(); self._writer = None
+
+    # --- Writer Thread ---
+    def _write_loop(self):
+        while True:
+            batch = [self._queue.get()]
+            try:
+                while True: batch.append(self._queue.get_nowait())
+            except queue.Empty: pass
+            for record in batch:
+                if record is _STOP: self._close_file(); return
+                self._emit(*record)
+            if self._file: self._file.flush()
+
+    def _emit(self, t, level, message):
+        line = f"{time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(t))}.{int(t % 1 * 1000):03d} {level:<7} {message}\n".encode('utf-8', 'replace')
+        try:
+            if self._file is None: self._open_file()
+            if self._size and ((self.max_bytes and self._size + len(line) > self.max_bytes) or (self.rotate_seconds and t - self._opened_at >= self.rotate_seconds)):
+                self._rotate()
+            self._file.write(line); self._size += len(line); self.written += 1
+        except OSError as e:
+            if self.error is None: print(f"Log file {self.filepath}: {e}", file=sys.stderr)
+            self.error = e; self._close_file()
+
+    def _open_file(self):
+        directory = os.path.dirname(self.filepath)
+        if directory: os.makedirs(directory, exist_ok=True)
+        self._file = open(self.filepath, 'ab'); self._size = self._file.tell(); self._opened_at = time.time()
+
+    def _close_file(self):
+        if self._file: self._file.close(); self._file = None
+
+    def _rotate(self):
+        self._close_file()
+        root, ext = os.path.splitext(self.filepath)
+        rotated = f"{root}.{time.strftime('%Y%m%d-%H%M%S')}{ext}"
+        n = 1
+        while os.path.exists(rotated) or os.path.exists(rotated + '.gz'): rotated = f"{root}.{time.strftime('%Y%m%d-%H%M%S')}-{n}{ext}"; n += 1
+        os.replace(self.filepath, rotated)
+        if self.compress:
+            with open(rotated, 'rb') as src, gzip.open(rotated + '.gz', 'wb') as dst: shutil.copyfileobj(src, dst)
+            os.remove(rotated)
+        self.rotations += 1
+        self._prune(root, ext)
+        self._open_file()
+
+    def _prune(self, root, ext):
+        """Deletes all but the newest 'backups' rotated files."""
+        directory, prefix = os.path.dirname(root) or '.', os.path.basename(root) + '.'
+        rotated = [os.path.join(directory, name) for name in os.listdir(directory)
+                   if name.startswith(prefix) and (name.endswith(ext) or name.endswith(ext + '.gz')) and name != os.path.basename(self.filepath)]
+        rotated.sort(key=lambda path: os.stat(path).st_mtime_ns)
+        for path in rotated[:max(0, len(rotated) - self.backups)]: os.remove(path)
@@ -0,0 +1,78 @@
+import collections
+import tkinter as tk
+
+
+class LogView:
+    """
+    The Execution Log: the line history and the Text widget that shows it. add() may be
+    called from any thread and only queues the line; every flush_ms the Tk thread moves the
+    queued lines into the history and appends the ones matching the search query to the
+    widget in a single insert. Without a query, the history and the widget are trimmed to the
+    last max_lines lines; while a query is set every line is kept, so the search sees all of
+    them. The widget is only rebuilt from the history when the query or the line limit changes.
+    """
+    def __init__(self, root, max_lines=500, flush_ms=100):
+        self.root = root
+        self.flush_ms = flush_ms
+        self.widget = None
+        self.max_lines = max_lines # 0 keeps every line
+        self.history = collections.deque()
+        self.query = ''
+        self.shown = 0 # Lines currently in the widget
+        self._pending = collections.deque() # Appended by any thread, drained by flush() on the Tk thread
+        self._after_id = None
+
+    def add(self, line): self._pending.append(line)
+
+    def start(self):
+        if self._after_id is None: self._tick()
+
+    def stop(self):
+        if self._after_id: self.root.after_cancel(self._after_id); self._after_id = None
+
+    def _tick(self):
+        self.flush()
+        self._after_id = self.root.after(self.flush_ms, self._tick)
+
+    def attach(self, widget):
+        self.widget = widget; self.rebuild()
+
+    def flush(self):
+        """Moves queued lines into the history and appends the matching ones to the widget."""
+        lines = [self._pending.popleft() for _ in range(len(self._pending))]
+        if not lines: return
+        self.history.extend(lines); self._trim()
+        if self.widget is None: return
+        shown = [line for line in lines if self._matches(line)] if self.query else lines
+        if self.max_lines and not self.query: shown = shown[-self.max_lines:]
+        if shown: self._write(shown, append=True)
+
+    def set_filter(self, query, max_lines):
+        """Rebuilds the widget when the search query or the line limit changed."""
+        query = query.lower()
+        if query == self.query and max_lines == self.max_lines: return
+        self.max_lines = max_lines; self.query = query
+        self.flush(); self._trim(); self.rebuild()
+
+    def clear(self):
+        self._pending.clear(); self.history.clear(); self.rebuild()
+
+    def rebuild(self):
+        if self.widget is None: return
+        lines = [line for line in self.history if self._matches(line)] if self.query else list(self.history)
+        self._write(lines, append=False)
+
+    def _trim(self):
+        if self.max_lines and not self.query:
+            for _ in range(len(self.history) - self.max_lines): self.history.popleft()
+
+    def _matches(self, line): return self.query in line.lower()
+
+    def _write(self, lines, append):
+        widget = self.widget
+        widget.config(state='normal')
+        if not append: widget.delete('1.0', tk.END); self.shown = 0
+        if lines: widget.insert(tk.END, "\n".join(lines) + "\n"); self.shown += len(lines)
+        if self.max_lines and not self.query and self.shown > self.max_lines:
+            widget.delete('1.0', f'{self.shown - self.max_lines + 1}.0'); self.shown = self.max_lines
+        widget.config(state='disabled'); widget.yview(tk.END)
@@ -0,0 +1,97 @@
+import collections
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+METRIC_PREFIX = "flowchart_"
+RATE_WINDOW = 10 # Seconds averaged by Metrics.rate()
+
+
+class Metrics:
+    """
+    Thread-safe counters and gauges fed from the executor, detectors, price client and UI
+    queue. Counters can also be marked so Metrics.rate() can report a per-second rate over
+    the last RATE_WINDOW seconds without the reader having to diff scrapes.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.counters = {}; self.gauges = {}
+        self._recent = {} # name -> deque of [second, count]
+        self.started = time.time()
+
+    def inc(self, name, amount=1, mark=False):
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + amount
+            if mark:
+                now = int(time.time()); recent = self._recent.setdefault(name, collections.deque())
+                if recent and recent[-1][0] == now: recent[-1][1] += amount
+                else: recent.append([now, amount])
+                while recent[0][0] < now - RATE_WINDOW: recent.popleft()
+
+    def set(self, name, value):
+        with self._lock: self.gauges[name] = value
+
+    def get(self, name, default=0):
+        with self._lock: return self.counters.get(name, self.gauges.get(name, default))
+
+    def rate(self, name):
+        """Marked increments of name per second over the last RATE_WINDOW full seconds."""
+        with self._lock:
+            now = int(time.time()); window = min(RATE_WINDOW, now - int(self.started)) # Shorter right after start
+            return sum(n for second, n in self._recent.get(name, ()) if now - window <= second < now) / window if window > 0 else 0.0
+
+
+def sample(name, kind, help_text, value, **labels):
+    """One exported value: kind is 'counter' or 'gauge'; labels become Prometheus labels."""
+    return {'name': METRIC_PREFIX + name, 'type': kind, 'help': help_text, 'labels': labels, 'value': value}
+
+
+def render_prometheus(samples):
+    lines, described = [], set()
+    for s in samples:
+        if s['value'] is None: continue
+        if s['name'] not in described:
+            lines.append(f"# HELP {s['name']} {s['help']}"); lines.append(f"# TYPE {s['name']} {s['type']}"); described.add(s['name'])
+        labels = ",".join(f'{k}="{str(v)}"' for k, v in s['labels'].items())
+        lines.append(f"{s['name']}{{{labels}}} {s['value']}" if labels else f"{s['name']} {s['value']}")
+    return "\n".join(lines) + "\n"
+
+
+def render_json(samples):
+    return json.dumps({'t': time.time(), 'metrics': [s for s in samples if s['value'] is not None]}, default=str)
+
+
+class MetricsServer:
+    """
+    Serves collect()'s samples on the loopback interface only: Prometheus text at /metrics
+    and JSON at /metrics.json. Runs in a daemon thread; collect() is called per request.
+    """
+    def __init__(self, collect, port=9464):
+        self.collect = collect
+        self.port = port
+        self._server = None
+
+    def start(self):
+        collect = self.collect
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path == "/metrics": body, content_type = render_prometheus(collect()), "text/plain; version=0.0.4"
+                elif self.path == "/metrics.json": body, content_type = render_json(collect()), "application/json"
+                else: self.send_error(404); return
+                data = body.encode()
+                self.send_response(200); self.send_header("Content-Type", content_type); self.send_header("Content-Length", str(len(data))); self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, format, *args): pass
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", self.port), Handler)
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, name="metrics-http", daemon=True).start()
+
+    def stop(self):
+        if self._server: self._server.shutdown(); self._server.server_close(); self._server = None
+
+    @property
+    def running(self): return self._server is not None
@@ -0,0 +1,154 @@
+import queue
+import sys
+import threading
+import tkinter as tk
+import numpy as np
+from PIL import Image, ImageDraw, ImageTk
+
+NODE_COLORS = {"color": (96, 160, 96), "png": (84, 140, 200), "location": (150, 150, 150), "logical": (200, 170, 80)}
+OTHER_NODE_COLOR = (120, 120, 120)
+EDGE_COLOR = (95, 105, 120)
+_STOP = object()
+
+
+class Minimap:
+    """
+    An overview of the whole chart: a small raster of every node and edge with the main
+    canvas's viewport drawn over it; clicking or dragging on it calls on_jump(x, y) with the
+    model point to centre the view on. update() only queues a snapshot of the node boxes
+    (model coordinates), their types and the edges; a background thread renders it with
+    NumPy/PIL. While the fit and the structure stay the same, only the pixels around nodes
+    whose boxes changed and their edges are re-rendered. The Tk thread polls every poll_ms
+    for a finished raster, so a frame with nothing new costs one queue check. A render that
+    raises is reported through log(message, color) and the next snapshot is drawn in full.
+    """
+    def __init__(self, root, on_jump, log=None, width=220, height=160, poll_ms=50):
+        self.root = root
+        self.on_jump = on_jump
+        self.log = log
+        self.error = None # The last exception raised by a render
+        self.width, self.height = width, height
+        self.poll_ms = poll_ms
+        self.widget = None
+        self.transform = None # (scale, offset_x, offset_y) from model to minimap pixels of the shown raster
+        self.view_box = None # The main canvas's visible area in model coordinates
+        self.renders = 0; self.partial_renders = 0
+        self._photo = None; self._image_item = None; self._view_item = None; self._after_id = None
+        self._requests = queue.SimpleQueue(); self._results = queue.SimpleQueue()
+        # Render thread state: the raster and the snapshot it shows
+        self._image = None; self._shown = None
+        self._worker = threading.Thread(target=self._render_loop, name="minimap-render", daemon=True); self._worker.start()
+
+    def attach(self, parent, background='#21252B'):
+        self.widget = tk.Canvas(parent, width=self.width, height=self.height, bg=background, highlightthickness=1, highlightbackground='#888888', bd=0, cursor='crosshair')
+        self._image_item = self.widget.create_image(0, 0, anchor=tk.NW)
+        self._view_item = self.widget.create_rectangle(0, 0, 0, 0, outline='#2a9fd6', width=2)
+        self.widget.bind("<ButtonPress-1>", self._on_click); self.widget.bind("<B1-Motion>", self._on_click)
+        return self.widget
+
+    def start(self):
+        if self._after_id is None: self._tick()
+
+    def stop(self):
+        if self._after_id: self.root.after_cancel(self._after_id); self._after_id = None
+        self._requests.put(_STOP)
+
+    def update(self, nodes, kinds, edges, background):
+        """Queues a render of nodes ((x1, y1, x2, y2) per step), kinds (step types) and edges ((source, target) indices)."""
+        self._requests.put((nodes, kinds, edges, background))
+
+    def show_view(self, box):
+        self.view_box = box; self._draw_view()
+
+    # --- Tk Thread ---
+    def _tick(self):
+        result = None
+        try:
+            while True: result = self._results.get_nowait()
+        except queue.Empty: pass
+        if result is not None and self.widget is not None:
+            image, self.transform = result
+            self._photo = ImageTk.PhotoImage(image); self.widget.itemconfig(self._image_item, image=self._photo)
+            self._draw_view()
+        self._after_id = self.root.after(self.poll_ms, self._tick)
+
+    def _draw_view(self):
+        if self.widget is None or self.transform is None or self.view_box is None: return
+        s, ox, oy = self.transform; x1, y1, x2, y2 = self.view_box
+        self.widget.coords(self._view_item, x1*s + ox, y1*s + oy, x2*s + ox, y2*s + oy)
+
+    def _on_click(self, event):
+        if self.transform is None: return
+        s, ox, oy = self.transform
+        self.on_jump((event.x - ox) / s, (event.y - oy) / s)
+
+    # --- Render Thread ---
+    def _render_loop(self):
+        while True:
+            request = self._requests.get()
+            try:
+                while True: request = self._requests.get_nowait() # Only the newest snapshot matters
+            except queue.Empty: pass
+            if request is _STOP: return
+            try: result = self._render(*request)
+            except Exception as e:
+                self.error = e; self._image = None; self._shown = None # Start over with a full render
+                if self.log: self.log(f"Minimap render failed: {e}", "red")
+                else: print(f"Minimap render failed: {e}", file=sys.stderr)
+                continue
+            if result is not None: self._results.put(result)
+
+    def _render(self, nodes, kinds, edges, background):
+        nodes = np.asarray(nodes, dtype=float).reshape(-1, 4); edges = np.asarray(edges, dtype=int).reshape(-1, 2)
+        colors = np.array([NODE_COLORS.get(kind, OTHER_NODE_COLOR) for kind in kinds], dtype=np.uint8).reshape(-1, 3)
+        transform = self._fit(nodes); shown = self._shown
+        if (self._image is None or shown['transform'] != transform or shown['background'] != background or len(shown['nodes']) != len(nodes)
+                or not np.array_equal(shown['edges'], edges) or not np.array_equal(shown['colors'], colors)):
+            self._image = Image.new('RGB', (self.width, self.height), background); region = (0, 0, self.width, self.height)
+        else:
+            changed = np.flatnonzero((shown['nodes'] != nodes).any(axis=1))
+            if not len(changed): return None
+            # Old and new boxes of the moved nodes, plus old and new spans of every edge touching them
+            touched = np.isin(edges, changed).any(axis=1)
+            spans = [shown['nodes'][changed], nodes[changed]]
+            for boxes in (shown['nodes'], nodes):
+                centers = np.column_stack(((boxes[:, 0] + boxes[:, 2]) / 2, (boxes[:, 1] + boxes[:, 3]) / 2))
+                a, b = centers[edges[touched, 0]], centers[edges[touched, 1]]
+                spans.append(np.column_stack((np.minimum(a, b), np.maximum(a, b))))
+            spans = np.vstack(spans); s, ox, oy = transform
+            region = (max(0, int(spans[:, 0].min()*s + ox) - 2), max(0, int(spans[:, 1].min()*s + oy) - 2),
+                      min(self.width, int(spans[:, 2].max()*s + ox) + 3), min(self.height, int(spans[:, 3].max()*s + oy) + 3))
+            self.partial_renders += 1
+        self._draw_region(region, nodes, colors, edges, transform, background)
+        self._shown = {'nodes': nodes, 'edges': edges, 'colors': colors, 'transform': transform, 'background': background}
+        self.renders += 1
+        return self._image.copy(), transform
+
+    def _fit(self, nodes):
+        """(scale, offset_x, offset_y) that fits every node in the raster with a margin, centred."""
+        if not len(nodes): return (1.0, 0.0, 0.0)
+        x1, y1 = nodes[:, 0].min(), nodes[:, 1].min(); x2, y2 = nodes[:, 2].max(), nodes[:, 3].max()
+        margin = 6
+        s = min((self.width - 2*margin) / max(x2 - x1, 1.0), (self.height - 2*margin) / max(y2 - y1, 1.0))
+        return (float(s), float((self.width - (x2 - x1)*s) / 2 - x1*s), float((self.height - (y2 - y1)*s) / 2 - y1*s))
+
+    def _draw_region(self, region, nodes, colors, edges, transform, background):
+        """Redraws the pixels in region (x1, y1, x2, y2) from scratch: background, then edges, then nodes."""
+        rx1, ry1, rx2, ry2 = region
+        if rx2 <= rx1 or ry2 <= ry1: return
+        tile = Image.new('RGB', (rx2 - rx1, ry2 - ry1), background); draw = ImageDraw.Draw(tile)
+        if len(nodes):
+            s, ox, oy = transform
+            # Whole-pixel boxes relative to the tile: rasterizing integer coordinates does not depend on the tile's offset
+            boxes = np.floor(nodes * s + (ox, oy, ox, oy)) - (rx1, ry1, rx1, ry1)
+            boxes[:, 2] = np.maximum(boxes[:, 2], boxes[:, 0] + 1); boxes[:, 3] = np.maximum(boxes[:, 3], boxes[:, 1] + 1)
+            w, h = rx2 - rx1, ry2 - ry1
+            if len(edges):
+                centers = np.column_stack(((boxes[:, 0] + boxes[:, 2]) // 2, (boxes[:, 1] + boxes[:, 3]) // 2))
+                segments = np.hstack((centers[edges[:, 0]], centers[edges[:, 1]]))
+                inside = ((np.minimum(segments[:, 0], segments[:, 2]) <= w) & (np.maximum(segments[:, 0], segments[:, 2]) >= 0)
+                          & (np.minimum(segments[:, 1], segments[:, 3]) <= h) & (np.maximum(segments[:, 1], segments[:, 3]) >= 0))
+                for segment in segments[inside].tolist(): draw.line(segment, fill=EDGE_COLOR)
+            inside = (boxes[:, 0] <= w) & (boxes[:, 2] >= 0) & (boxes[:, 1] <= h) & (boxes[:, 3] >= 0)
+            for box, color in zip(boxes[inside].tolist(), colors[inside].tolist()): draw.rectangle(box, fill=tuple(color))
+        self._image.paste(tile, (rx1, ry1))
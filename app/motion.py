@@ -0,0 +1,96 @@
+import math
+import queue
+import threading
+import time
+
+import numpy as np
+
+SAMPLE_INTERVAL = 0.008 # Seconds between trajectory points (125 Hz)
+SPIN_MARGIN = 0.0015 # The last part of every wait is spun instead of slept, for sub-millisecond timing
+CURVATURE = 0.12 # Largest sideways bow of a path, as a fraction of its length
+JITTER = 0.6 # Hand tremor, standard deviation in pixels at mid-path (none at either end)
+
+
+def ease_out_quad(u): return u * (2 - u)
+
+
+def humanized_path(start, end, duration, rng=None, curvature=CURVATURE, jitter=JITTER):
+    """
+    Returns an (n, 3) array of (seconds from start, x, y) points for a mouse move: a cubic
+    Bezier curve that bows to a random side, eased out like pyautogui's easeOutQuad and
+    roughened with tremor that fades out at both ends, so it starts and ends exactly on
+    start and end. A zero duration or distance gives the single point (0, end).
+    """
+    rng = rng or np.random.default_rng()
+    (x0, y0), (x1, y1) = start, end
+    dx, dy = x1 - x0, y1 - y0; length = math.hypot(dx, dy)
+    if duration <= 0 or length < 1: return np.array([[0.0, x1, y1]])
+
+    n = max(2, math.ceil(duration / SAMPLE_INTERVAL) + 1)
+    t = np.linspace(0.0, duration, n); u = ease_out_quad(t / duration)[:, None]
+    # Control points a third and two thirds along, pushed sideways along the normal.
+    normal = np.array([-dy, dx]) / length
+    bows = rng.uniform(-curvature, curvature, 2) * length
+    p0, p3 = np.array([x0, y0], float), np.array([x1, y1], float)
+    p1 = p0 + (p3 - p0) / 3 + normal * bows[0]; p2 = p0 + (p3 - p0) * 2 / 3 + normal * bows[1]
+    points = (1 - u) ** 3 * p0 + 3 * (1 - u) ** 2 * u * p1 + 3 * (1 - u) * u ** 2 * p2 + u ** 3 * p3
+    if jitter > 0: points += rng.normal(0, jitter, points.shape) * np.sin(np.pi * u)
+    return np.column_stack([t, np.rint(points)])
+
+
+def sleep_until(deadline):
+    """Sleeps until perf_counter() reaches deadline, spinning through the last SPIN_MARGIN."""
+    while True:
+        remaining = deadline - time.perf_counter()
+        if remaining <= 0: return
+        if remaining > SPIN_MARGIN: time.sleep(remaining - SPIN_MARGIN)
+
+
+class MotionEngine:
+    """
+    Plays mouse trajectories on its own thread, one at a time and in order, so a move never
+    blocks the executor loop or Tk. Every point is placed at its timestamp with a precise
+    sleep, and cancel() interrupts a move between any two points. The result is reported
+    back with scheduler.after(), i.e. on the executor's thread. Schedulers that are not
+    realtime (VirtualScheduler) get no playback: when the move would have finished on their
+    clock the cursor is put on its end point and the result is reported.
+    """
+    def __init__(self):
+        self.generation = 0 # Bumped by cancel(); a job stops once it no longer matches
+        self.thread = None
+        self._jobs = queue.SimpleQueue()
+
+    def play(self, backend, scheduler, path, then=None, on_done=None):
+        """
+        Moves along path (see humanized_path; None for no move), then calls then() (a click)
+        unless cancelled, and finally delivers on_done(completed, error) through scheduler.
+        """
+        job = (self.generation, backend, scheduler, path, then, on_done)
+        if not scheduler.realtime:
+            scheduler.after(int(path[-1, 0] * 1000) if path is not None else 0, self._run, *job, False); return
+        if self.thread is None:
+            self.thread = threading.Thread(target=self._loop, name="motion", daemon=True); self.thread.start()
+        self._jobs.put(job)
+
+    def cancel(self):
+        """Stops the move being played (and any queued) before its next point; thread-safe."""
+        self.generation += 1
+
+    def _loop(self):
+        while True: self._run(*self._jobs.get())
+
+    def _run(self, generation, backend, scheduler, path, then, on_done, realtime=True):
+        completed, error = False, None
+        try:
+            if path is not None:
+                started = time.perf_counter()
+                for t, x, y in (path if realtime else path[-1:]):
+                    if generation != self.generation: break
+                    if realtime: sleep_until(started + t)
+                    backend.set_position(int(x), int(y))
+            if generation == self.generation:
+                if then: then()
+                completed = True
+        except Exception as e:
+            error = e
+        if on_done: scheduler.after(0, on_done, completed, error)
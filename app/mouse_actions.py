@@ -1,73 +1,80 @@
-import pyautogui
 import random
 import math
+import time
+import functools
+
+from app.motion import humanized_path
+from app.trace import ACTION, ACTIONS
 
 class MouseActionsMixin:
-    def execute_move(self, pos):
-        offset = self.loc_offset_variance.get()
+    """
+    Turns click/move actions into humanized trajectories played by self.motion (a
+    MotionEngine), so moves and clicks never block the executor's thread. Their settings are
+    read from the run's self.settings (see ExecutorMixin.RUN_SETTINGS).
+    """
+    def plan_move(self, pos):
+        """The trajectory from the cursor to a point near pos, timed by the Mouse Movement settings."""
+        offset = self.settings['loc_offset_variance']
         rand_x, rand_y = pos[0] + random.randint(-offset, offset), pos[1] + random.randint(-offset, offset)
         
         speed = 0
-        move_mode = self.mouse_move_mode.get()
-        start_x, start_y = pyautogui.position()
+        move_mode = self.settings['mouse_move_mode']
+        start_x, start_y = self.input_backend.position()
         distance = math.hypot(rand_x - start_x, rand_y - start_y)
 
         if move_mode == 'Dynamic':
-            screen_w, screen_h = pyautogui.size()
+            screen_w, screen_h = self.input_backend.size()
             max_dist = math.hypot(screen_w, screen_h)
             
-            min_time = self.min_move_time.get()
-            max_time = self.max_move_time.get()
+            min_time = self.settings['min_move_time']
+            max_time = self.settings['max_move_time']
             
             # Linearly interpolate the base speed based on distance
             if max_dist > 0:
                 base_speed = min_time + (max_time - min_time) * (distance / max_dist)
             else:
                 base_speed = min_time
-            speed = max(0, base_speed + random.uniform(-self.speed_variance.get(), self.speed_variance.get()))
+            speed = max(0, base_speed + random.uniform(-self.settings['speed_variance'], self.settings['speed_variance']))
 
         elif move_mode == 'Pixels Per Second':
-            pps = self.pixels_per_second.get()
+            pps = self.settings['pixels_per_second']
             if pps > 0:
                 base_speed = distance / pps
             else:
                 base_speed = 0.1 # A small default to prevent instant moves
-            speed = max(0, base_speed + random.uniform(-self.speed_variance.get(), self.speed_variance.get()))
+            speed = max(0, base_speed + random.uniform(-self.settings['speed_variance'], self.settings['speed_variance']))
 
         else: # Default to 'Regular' mode
-            speed = max(0, self.mouse_speed.get() + random.uniform(-self.speed_variance.get(), self.speed_variance.get()))
+            speed = max(0, self.settings['mouse_speed'] + random.uniform(-self.settings['speed_variance'], self.settings['speed_variance']))
             
-        pyautogui.moveTo(rand_x, rand_y, duration=speed, tween=pyautogui.easeOutQuad)
+        return humanized_path((start_x, start_y), (rand_x, rand_y), speed)
 
-    def execute_varied_click(self,pos):
-        self.execute_move(pos)
-        # Add a check to ensure the click doesn't happen if the move was interrupted
-        if not self.running:
-            return
-        hold = max(0.01, self.hold_duration.get() + random.uniform(-self.hold_duration_variance.get(), self.hold_duration_variance.get()))
-        pyautogui.click(duration=hold)
+    def _hold_time(self):
+        return max(0.01, self.settings['hold_duration'] + random.uniform(-self.settings['hold_duration_variance'], self.settings['hold_duration_variance']))
 
-    def execute_action_on_pos(self, action, pos):
+    def execute_action_on_pos(self, action, pos, on_done):
+        """
+        Starts action at pos on the motion thread and returns at once; on_done(completed, error)
+        runs on the scheduler's thread when the action finished, was cancelled by stop() or failed.
+        """
+        started = time.perf_counter()
+        self.trace.record(ACTION, self.current_step_index, ACTIONS.index(action) if action in ACTIONS else -1, x=int(pos[0]) if pos else 0, y=int(pos[1]) if pos else 0)
         if action == 'Click Object' or action == 'Left Click':
-            self.execute_varied_click(pos)
-            # Check running state before logging to avoid extraneous logs after stopping
-            if self.running:
-                self.log_execution(f"Step {self.current_step_index + 1}: Left Clicked near {pos} (Speed: ~{self.mouse_speed.get()}s, Hold: ~{self.hold_duration.get()}s).")
+            path, then = self.plan_move(pos), functools.partial(self.input_backend.click, duration=self._hold_time())
+            message = f"Left Clicked near {pos} (Speed: ~{self.settings['mouse_speed']}s, Hold: ~{self.settings['hold_duration']}s)."
         elif action == 'Click Only':
-            if not self.running: return
-            hold = max(0.01, self.hold_duration.get() + random.uniform(-self.hold_duration_variance.get(), self.hold_duration_variance.get()))
-            pyautogui.click(duration=hold)
-            if self.running:
-                self.log_execution(f"Step {self.current_step_index + 1}: Clicked at current mouse position.")
+            path, then, message = None, functools.partial(self.input_backend.click, duration=self._hold_time()), "Clicked at current mouse position."
         elif action == 'Right Click':
-            self.execute_move(pos)
-            if not self.running: return # Stop before the click
-            pyautogui.rightClick()
-            if self.running:
-                self.log_execution(f"Step {self.current_step_index + 1}: Right Clicked near {pos}.")
+            path, then, message = self.plan_move(pos), self.input_backend.right_click, f"Right Clicked near {pos}."
         elif action == 'Move Only':
-            self.execute_move(pos)
-            if self.running:
-                self.log_execution(f"Step {self.current_step_index + 1}: Moved mouse near {pos} (Speed: ~{self.mouse_speed.get()}s).")
-   
+            path, then, message = self.plan_move(pos), None, f"Moved mouse near {pos} (Speed: ~{self.settings['mouse_speed']}s)."
+        else:
+            on_done(True, None); return
+        self.motion.play(self.input_backend, self.scheduler, path, then, functools.partial(self._on_action_played, started, message, on_done))
 
+    def _on_action_played(self, started, message, on_done, completed, error):
+        # Check running state before logging to avoid extraneous logs after stopping
+        if completed and self.running:
+            self.profiler.record(self.current_step_index, 'input', time.perf_counter() - started)
+            self.log_execution(f"Step {self.current_step_index + 1}: {message}")
+        on_done(completed, error)
@@ -1,7 +1,13 @@
 import tkinter as tk
-from tkinter import ttk, scrolledtext
+from tkinter import ttk, scrolledtext, messagebox, filedialog
 import os
+import time
 from app import PYTESSERACT_AVAILABLE
+from app.backends import INPUT_BACKENDS, RecordingBackend, create_backend
+from app.logfile import LEVEL_RANK, LEVELS, MB, LogFileSink
+from app.metrics import MetricsServer
+from app.scheduler import VirtualScheduler
+from app.simulation import SCAN_COST, SPEEDS, OutcomeScript
 
 class PanelsMixin:
     def build_ui(self):
@@ -19,7 +25,8 @@ class PanelsMixin:
         clear_btn.pack(side=tk.LEFT, padx=(0, 2))
         search_entry.bind('<Return>', self.search_flowchart)
         
-        h_scroll = ttk.Scrollbar(canvas_container, orient=tk.HORIZONTAL); v_scroll = ttk.Scrollbar(canvas_container, orient=tk.VERTICAL); self.canvas = tk.Canvas(canvas_container, bg="#3c3c3c", highlightthickness=0, xscrollcommand=h_scroll.set, yscrollcommand=v_scroll.set); h_scroll.config(command=self.canvas.xview); v_scroll.config(command=self.canvas.yview); h_scroll.pack(side=tk.BOTTOM, fill=tk.X); v_scroll.pack(side=tk.RIGHT, fill=tk.Y); self.canvas.pack(fill=tk.BOTH, expand=True); main_pane.add(canvas_container, weight=3); self.canvas.bind("<ButtonPress-1>", self.on_canvas_press); self.canvas.bind("<B1-Motion>", self.on_drag_motion); self.canvas.bind("<ButtonRelease-1>", self.on_drag_release); self._bind_mouse_scroll()
+        h_scroll = ttk.Scrollbar(canvas_container, orient=tk.HORIZONTAL); v_scroll = ttk.Scrollbar(canvas_container, orient=tk.VERTICAL); self.canvas = tk.Canvas(canvas_container, bg="#3c3c3c", highlightthickness=0, xscrollcommand=lambda *view: self._on_canvas_scrolled(h_scroll, *view), yscrollcommand=lambda *view: self._on_canvas_scrolled(v_scroll, *view)); h_scroll.config(command=self.canvas.xview); v_scroll.config(command=self.canvas.yview); h_scroll.pack(side=tk.BOTTOM, fill=tk.X); v_scroll.pack(side=tk.RIGHT, fill=tk.Y); self.canvas.pack(fill=tk.BOTH, expand=True); main_pane.add(canvas_container, weight=3); self.canvas.bind("<ButtonPress-1>", self.on_canvas_press); self.canvas.bind("<B1-Motion>", self.on_drag_motion); self.canvas.bind("<ButtonRelease-1>", self.on_drag_release); self._bind_mouse_scroll()
+        self.minimap.attach(canvas_container); self._toggle_minimap()
         right_panel = ttk.Frame(main_pane); right_panel.pack(fill=tk.Y); main_pane.add(right_panel, weight=1)
         
         status_display_frame = ttk.Frame(right_panel, padding=5); status_display_frame.pack(fill=tk.X, pady=(5, 5))
@@ -30,6 +37,7 @@ class PanelsMixin:
         self.delay_countdown_label = ttk.Label(status_display_frame, text="", anchor='w', font=('Helvetica', 9, 'italic')); self.delay_countdown_label.pack(fill=tk.X)
 
         detection_info_frame = ttk.LabelFrame(right_panel, text="Live Detection Info", padding=5); detection_info_frame.pack(fill=tk.X, padx=5, pady=(0, 10)); ttk.Label(detection_info_frame, textvariable=self.last_detection_info, anchor='w', font=('Consolas', 10)).pack(fill=tk.X)
+        ttk.Label(detection_info_frame, textvariable=self.scan_interval_info, anchor='w', font=('Consolas', 9)).pack(fill=tk.X)
 
         # --- EDIT START: Implement vertical PanedWindow for resizable tabs/buttons ---
         # 1. Create a new vertical PanedWindow inside the main right_panel
@@ -38,9 +46,9 @@ class PanelsMixin:
 
         # 2. Change the parent of the notebook to the new sub-pane. Do NOT .pack() it.
         notebook = ttk.Notebook(right_sub_pane)
-        self.props_tab = ttk.Frame(notebook, padding=10); globals_tab = ttk.Frame(notebook, padding=10); testing_tab = ttk.Frame(notebook, padding=10); log_tab = ttk.Frame(notebook, padding=10); ge_interface_tab = ttk.Frame(notebook, padding=10); info_tab = ttk.Frame(notebook, padding=10)
-        notebook.add(self.props_tab, text='Properties'); notebook.add(ge_interface_tab, text='GE Interface'); notebook.add(globals_tab, text='Global Settings'); notebook.add(testing_tab, text='Testing Logic'); notebook.add(log_tab, text='Execution Log'); notebook.add(info_tab, text='Info')
-        self.build_properties_panel(); self.build_ge_interface_panel(ge_interface_tab); self.build_globals_panel(globals_tab); self.build_testing_panel(testing_tab); self.build_log_panel(log_tab); self.build_info_panel(info_tab)
+        self.props_tab = ttk.Frame(notebook, padding=10); globals_tab = ttk.Frame(notebook, padding=10); testing_tab = ttk.Frame(notebook, padding=10); log_tab = ttk.Frame(notebook, padding=10); profiler_tab = ttk.Frame(notebook, padding=10); ge_interface_tab = ttk.Frame(notebook, padding=10); info_tab = ttk.Frame(notebook, padding=10)
+        notebook.add(self.props_tab, text='Properties'); notebook.add(ge_interface_tab, text='GE Interface'); notebook.add(globals_tab, text='Global Settings'); notebook.add(testing_tab, text='Testing Logic'); notebook.add(log_tab, text='Execution Log'); notebook.add(profiler_tab, text='Profiler'); notebook.add(info_tab, text='Info')
+        self.build_properties_panel(); self.build_ge_interface_panel(ge_interface_tab); self.build_globals_panel(globals_tab); self.build_testing_panel(testing_tab); self.build_log_panel(log_tab); self.build_profiler_panel(profiler_tab); self.build_info_panel(info_tab)
         
         # 3. Change the parent of the control_bar to the new sub-pane. Do NOT .pack() it.
         control_bar = ttk.Frame(right_sub_pane, padding=5)
@@ -63,6 +71,7 @@ class PanelsMixin:
         tk.Button(add_step_grid, text="+ Add Note", **btn_style, command=self.add_annotation).grid(row=2, column=0, columnspan=2, **grid_btn_style)
         
         start_frm = ttk.Frame(control_bar); start_frm.pack(fill=tk.X, pady=2); self.start_btn = ttk.Button(start_frm, text="Start (F2)", command=self.start); self.start_btn.pack(side=tk.LEFT, expand=True, fill=tk.BOTH, padx=(0, 5), ipady=5); self.stop_btn = ttk.Button(start_frm, text="Stop (F2)", command=self.stop, state=tk.DISABLED); self.stop_btn.pack(side=tk.LEFT, expand=True, fill=tk.BOTH, ipady=5)
+        self.simulate_btn = ttk.Button(start_frm, text="Simulate", command=self.start_simulation); self.simulate_btn.pack(side=tk.LEFT, fill=tk.BOTH, padx=(5, 0), ipady=5)
         start_at_frm = ttk.Frame(start_frm); start_at_frm.pack(side=tk.LEFT, fill=tk.NONE, padx=(10, 0)); ttk.Label(start_at_frm, text="Start Step:").pack(anchor='s'); ttk.Entry(start_at_frm, textvariable=self.start_step, width=5).pack(anchor='n', pady=(2,0))
         file_ops_frm = ttk.Frame(control_bar); file_ops_frm.pack(fill=tk.X, pady=(5, 0)); btn_pack_style = {'side': tk.LEFT, 'expand': True, 'fill': tk.X, 'padx': 2}; tk.Button(file_ops_frm, text="Import JSON", **btn_style, command=self.import_from_json).pack(**btn_pack_style); tk.Button(file_ops_frm, text="Export JSON", **btn_style, command=self.export_to_json).pack(**btn_pack_style); tk.Button(file_ops_frm, text="Reset All", **btn_style, command=self.reset_all).pack(**btn_pack_style)
    
@@ -113,6 +122,10 @@ class PanelsMixin:
 
         self._update_mouse_mode_visibility()
 
+        ttk.Label(mouse_lf, text="Input Backend:").grid(row=4, column=0, sticky='w', padx=5, pady=5)
+        ttk.Combobox(mouse_lf, textvariable=self.input_backend_name, values=[name for name in INPUT_BACKENDS if name != 'recording'], state='readonly', width=12).grid(row=4, column=1, sticky='w', padx=5, pady=5)
+        self.input_backend_name.trace_add("write", self.switch_input_backend)
+
         # --- Click Variation Section ---
         variation_lf = ttk.LabelFrame(parent, text="Click Variation")
         variation_lf.grid(row=1, column=0, sticky='ew', pady=(0, 10), padx=2)
@@ -132,17 +145,30 @@ class PanelsMixin:
         ttk.Entry(timing_lf, textvariable=self.global_settings_ui_vars['scan_interval'], width=10).grid(row=0, column=1, sticky="ew", pady=2, padx=5)
         ttk.Label(timing_lf, text="Base Hold Duration (s):").grid(row=1, column=0, sticky="w", pady=2, padx=5)
         ttk.Entry(timing_lf, textvariable=self.global_settings_ui_vars['hold_duration'], width=10).grid(row=1, column=1, sticky="ew", pady=2, padx=5)
+        ttk.Checkbutton(timing_lf, text="Adaptive Scan Interval (per step)", variable=self.adaptive_scan).grid(row=2, column=0, columnspan=2, sticky='w', pady=2, padx=5)
+        ttk.Label(timing_lf, text="Min Scan Interval (s):").grid(row=3, column=0, sticky="w", pady=2, padx=5)
+        ttk.Entry(timing_lf, textvariable=self.global_settings_ui_vars['min_scan_interval'], width=10).grid(row=3, column=1, sticky="ew", pady=2, padx=5)
+        ttk.Label(timing_lf, text="Max Scan Interval (s):").grid(row=4, column=0, sticky="w", pady=2, padx=5)
+        ttk.Entry(timing_lf, textvariable=self.global_settings_ui_vars['max_scan_interval'], width=10).grid(row=4, column=1, sticky="ew", pady=2, padx=5)
+        ttk.Label(timing_lf, text="Type Interval (s):").grid(row=5, column=0, sticky="w", pady=2, padx=5)
+        ttk.Entry(timing_lf, textvariable=self.global_settings_ui_vars['type_interval'], width=10).grid(row=5, column=1, sticky="ew", pady=2, padx=5)
+        ttk.Checkbutton(timing_lf, text="Pre-detect Next Step During Delays", variable=self.pipeline_detection).grid(row=6, column=0, columnspan=2, sticky='w', pady=2, padx=5)
+        ttk.Label(timing_lf, text="Log Verbosity:").grid(row=7, column=0, sticky="w", pady=2, padx=5)
+        ttk.Combobox(timing_lf, textvariable=self.log_verbosity, values=list(LEVELS), state='readonly', width=10).grid(row=7, column=1, sticky="w", pady=2, padx=5)
+        ttk.Label(timing_lf, text="Status Refresh (ms):").grid(row=8, column=0, sticky="w", pady=2, padx=5)
+        ttk.Entry(timing_lf, textvariable=self.global_settings_ui_vars['ui_refresh_ms'], width=10).grid(row=8, column=1, sticky="ew", pady=2, padx=5)
 
         # --- Flowchart Grid Section ---
         flowchart_lf = ttk.LabelFrame(parent, text="Flowchart Grid")
         flowchart_lf.grid(row=3, column=0, sticky='ew', pady=(0, 10), padx=2)
         flowchart_lf.columnconfigure(1, weight=1)
-        ttk.Checkbutton(flowchart_lf, text="Show Grid", variable=self.grid_visible, command=self.redraw_flowchart).grid(row=0, column=0, columnspan=2, sticky='w', pady=2, padx=5)
+        ttk.Checkbutton(flowchart_lf, text="Show Grid", variable=self.grid_visible, command=self._draw_grid).grid(row=0, column=0, columnspan=2, sticky='w', pady=2, padx=5)
         ttk.Checkbutton(flowchart_lf, text="Enable Grid Latching", variable=self.grid_latching).grid(row=1, column=0, columnspan=2, sticky='w', pady=2, padx=5)
         ttk.Label(flowchart_lf, text="Grid Spacing (px):").grid(row=2, column=0, sticky="w", pady=2, padx=5)
         ttk.Entry(flowchart_lf, textvariable=self.global_settings_ui_vars['grid_spacing'], width=10).grid(row=2, column=1, sticky="ew", pady=2, padx=5)
         ttk.Label(flowchart_lf, text="Grid Opacity:").grid(row=3, column=0, sticky="w", pady=2, padx=5)
-        ttk.Scale(flowchart_lf, from_=0.0, to=1.0, orient=tk.HORIZONTAL, variable=self.grid_opacity, command=lambda e: self.redraw_flowchart()).grid(row=3, column=1, sticky="ew", pady=2, padx=5)
+        ttk.Scale(flowchart_lf, from_=0.0, to=1.0, orient=tk.HORIZONTAL, variable=self.grid_opacity, command=lambda e: self._draw_grid()).grid(row=3, column=1, sticky="ew", pady=2, padx=5)
+        ttk.Checkbutton(flowchart_lf, text="Show Minimap", variable=self.minimap_visible).grid(row=4, column=0, columnspan=2, sticky='w', pady=2, padx=5)
         
         # --- Global Area Section ---
         garea_lf = ttk.LabelFrame(parent, text="Global Area (F4)")
@@ -168,8 +194,84 @@ class PanelsMixin:
         ttk.Checkbutton(convenience_lf, text="Enable all 'Show Area' overlays", variable=self.enable_all_show_area, command=self.update_all_area_overlays).grid(row=1, column=0, sticky='w', pady=1, padx=5)
         ttk.Checkbutton(convenience_lf, text="Update 'Start Step' when stopped", variable=self.start_at_stopped_pos).grid(row=2, column=0, sticky='w', pady=1, padx=5)
         
+        # --- Metrics Section ---
+        metrics_lf = ttk.LabelFrame(parent, text="Metrics Endpoint (loopback)")
+        metrics_lf.grid(row=6, column=0, sticky='ew', pady=(0, 10), padx=2)
+        ttk.Checkbutton(metrics_lf, text="Serve /metrics on 127.0.0.1", variable=self.metrics_enabled, command=self.toggle_metrics_server).grid(row=0, column=0, columnspan=2, sticky='w', pady=1, padx=5)
+        ttk.Label(metrics_lf, text="Port:").grid(row=1, column=0, sticky="w", pady=2, padx=5)
+        ttk.Entry(metrics_lf, textvariable=self.metrics_port, width=10).grid(row=1, column=1, sticky="ew", pady=2, padx=5)
+
+        # --- Simulation Section ---
+        simulation_lf = ttk.LabelFrame(parent, text="Simulation (virtual clock)")
+        simulation_lf.grid(row=7, column=0, sticky='ew', pady=(0, 10), padx=2)
+        simulation_lf.columnconfigure(1, weight=1)
+        ttk.Label(simulation_lf, text="Speed:").grid(row=0, column=0, sticky="w", pady=2, padx=5)
+        ttk.Combobox(simulation_lf, textvariable=self.simulation_speed, values=list(SPEEDS), state='readonly', width=8).grid(row=0, column=1, sticky="w", pady=2, padx=5)
+        ttk.Label(simulation_lf, text="Outcomes:").grid(row=1, column=0, sticky="w", pady=2, padx=5)
+        ttk.Entry(simulation_lf, textvariable=self.simulation_script_path, width=18).grid(row=1, column=1, sticky="ew", pady=2, padx=5)
+        tk.Button(simulation_lf, text="...", command=self.browse_simulation_script, relief=tk.FLAT).grid(row=1, column=2, padx=(0, 5))
+
         # --- Apply Button ---
-        tk.Button(parent, text="Apply Global Settings", font=('Helvetica', 10, 'bold'), command=self.apply_global_settings, relief=tk.FLAT).grid(row=6, column=0, sticky='ew', pady=(5,5), ipady=4)
+        tk.Button(parent, text="Apply Global Settings", font=('Helvetica', 10, 'bold'), command=self.apply_global_settings, relief=tk.FLAT).grid(row=8, column=0, sticky='ew', pady=(5,5), ipady=4)
+
+    def toggle_metrics_server(self):
+        if self.metrics_server: self.metrics_server.stop(); self.metrics_server = None
+        if not self.metrics_enabled.get(): self.log("Metrics endpoint stopped."); return
+        try:
+            self.metrics_server = MetricsServer(self.collect_metrics, int(self.metrics_port.get())); self.metrics_server.start()
+            self.log(f"Metrics endpoint serving http://127.0.0.1:{self.metrics_server.port}/metrics", "green")
+        except (tk.TclError, ValueError, OSError) as e:
+            self.metrics_server = None; self.metrics_enabled.set(False)
+            self.log(f"Could not start metrics endpoint: {e}", "red")
+
+    def switch_input_backend(self, *args):
+        """Replaces the input backend with the one chosen under Mouse Movement, keeping the old one if it cannot start."""
+        name = self.input_backend_name.get()
+        if self.simulating or name == self.input_backend.name: return # A simulation switches when it ends
+        try: backend = create_backend(name)
+        except Exception as e:
+            self.log(f"Could not start the '{name}' input backend: {e}. Keeping '{self.input_backend.name}'.", "red")
+            self.input_backend_name.set(self.input_backend.name); return
+        self.input_backend = backend
+        self.log(f"Input backend: {name}.", "green")
+
+    # --- Simulation ---
+    def browse_simulation_script(self):
+        filepath = filedialog.askopenfilename(title="Select Outcome Script or Trace", filetypes=[("Outcome scripts and traces", "*.json *.jsonl *.bin"), ("All Files", "*.*")])
+        if filepath: self.simulation_script_path.set(filepath)
+
+    def start_simulation(self):
+        """
+        Runs the flowchart on a VirtualScheduler with a RecordingBackend and an OutcomeScript in
+        place of the real clock, input and screen, so waits, delays, timeouts and the countdowns
+        advance on virtual time at the chosen speed. _end_simulation() puts the real ones back.
+        """
+        if self.running or self.f3_mode or self.simulating: return
+        path = self.simulation_script_path.get().strip()
+        try: script = OutcomeScript.load(path) if path else OutcomeScript()
+        except (OSError, ValueError) as e: messagebox.showerror("Simulation Error", f"Failed to load outcome script: {e}"); return
+        try: screen_size = tuple(self.input_backend.size())
+        except Exception: screen_size = (1920, 1080)
+
+        self._live_execution = (self.scheduler, self.input_backend)
+        self.scheduler = VirtualScheduler(work_cost=SCAN_COST, speed=SPEEDS.get(self.simulation_speed.get()))
+        self.input_backend = RecordingBackend(self.scheduler.time, screen_size)
+        self.outcome_script = script; self.simulating = True
+        self._simulation_started = (time.perf_counter(), self.scheduler.time())
+        self.start()
+        if not self.running: self._end_simulation(); return
+        self.log(f"Simulation started at {self.simulation_speed.get()} with {os.path.basename(path) if path else 'default outcomes'}.", "blue")
+        self.scheduler.start_thread()
+
+    def _end_simulation(self):
+        if not self.simulating: return
+        virtual_scheduler, backend = self.scheduler, self.input_backend
+        virtual_scheduler.quit()
+        self.scheduler, self.input_backend = self._live_execution
+        self.outcome_script = None; self.simulating = False; self.switch_input_backend()
+        real_started, virtual_started = self._simulation_started
+        actions = ", ".join(f"{n} {kind}" for kind, n in sorted(backend.counts.items())) or "no actions"
+        self.log(f"Simulation finished: {virtual_scheduler.time() - virtual_started:.1f}s of virtual time in {time.perf_counter() - real_started:.2f}s ({actions}).", "blue")
 
     def build_log_panel(self, parent):
         log_controls_frame = ttk.Frame(parent); log_controls_frame.pack(fill=tk.X, pady=(0, 5))
@@ -180,9 +282,66 @@ class PanelsMixin:
         tk.Button(log_controls_frame, text="Clear", command=self.clear_log, font=('Helvetica', 9), relief=tk.FLAT).pack(side=tk.LEFT, padx=(10, 0))
         ttk.Label(log_controls_frame, text="Auto-clear (lines):").pack(side=tk.LEFT, padx=(10, 5))
         ttk.Entry(log_controls_frame, textvariable=self.log_auto_clear_lines, width=6).pack(side=tk.LEFT)
+
+        trace_frame = ttk.Frame(parent); trace_frame.pack(fill=tk.X, pady=(0, 5))
+        ttk.Checkbutton(trace_frame, text="Record trace to traces/ on start", variable=self.trace_to_file).pack(side=tk.LEFT)
+        ttk.Combobox(trace_frame, textvariable=self.trace_format, values=['JSONL', 'Binary'], state='readonly', width=8).pack(side=tk.LEFT, padx=(10, 0))
+
+        log_file_frame = ttk.Frame(parent); log_file_frame.pack(fill=tk.X, pady=(0, 5))
+        ttk.Checkbutton(log_file_frame, text="Write log to logs/", variable=self.log_to_file).pack(side=tk.LEFT)
+        ttk.Combobox(log_file_frame, textvariable=self.log_file_level, values=list(LEVELS), state='readonly', width=8).pack(side=tk.LEFT, padx=(10, 0))
+        ttk.Label(log_file_frame, text="Rotate at (MB):").pack(side=tk.LEFT, padx=(10, 5))
+        ttk.Entry(log_file_frame, textvariable=self.log_file_rotate_mb, width=5).pack(side=tk.LEFT)
+        ttk.Label(log_file_frame, text="or every (h):").pack(side=tk.LEFT, padx=(5, 5))
+        ttk.Entry(log_file_frame, textvariable=self.log_file_rotate_hours, width=5).pack(side=tk.LEFT)
+        ttk.Checkbutton(log_file_frame, text="gzip", variable=self.log_file_gzip).pack(side=tk.LEFT, padx=(10, 0))
         
         self.log_text = scrolledtext.ScrolledText(parent,state='disabled',wrap=tk.WORD,borderwidth=0,highlightthickness=1); self.log_text.pack(fill=tk.BOTH,expand=True)
         if self.current_theme: self.log_text.config(highlightbackground=self.current_theme['node_border'], highlightcolor=self.current_theme['node_border'])
+        self.log_view.attach(self.log_text)
+
+    def build_profiler_panel(self, parent):
+        controls = ttk.Frame(parent); controls.pack(fill=tk.X, pady=(0, 5))
+        for text, command in (("Refresh", self.refresh_profiler_panel), ("Reset", self.reset_profiler), ("Export CSV", lambda: self.export_profile('csv')), ("Export JSON", lambda: self.export_profile('json'))):
+            tk.Button(controls, text=text, command=command, font=('Helvetica', 9), relief=tk.FLAT).pack(side=tk.LEFT, padx=(0, 5))
+        self.profiler_summary = ttk.Label(controls, text="", anchor='e'); self.profiler_summary.pack(side=tk.RIGHT)
+
+        tree_frame = ttk.Frame(parent); tree_frame.pack(fill=tk.BOTH, expand=True)
+        cols = ('step', 'phase', 'count', 'p50', 'p95', 'p99', 'max', 'total', 'polls_per_success')
+        headings = {'step': 'Step', 'phase': 'Phase', 'count': 'Count', 'p50': 'p50 ms', 'p95': 'p95 ms', 'p99': 'p99 ms', 'max': 'Max ms', 'total': 'Total ms', 'polls_per_success': 'Polls/Success'}
+        self.profiler_tree = ttk.Treeview(tree_frame, columns=cols, show='headings')
+        for col in cols: self.profiler_tree.heading(col, text=headings[col]); self.profiler_tree.column(col, width=60 if col != 'step' else 110, anchor='w' if col in ('step', 'phase') else 'e')
+        scroll = ttk.Scrollbar(tree_frame, orient=tk.VERTICAL, command=self.profiler_tree.yview); self.profiler_tree.configure(yscrollcommand=scroll.set)
+        scroll.pack(side=tk.RIGHT, fill=tk.Y); self.profiler_tree.pack(fill=tk.BOTH, expand=True)
+        self._auto_refresh_profiler()
+
+    def _profiler_step_names(self): return {i: s.get('name', '') for i, s in enumerate(self.steps)}
+
+    def refresh_profiler_panel(self):
+        rows = self.profiler.rows(self._profiler_step_names())
+        self.profiler_tree.delete(*self.profiler_tree.get_children())
+        for r in rows:
+            step_label = f"{r['step']}: {r['name']}" if r['name'] else str(r['step'])
+            self.profiler_tree.insert('', tk.END, values=(step_label, r['phase'], r['count'], r['p50_ms'], r['p95_ms'], r['p99_ms'], r['max_ms'], r['total_ms'], r['polls_per_success'] if r['polls_per_success'] is not None else '-'))
+        emitted, suppressed = (sum(counts[i] for counts in self.log_counts.values()) for i in (0, 1))
+        self.profiler_summary.config(text=f"{len(rows)} rows since {time.strftime('%H:%M:%S', time.localtime(self.profiler.started))}; log: {emitted} shown, {suppressed} filtered")
+
+    def _auto_refresh_profiler(self):
+        # Only rebuild the table while it is on screen; the histograms keep recording regardless.
+        if self.profiler_tree.winfo_viewable(): self.refresh_profiler_panel()
+        self.root.after(1000, self._auto_refresh_profiler)
+
+    def reset_profiler(self):
+        self.profiler.reset(); self.refresh_profiler_panel(); self.log("Profiler data reset.")
+
+    def export_profile(self, fmt):
+        filepath = filedialog.asksaveasfilename(defaultextension=f".{fmt}", filetypes=[(f"{fmt.upper()} Files", f"*.{fmt}")], title="Export Profile")
+        if not filepath: return
+        try:
+            if fmt == 'csv': self.profiler.export_csv(filepath, self._profiler_step_names())
+            else: self.profiler.export_json(filepath, self._profiler_step_names())
+            self.log(f"Profile exported to {os.path.basename(filepath)}.", "green")
+        except OSError as e: messagebox.showerror("Export Error", f"Failed to export profile: {e}"); self.log(f"Failed to export profile: {e}", "red")
 
     def build_info_panel(self, parent):
         info_frame = ttk.Frame(parent, padding=10)
@@ -392,51 +551,18 @@ class PanelsMixin:
         
         self.log(f"Search: Found item {self.current_search_index + 1}/{len(self.search_results)} at {found_item['type']} index {found_item['index']}.")
 
-        # Highlight, update properties, and redraw
-        self.selected_items = [found_item]
+        # Highlight, update properties, and restyle the old and new selection
+        previous_selection = self.selected_items; self.selected_items = [found_item]
         self.populate_properties_panel()
-        self.redraw_flowchart()
+        self._refresh_selection(previous_selection)
         
         # Scroll the canvas to the found item
         self.root.after(50, lambda: self._scroll_to_item(found_item))
 
     def _scroll_to_item(self, item):
-        """Calculates position and scrolls the canvas to bring the item into view."""
-        item_data = None
-        if item['type'] == 'step':
-            item_data = self.steps[item['index']]
-        elif item['type'] == 'note':
-            item_data = self.annotations[item['index']]
-
-        if not item_data:
-            return
-        
-        # Ensure canvas dimensions are up-to-date
-        self.canvas.update_idletasks()
-
-        item_x, item_y = item_data.get('x', 0) * self.zoom_factor, item_data.get('y', 0) * self.zoom_factor
-        canvas_width = self.canvas.winfo_width()
-        canvas_height = self.canvas.winfo_height()
-        
-        scroll_region = self.canvas.cget("scrollregion")
-        if not scroll_region:
-             return
-        
-        sr_parts = list(map(float, scroll_region.split()))
-        sr_x, sr_y, sr_w, sr_h = sr_parts[0], sr_parts[1], sr_parts[2], sr_parts[3]
-        total_w, total_h = sr_w - sr_x, sr_h - sr_y
-
-        if total_w > 0 and total_h > 0:
-            # Calculate desired top-left corner of the viewport
-            target_x = item_x - (canvas_width / 2)
-            target_y = item_y - (canvas_height / 2)
-            
-            # Convert to relative position (0.0 to 1.0) for moveto
-            rel_x = max(0.0, target_x / total_w)
-            rel_y = max(0.0, target_y / total_h)
-            
-            self.canvas.xview_moveto(rel_x)
-            self.canvas.yview_moveto(rel_y)
+        """Scrolls the canvas to centre the item's box (from the spatial index) in the view."""
+        box = self._scene.boxes.get((item['type'], item['index']))
+        if box: self._center_view_on((box[0] + box[2]) / 2, (box[1] + box[3]) / 2)
 
     def clear_search(self):
         """Clears the search query and results."""
@@ -474,7 +600,7 @@ class PanelsMixin:
             # Settings controlled by Radiobuttons, Checkbuttons, or Scales are updated
             # directly via their own variable bindings and do not need to be "applied"
             # by this function. We must skip them to avoid errors.
-            keys_to_skip = ['mouse_move_mode', 'grid_visible', 'grid_latching', 'grid_opacity']
+            keys_to_skip = ['mouse_move_mode', 'input_backend_name', 'log_verbosity', 'adaptive_scan', 'pipeline_detection', 'grid_visible', 'grid_latching', 'grid_opacity', 'minimap_visible']
 
             for key, ui_var in self.global_settings_ui_vars.items():
                 if key in keys_to_skip:
@@ -484,6 +610,7 @@ class PanelsMixin:
                 value = setting_map['type'](ui_var.get())
                 setting_map['model'].set(value)
                 
+            self._draw_grid() # Picks up a new grid spacing
             self.log("Global settings applied successfully.", "green")
         except ValueError as e:
             messagebox.showerror("Invalid Input", f"Please check your global settings values.\nOne of the values is not a valid number.\n\nDetails: {e}")
@@ -494,3 +621,93 @@ class PanelsMixin:
             ui_var.set(str(self.global_settings_map[key]['model'].get()))
 
 
+
+    # --- Executor UI Hooks (see ExecutorMixin) ---
+    # The executor calls these on its own loop thread. Status values only overwrite their slot in
+    # live_status, however often a step polls; _refresh_runtime_ui draws the latest ones.
+    def _show_status(self, text, color_state): self.live_status['status_text'] = text; self.live_status['status_color'] = color_state
+
+    def _show_detection(self, text): self.live_status['detection'] = text
+
+    def _show_scan_interval(self, interval, adaptive): self.live_status['scan_interval'] = (interval, adaptive)
+
+    def _show_countdown(self, kind, deadline):
+        """deadline is a scheduler.time() value, or None to clear; _refresh_runtime_ui draws it."""
+        self.countdown_deadlines[kind] = deadline
+
+    def _set_ui_refresh_rate(self, *args):
+        try: self.ui_queue.tick_ms = max(15, self.ui_refresh_ms.get())
+        except tk.TclError: pass # Being edited
+
+    def _refresh_runtime_ui(self):
+        """
+        UI queue tick (every ui_refresh_ms): applies the live_status values that changed since the
+        last tick, redraws the step highlight if the current step changed, and the countdowns and
+        cycle time from their deadlines.
+        """
+        snapshot = self.live_status.copy(); drawn = self._live_status_drawn
+        changed = {key: value for key, value in snapshot.items() if key not in drawn or drawn[key] != value}
+        if 'status_text' in changed: self.status_label.config(text=changed['status_text'])
+        if 'status_color' in changed and changed['status_color'] in ('green', 'orange', 'red', 'blue'):
+            self.status_label_color_state = changed['status_color']; self.status_label.config(foreground=self.current_theme[f"status_{changed['status_color']}"])
+        if 'detection' in changed: self.last_detection_info.set(changed['detection'])
+        if 'scan_interval' in changed:
+            interval, adaptive = changed['scan_interval']; self.scan_interval_info.set(f"Scan Interval: {interval:.3f}s" + (" (adaptive)" if adaptive else ""))
+        drawn.update(changed)
+        highlight = (self.running, self.current_step_index)
+        if drawn.get('highlight') != highlight: drawn['highlight'] = highlight; self._show_runtime_highlight()
+
+        now = self.scheduler.time()
+        for kind, label, text in (('delay', self.delay_countdown_label, "Next step in {:.1f}s..."), ('timeout', self.timeout_countdown_label, "Timeout in {:.1f}s...")):
+            deadline = self.countdown_deadlines[kind]
+            new_text = text.format(deadline - now) if deadline and deadline > now and self.running else ""
+            if label.cget('text') != new_text: label.config(text=new_text)
+        if self.running and self.automation_start_time > 0:
+            total_seconds = int(now - self.automation_start_time)
+            time_str = f"Cycle Time: {total_seconds // 3600:02}:{(total_seconds % 3600) // 60:02}:{total_seconds % 60:02}"
+            if self.cycle_time_display.get() != time_str: self.cycle_time_display.set(time_str)
+
+    def _show_current_step(self): pass # _refresh_runtime_ui redraws the highlight when current_step_index changes
+
+    def _set_running_ui(self, running): self.ui_queue.post(self._set_run_buttons, running)
+
+    def _set_run_buttons(self, running):
+        self.start_btn.config(state=tk.DISABLED if running else tk.NORMAL)
+        self.simulate_btn.config(state=tk.DISABLED if running else tk.NORMAL)
+        self.stop_btn.config(state=tk.NORMAL if running else tk.DISABLED)
+        if not running: self._end_simulation() # The virtual run has finished stopping by the time this is drawn
+
+    def _show_error(self, title, message): self.ui_queue.post(messagebox.showerror, title, message)
+
+    def _open_trace_file(self):
+        if not self.trace_to_file.get(): return
+        binary = self.trace_format.get() == 'Binary'
+        filepath = os.path.join("traces", time.strftime("trace-%Y%m%d-%H%M%S") + (".bin" if binary else ".jsonl"))
+        try:
+            os.makedirs("traces", exist_ok=True); self.trace.open(filepath, 'binary' if binary else 'jsonl')
+            self.log(f"Recording trace to {filepath}.")
+        except OSError as e: self.log(f"Could not open trace file: {e}", "red")
+
+    def _toggle_minimap(self, *args):
+        """Shows the minimap over the bottom-right corner of the flowchart, inside the scrollbars, or hides it."""
+        if self.minimap.widget is None: return
+        if self.minimap_visible.get(): self.minimap.widget.place(relx=1.0, rely=1.0, anchor='se', x=-24, y=-24); self._update_minimap()
+        else: self.minimap.widget.place_forget()
+
+    def _toggle_log_file(self, *args):
+        """Opens or closes the log file sink; rotation settings are read when it is opened, the level applies at once."""
+        if self.log_file and self.log_to_file.get(): self.log_file.min_rank = LEVEL_RANK[self.log_file_level.get()]; return
+        if self.log_file: self.log_file.close(); self.log_file = None; self.log("Stopped writing the log file.")
+        if not self.log_to_file.get(): return
+        try:
+            rotate_mb, rotate_hours = max(0.0, self.log_file_rotate_mb.get()), max(0.0, self.log_file_rotate_hours.get())
+        except tk.TclError: rotate_mb, rotate_hours = 10.0, 0.0
+        filepath = os.path.join("logs", time.strftime("log-%Y%m%d-%H%M%S") + ".log")
+        try:
+            self.log_file = LogFileSink(filepath, max_bytes=int(rotate_mb * MB), rotate_seconds=rotate_hours * 3600, compress=self.log_file_gzip.get(), min_level=self.log_file_level.get())
+            self.log(f"Writing log to {filepath}.")
+        except OSError as e: self.log(f"Could not open log file: {e}", "red"); self.log_to_file.set(False)
+
+    def _show_settings_changed(self): self.ui_queue.post(self._sync_global_settings_ui_from_model)
+
+    def _store_setting(self, name, value): self.ui_queue.post(getattr(self, name).set, value)
@@ -0,0 +1,135 @@
+import operator
+import re
+
+COMPARISON_OPERATORS = {
+    '>': operator.gt, '<': operator.lt, '>=': operator.ge,
+    '<=': operator.le, '==': operator.eq, '!=': operator.ne,
+}
+
+
+class PlanError(ValueError):
+    """Raised when a step cannot be compiled into the execution plan."""
+    def __init__(self, index, message):
+        super().__init__(f"Step {index + 1}: {message}")
+        self.index = index
+
+
+class Comparison:
+    """A pre-parsed comparison such as '>= 5'. Calling it with a value returns the result."""
+    __slots__ = ('op', 'value', '_compare')
+
+    def __init__(self, op, value, compare):
+        object.__setattr__(self, 'op', op)
+        object.__setattr__(self, 'value', value)
+        object.__setattr__(self, '_compare', compare)
+
+    def __setattr__(self, name, value):
+        raise AttributeError("Comparison is immutable")
+
+    def __call__(self, current):
+        return self._compare(current, self.value)
+
+    def __str__(self):
+        return f"{self.op} {self.value}"
+
+
+def parse_comparison(expression_str, value_type=int):
+    """Parses an '<op> <value>' expression. Raises ValueError if it is malformed."""
+    expression = str(expression_str).split()
+    if len(expression) != 2: raise ValueError(f"Expression '{expression_str}' must have 2 parts (e.g., '>= 5')")
+    op, val = expression[0], value_type(expression[1])
+    if op not in COMPARISON_OPERATORS: raise ValueError(f"Unknown operator '{op}' in expression '{expression_str}'")
+    return Comparison(op, val, COMPARISON_OPERATORS[op])
+
+
+CONDITION_TOKEN = re.compile(r"\s*(?:(\()|(\))|(&&|&|\|\||\||!)|([A-Za-z_][A-Za-z0-9_]*)|(\S))")
+CONDITION_SYMBOLS = {'&&': 'and', '&': 'and', '||': 'or', '|': 'or', '!': 'not'}
+
+
+def predicate_name(n):
+    """Name of the nth (0-based) predicate in a condition: A, B, ... Z, P27, P28, ..."""
+    return chr(ord('A') + n) if n < 26 else f"P{n + 1}"
+
+
+def parse_condition(expression_str, count):
+    """
+    Parses a boolean expression over predicates A, B, C, ... (see predicate_name) with and/or/not
+    (or &, |, !) and parentheses into a tree of ('and', [nodes]), ('or', [nodes]), ('not', node)
+    and ('pred', index) tuples. Raises ValueError if it is malformed or names an unknown predicate.
+    """
+    names = {predicate_name(n).lower(): n for n in range(count)}
+    tokens = []
+    for m in CONDITION_TOKEN.finditer(str(expression_str)):
+        open_paren, close_paren, symbol, word, other = m.groups()
+        if other: raise ValueError(f"Unexpected '{other}' in condition '{expression_str}'")
+        if symbol: tokens.append(CONDITION_SYMBOLS[symbol])
+        elif word: tokens.append(word.lower())
+        else: tokens.append(open_paren or close_paren)
+    pos = 0
+
+    def peek(): return tokens[pos] if pos < len(tokens) else None
+
+    def take():
+        nonlocal pos
+        if pos >= len(tokens): raise ValueError(f"Condition '{expression_str}' ends too early")
+        pos += 1; return tokens[pos - 1]
+
+    def chain(op, operand):
+        nodes = [operand()]
+        while peek() == op: take(); nodes.append(operand())
+        return nodes[0] if len(nodes) == 1 else (op, nodes)
+
+    def either(): return chain('or', both)
+
+    def both(): return chain('and', negation)
+
+    def negation():
+        if peek() == 'not': take(); return ('not', negation())
+        token = take()
+        if token == '(':
+            node = either()
+            if take() != ')': raise ValueError(f"Missing ')' in condition '{expression_str}'")
+            return node
+        if token not in names: raise ValueError(f"Unknown predicate '{token.upper()}' in condition '{expression_str}'")
+        return ('pred', names[token])
+
+    if not tokens: raise ValueError("The condition is empty")
+    tree = either()
+    if pos != len(tokens): raise ValueError(f"Unexpected '{tokens[pos]}' in condition '{expression_str}'")
+    return tree
+
+
+def resolve_successor(steps, index, action_key, goto_key, default_action='Stop'):
+    """
+    Resolves a flow-control edge to a step index. Returns None for 'Stop' and
+    len(steps) when the edge runs off the end of the chart (completed all steps).
+    """
+    step = steps[index]
+    action = step.get(action_key, default_action)
+    if action == 'Stop': return None
+    if action == 'Next Step': return index + 1
+    if action == 'Go to Step':
+        try: target = int(step.get(goto_key, 1)) - 1
+        except (TypeError, ValueError): raise PlanError(index, f"'{goto_key}' is not a valid step number.")
+        if not (0 <= target < len(steps)): raise PlanError(index, f"'{goto_key}' points to Step {target + 1}, which does not exist.")
+        return target
+    raise PlanError(index, f"Unknown flow action '{action}' for '{action_key}'.")
+
+
+class StepPlan:
+    """
+    One compiled, immutable entry of the execution plan. Holds everything the executor
+    needs per tick so that no step fields are re-parsed or re-dispatched while running.
+    """
+    __slots__ = ('index', 'kind', 'run', 'act', 'detect', 'area', 'region', 'timeout', 'compare', 'config',
+                 'success_next', 'timeout_next', 'count_reached_next', 'success_delay', 'count_reached_delay')
+
+    def __init__(self, **fields):
+        for name in self.__slots__:
+            object.__setattr__(self, name, fields.get(name))
+
+    def __setattr__(self, name, value):
+        raise AttributeError("StepPlan is immutable")
+
+    def __repr__(self):
+        return f"<StepPlan {self.index + 1}: {self.kind}>"
@@ -1,9 +1,11 @@
 import tkinter as tk
-from tkinter import ttk, messagebox, filedialog, scrolledtext
+from tkinter import ttk, messagebox, filedialog, scrolledtext, colorchooser
 from PIL import Image, ImageTk
 import os
 import copy
+import threading
 from app import PYTESSERACT_AVAILABLE
+from app.plan import predicate_name
 
 class PropertiesMixin:
     def populate_properties_panel(self):
@@ -86,7 +88,7 @@ class PropertiesMixin:
         if log_val is self.MULTIPLE_VALUES: log_cb.config(text="Enable Execution Log (mixed)")
 
         # Show Area Checkbox (if applicable)
-        is_area_applicable = any(s['type'] in ['color', 'png'] or (s['type'] == 'logical' and s.get('logical_type') in ['Number', 'Movement Detect']) for s in selected_steps)
+        is_area_applicable = any(s['type'] in ['color', 'png'] or (s['type'] == 'logical' and s.get('logical_type') in ['Number', 'Movement Detect', 'Wait for Any', 'Condition']) for s in selected_steps)
         if is_area_applicable:
             area_val = get_common_value('show_area', False)
             area_var = tk.BooleanVar()
@@ -163,10 +165,14 @@ class PropertiesMixin:
         w = tk.BooleanVar(value=step.get('enable_logging', True)); self.properties_widgets['enable_logging'] = w
         ttk.Checkbutton(options_lf, text="Enable Execution Log", variable=w).pack(side=tk.LEFT, anchor='w')
 
-        uses_area = step['type'] in ['color', 'png'] or (step['type'] == 'logical' and step.get('logical_type') in ['Number', 'Movement Detect'])
+        uses_area = step['type'] in ['color', 'png'] or (step['type'] == 'logical' and step.get('logical_type') in ['Number', 'Movement Detect', 'Wait for Any', 'Condition'])
         if uses_area:
             w = tk.BooleanVar(value=step.get('show_area', False)); self.properties_widgets['show_area'] = w
             ttk.Checkbutton(options_lf, text="Show Area", variable=w, command=self.toggle_step_show_area_flag).pack(side=tk.LEFT, anchor='w', padx=(10, 0))
+        if step['type'] in ['color', 'png']:
+            # Lets 'Pre-detect Next Step' scan this step before the previous step's click instead of after it.
+            w = tk.BooleanVar(value=step.get('predetect_safe', False)); self.properties_widgets['predetect_safe'] = w
+            ttk.Checkbutton(options_lf, text="Safe to Pre-detect", variable=w).pack(side=tk.LEFT, anchor='w', padx=(10, 0))
 
         flow_lf = tk.LabelFrame(container, text="Flow Control", padx=5, pady=5); flow_lf.grid(row=6, columnspan=3, sticky='ew', pady=0)
 
@@ -178,7 +184,7 @@ class PropertiesMixin:
                     if int(w.grid_info()["row"]) > 1: w.destroy()
                 timeout_widgets = self.properties_widgets.get('timeout_widgets', [])
                 selected_type = logical_type_var.get(); step['logical_type'] = selected_type
-                if selected_type in ['Number', 'Movement Detect']: [w.grid() for w in timeout_widgets]
+                if selected_type in ['Number', 'Movement Detect', 'Wait for Any', 'Condition']: [w.grid() for w in timeout_widgets]
                 else: [w.grid_remove() for w in timeout_widgets]
                 if selected_type == 'Count':
                     tk.Label(details_lf, text="Current Count:").grid(row=0, column=0, sticky='w', pady=5); w = tk.Label(details_lf, text=str(step.get('counter_value', 0)), font=('Consolas', 10, 'bold')); w.grid(row=0, column=1, sticky='w', padx=5); self.properties_widgets['counter_display'] = w; w = tk.Button(details_lf, text="Reset Count", font=('Helvetica', 9), command=self.reset_logical_counter, relief=tk.FLAT); w.grid(row=0, column=2, padx=10)
@@ -320,6 +326,8 @@ class PropertiesMixin:
                     tk.Button(area_btn_frame, text="Full Screen", command=self.set_step_area_to_fullscreen, font=('Helvetica', 9), relief=tk.FLAT).pack(side=tk.LEFT, padx=(0, 2))
                     tk.Button(area_btn_frame, text="Use Global", command=self.set_step_area_to_global, font=('Helvetica', 9), relief=tk.FLAT).pack(side=tk.LEFT)
                     details_lf.columnconfigure(1, weight=1)
+                elif selected_type in ('Wait for Any', 'Condition'):
+                    self._build_targets_editor(details_lf, step, branching=(selected_type == 'Wait for Any'))
                 self.update_widget_colors_recursive(container, self.current_theme)
             
             command = lambda: _update_logical_details_frame(flow_lf)
@@ -332,6 +340,8 @@ class PropertiesMixin:
             tk.Radiobutton(logical_radios_frm_2, text="Settings Inject", variable=logical_type_var, value="Settings Inject", command=command).pack(side=tk.LEFT, padx=5)
             if PYTESSERACT_AVAILABLE: tk.Radiobutton(logical_radios_frm_2, text="Number", variable=logical_type_var, value="Number", command=command).pack(side=tk.LEFT, padx=5)
             tk.Radiobutton(logical_radios_frm_2, text="Movement", variable=logical_type_var, value="Movement Detect", command=command).pack(side=tk.LEFT, padx=5)
+            tk.Radiobutton(logical_radios_frm_1, text="Wait for Any", variable=logical_type_var, value="Wait for Any", command=command).pack(side=tk.LEFT, padx=5)
+            tk.Radiobutton(logical_radios_frm_1, text="Condition", variable=logical_type_var, value="Condition", command=command).pack(side=tk.LEFT, padx=5)
         else:
             action_var = tk.StringVar(value=step.get('action')); self.properties_widgets['action'] = action_var
             if step['type'] == 'location':
@@ -505,7 +515,7 @@ class PropertiesMixin:
         if step['type'] in ['png', 'color']:
             _update_details_for_action()
 
-        is_timeout_visible = (step['type'] not in ['logical']) or (step.get('logical_type') in ['Number', 'Movement Detect'])
+        is_timeout_visible = (step['type'] not in ['logical']) or (step.get('logical_type') in ['Number', 'Movement Detect', 'Wait for Any', 'Condition'])
         if not is_timeout_visible: [w.grid_remove() for w in self.properties_widgets['timeout_widgets']]
 
         flow_lf.columnconfigure(1, weight=1)
@@ -514,6 +524,136 @@ class PropertiesMixin:
         action_btn_frm = tk.Frame(container); action_btn_frm.grid(row=7, columnspan=3, sticky='ew', pady=(15,0)); btn_pack_style = {'side': tk.LEFT, 'expand': True, 'fill': tk.X, 'padx': 2}; tk.Button(action_btn_frm, text="Apply Changes", font=('Helvetica', 9, 'bold'), command=self.apply_properties_changes, relief=tk.FLAT).pack(**btn_pack_style); tk.Button(action_btn_frm, text="Duplicate Step", font=('Helvetica', 9, 'bold'), command=self.duplicate_step, relief=tk.FLAT).pack(**btn_pack_style); tk.Button(action_btn_frm, text="Delete Step", font=('Helvetica', 9, 'bold'), command=self.remove_step, relief=tk.FLAT).pack(**btn_pack_style)
         container.columnconfigure(1, weight=1)
  
+    def _build_targets_editor(self, details_lf, step, branching):
+        """
+        Detection list of a Wait for Any step (branching: each target has its own Go to Step and
+        click, the first match wins) or of a Condition step (predicates A, B, C, ... combined by
+        the condition expression). The list is edited in properties_widgets['targets'] and saved
+        by Apply Changes.
+        """
+        targets = copy.deepcopy(step.get('targets', [])); self.properties_widgets['targets'] = targets
+        action_labels = {'Detect Only': 'Detect Object', 'Left Click': 'Click Object', 'Right Click': 'Right Click'}
+        types = ('PNG', 'Color', 'Number') if branching else ('PNG', 'Color', 'PNG Count', 'Color Count', 'Number')
+        param_labels = {'PNG': "Threshold:", 'PNG Count': "Threshold:", 'Color': "Tolerance:", 'Color Count': "Tolerance:", 'Number': "(unused)"}
+        columns = [('n', "#", 25), ('type', "Type", 70), ('target', "Target", 120)]
+        columns += [('goto', "Go To", 45), ('action', "Action", 75)] if branching else [('test', "Count Test", 70)]
+
+        tree = ttk.Treeview(details_lf, columns=[c[0] for c in columns], show='headings', height=4, selectmode='browse')
+        for col, text, width in columns: tree.heading(col, text=text); tree.column(col, width=width, stretch=(col == 'target'))
+        tree.grid(row=0, column=0, columnspan=4, sticky='ew', pady=(0, 5))
+
+        type_var = tk.StringVar(value='PNG'); action_var = tk.StringVar(value='Detect Only')
+        tk.Label(details_lf, text="Type:").grid(row=1, column=0, sticky='w', pady=2)
+        tk.OptionMenu(details_lf, type_var, *types).grid(row=1, column=1, sticky='ew')
+        if branching:
+            tk.Label(details_lf, text="Action:").grid(row=1, column=2, sticky='w', padx=(10, 2))
+            tk.OptionMenu(details_lf, action_var, *action_labels).grid(row=1, column=3, sticky='ew')
+        tk.Label(details_lf, text="Target:").grid(row=2, column=0, sticky='w', pady=2)
+        value_entry = tk.Entry(details_lf, width=20); value_entry.grid(row=2, column=1, columnspan=2, sticky='ew')
+        browse_btn = tk.Button(details_lf, text="Browse", font=('Helvetica', 9), relief=tk.FLAT); browse_btn.grid(row=2, column=3, sticky='w', padx=5)
+        param_label = tk.Label(details_lf, text=param_labels['PNG']); param_label.grid(row=3, column=0, sticky='w', pady=2)
+        param_entry = tk.Entry(details_lf, width=7); param_entry.insert(0, "0.8"); param_entry.grid(row=3, column=1, sticky='w')
+        if branching:
+            tk.Label(details_lf, text="Go to Step:").grid(row=3, column=2, sticky='w', padx=(10, 2))
+            extra_entry = tk.Entry(details_lf, width=5); extra_entry.insert(0, str(step.get('on_success_goto_step', 1)))
+        else:
+            tk.Label(details_lf, text="Count Test:").grid(row=3, column=2, sticky='w', padx=(10, 2))
+            extra_entry = tk.Entry(details_lf, width=7); extra_entry.insert(0, ">= 1")
+        extra_entry.grid(row=3, column=3, sticky='w')
+        tk.Label(details_lf, text="Target - PNG: image path, Color: R, G, B, Number: expression (e.g., > 100)", font=('Helvetica', 8)).grid(row=4, column=0, columnspan=4, sticky='w')
+
+        def _name(n): return str(n + 1) if branching else predicate_name(n)
+
+        def _describe(t):
+            if t['type'] in ('PNG', 'PNG Count'): return os.path.basename(t.get('path', '')) or "No image"
+            if t['type'] in ('Color', 'Color Count'): return f"RGB {tuple(t.get('rgb', ()))} ±{t.get('tolerance')}"
+            return t.get('expression', '')
+
+        def _refresh(select=None):
+            tree.delete(*tree.get_children())
+            for n, t in enumerate(targets):
+                if branching: extra = ('' if t.get('goto_step') is None else t['goto_step'], next((k for k, v in action_labels.items() if v == t.get('action')), 'Detect Only'))
+                else: extra = (t.get('count_expression', '') if 'Count' in t['type'] else '',)
+                tree.insert('', 'end', iid=str(n), values=(_name(n), t['type'], _describe(t)) + extra)
+            if select is not None and 0 <= select < len(targets): tree.selection_set(str(select))
+
+        def _selected():
+            selection = tree.selection()
+            return int(selection[0]) if selection else None
+
+        def _set(entry, value): entry.delete(0, tk.END); entry.insert(0, str(value))
+
+        def _on_select(event=None):
+            n = _selected()
+            if n is None: return
+            t = targets[n]; type_var.set(t['type'])
+            if t['type'] in ('PNG', 'PNG Count'): value, param = t.get('path', ''), t.get('threshold', 0.8)
+            elif t['type'] in ('Color', 'Color Count'): value, param = ", ".join(str(c) for c in t.get('rgb', ())), t.get('tolerance', 10)
+            else: value, param = t.get('expression', ''), ''
+            _set(value_entry, value); _set(param_entry, param)
+            if branching:
+                action_var.set(next((k for k, v in action_labels.items() if v == t.get('action')), 'Detect Only'))
+                _set(extra_entry, '' if t.get('goto_step') is None else t['goto_step'])
+            else: _set(extra_entry, t.get('count_expression', '>= 1'))
+
+        def _read_target():
+            target_type, value, param = type_var.get(), value_entry.get().strip(), param_entry.get().strip()
+            t = {'type': target_type}
+            if branching: t.update(goto_step=int(extra_entry.get()), action=action_labels[action_var.get()] if target_type != 'Number' else 'Detect Object')
+            elif 'Count' in target_type: t['count_expression'] = extra_entry.get().strip() or '>= 1'
+            if target_type in ('PNG', 'PNG Count'): t.update(path=value, threshold=float(param or 0.8), image_mode='Grayscale')
+            elif target_type in ('Color', 'Color Count'):
+                rgb = [int(c) for c in value.replace(',', ' ').split()]
+                if len(rgb) != 3: raise ValueError("Color targets need three values: R, G, B.")
+                t.update(rgb=rgb, tolerance=int(param or 10), color_space='HSV', min_pixel_area=10)
+            else: t.update(expression=value or '> 0')
+            return t
+
+        def _add():
+            try: targets.append(_read_target())
+            except ValueError as e: messagebox.showerror("Invalid Target", str(e)); return
+            _refresh(len(targets) - 1)
+
+        def _update():
+            n = _selected()
+            if n is None: return
+            try: targets[n] = _read_target()
+            except ValueError as e: messagebox.showerror("Invalid Target", str(e)); return
+            _refresh(n)
+
+        def _remove():
+            n = _selected()
+            if n is not None: del targets[n]; _refresh(min(n, len(targets) - 1))
+
+        def _move_up():
+            n = _selected()
+            if n: targets[n - 1], targets[n] = targets[n], targets[n - 1]; _refresh(n - 1)
+
+        def _browse():
+            path = filedialog.askopenfilename(filetypes=[("PNG Files", "*.png")])
+            if path:
+                if type_var.get() not in ('PNG', 'PNG Count'): type_var.set('PNG')
+                _set(value_entry, path)
+
+        type_var.trace_add('write', lambda *args: param_label.config(text=param_labels[type_var.get()]))
+        browse_btn.config(command=_browse)
+        tree.bind('<<TreeviewSelect>>', _on_select)
+        btn_frame = tk.Frame(details_lf); btn_frame.grid(row=5, column=0, columnspan=4, sticky='ew', pady=(5, 0))
+        for text, command in [("Add", _add), ("Update", _update), ("Remove", _remove), ("Move Up", _move_up)]:
+            tk.Button(btn_frame, text=text, command=command, font=('Helvetica', 9), relief=tk.FLAT).pack(side=tk.LEFT, expand=True, fill=tk.X, padx=2)
+        if not branching:
+            tk.Label(details_lf, text="Condition:").grid(row=6, column=0, sticky='w', pady=(5, 0))
+            w = tk.Entry(details_lf, width=20); w.insert(0, str(step.get('condition', ''))); w.grid(row=6, column=1, columnspan=2, sticky='ew', pady=(5, 0)); self.properties_widgets['condition'] = w
+            tk.Label(details_lf, text="e.g., A and not (B or C)").grid(row=6, column=3, sticky='w', padx=5, pady=(5, 0))
+
+        area_btn_frame = tk.Frame(details_lf); area_btn_frame.grid(row=7, column=0, columnspan=4, sticky='w', pady=(5,0))
+        area_text = f"Area: {step['area'][2]-step['area'][0]}x{step['area'][3]-step['area'][1]}" if step.get('area') else "Area: Global"
+        w = tk.Button(area_btn_frame, text=area_text, command=self.select_area_for_step, font=('Helvetica', 9), relief=tk.FLAT); w.pack(side=tk.LEFT, padx=(0, 2)); self.properties_widgets['area_btn'] = w
+        tk.Button(area_btn_frame, text="Full Screen", command=self.set_step_area_to_fullscreen, font=('Helvetica', 9), relief=tk.FLAT).pack(side=tk.LEFT, padx=(0, 2))
+        tk.Button(area_btn_frame, text="Use Global", command=self.set_step_area_to_global, font=('Helvetica', 9), relief=tk.FLAT).pack(side=tk.LEFT)
+        details_lf.columnconfigure(1, weight=1)
+        _refresh()
+
     def _update_png_preview(self, step):
         if 'png_preview' not in self.properties_widgets:
             return
@@ -613,7 +753,8 @@ class PropertiesMixin:
         def _search_for_deals():
             search_btn.config(state=tk.DISABLED); status_label.config(text="Fetching API data..."); df_win.update_idletasks(); tree.delete(*tree.get_children())
             
-            if self.get_item_mapping() is None: status_label.config(text="Error: Could not load item map."); search_btn.config(state=tk.NORMAL); return
+            item_mapping = self.get_item_mapping()
+            if item_mapping is None: status_label.config(text="Error: Could not load item map."); search_btn.config(state=tk.NORMAL); return
             all_prices = self.get_all_latest_prices(); 
             if not all_prices: status_label.config(text="Error: Could not load price data."); search_btn.config(state=tk.NORMAL); return
             all_volumes = self.get_all_hourly_volumes() 
@@ -623,7 +764,7 @@ class PropertiesMixin:
                 min_profit = int(filter_vars['min_profit'].get()); max_price = int(filter_vars['max_buy_price'].get()); min_volume = int(filter_vars['min_volume'].get()); query = filter_vars['search_query'].get().lower()
             except ValueError: status_label.config(text="Error: Invalid filter values."); search_btn.config(state=tk.NORMAL); return
             
-            id_map, results = self.item_mapping_cache.get('by_id', {}), []
+            id_map, results = item_mapping.get('by_id', {}), []
             for item_id, data in all_prices.items():
                 if not (data and data.get('high') is not None and data.get('low') is not None and data['high'] > 0 and data['low'] > 0): continue
                 buy_price, sell_price = data['low'], data['high']
@@ -686,6 +827,8 @@ class PropertiesMixin:
                 
                 if 'show_area' in w:
                     s['show_area'] = w['show_area'].get()
+                if 'predetect_safe' in w:
+                    s['predetect_safe'] = w['predetect_safe'].get()
     
                 s['delay_after']=float(w['delay_after'].get()); s['on_success_action']=w['on_success_action'].get(); s['on_success_goto_step']=int(w['on_success_goto_step'].get())
                 if s['type'] == 'logical':
@@ -713,6 +856,10 @@ class PropertiesMixin:
                         s['inject_setting_value'] = w['inject_setting_value'].get()
                     elif s['logical_type'] == 'Number':
                         s['expression']=w['expression'].get(); s['timeout']=float(w['timeout'].get()); s['on_timeout_action']=w['on_timeout_action'].get(); s['on_timeout_goto_step']=int(w['on_timeout_goto_step'].get()); s['psm_mode'] = w['psm_mode'].get(); s['oem_mode'] = w['oem_mode'].get(); s['image_mode'] = w['number_image_mode'].get()
+                    elif s['logical_type'] in ('Wait for Any', 'Condition'):
+                        s['targets'] = copy.deepcopy(w['targets'])
+                        if 'condition' in w: s['condition'] = w['condition'].get()
+                        s['timeout']=float(w['timeout'].get()); s['on_timeout_action']=w['on_timeout_action'].get(); s['on_timeout_goto_step']=int(w['on_timeout_goto_step'].get())
                     elif s['logical_type'] == 'Movement Detect':
                         s['movement_tolerance'] = float(w['movement_tolerance'].get())
                         s['reset_on_start'] = w['reset_on_start'].get()
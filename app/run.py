@@ -0,0 +1,79 @@
+import argparse
+import json
+import sys
+import time
+
+from app.backends import INPUT_BACKENDS, RecordingBackend, create_backend
+from app.chart import GLOBAL_SETTING_DEFAULTS, load_chart
+from app.engine import HeadlessEngine
+from app.logfile import LEVELS, MB, LogFileSink
+from app.scheduler import VirtualScheduler
+from app.simulation import SCAN_COST, OutcomeScript
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m app.run", description="Run a flowchart exported with 'Export to JSON' without the UI. Progress is written to stdout as JSON lines.")
+    parser.add_argument("chart", help="Path to the exported flowchart JSON.")
+    parser.add_argument("--start-step", type=int, default=1, help="1-based step to start from (default: 1).")
+    parser.add_argument("--duration", type=float, default=None, help="Stop after this many seconds (default: run until the chart stops).")
+    parser.add_argument("--backend", choices=sorted(INPUT_BACKENDS), default=None, help="Input and screen capture backend (default: the chart's Input Backend setting, else pyautogui). 'xtest' drives X11 directly, without pyautogui's pause after every call.")
+    parser.add_argument("--key-hold", type=float, default=0.0, help="Seconds each key stays pressed with the xtest backend (default: 0).")
+    parser.add_argument("--verbose", action="store_true", help="Also emit per-scan detection events.")
+    parser.add_argument("--trace", metavar="PATH", default=None, help="Record an execution trace to PATH (.bin for binary records, JSON lines otherwise). Summarize it with 'python -m app.trace PATH'.")
+    parser.add_argument("--profile", metavar="PATH", default=None, help="Write per-step phase latencies to PATH (.csv for CSV, JSON otherwise) when the run ends.")
+    parser.add_argument("--metrics-port", type=int, metavar="PORT", default=None, help="Serve live metrics on http://127.0.0.1:PORT/metrics (Prometheus text) and /metrics.json while the chart runs.")
+    parser.add_argument("--log-file", metavar="PATH", default=None, help="Also append log lines to PATH, written by a background thread.")
+    parser.add_argument("--log-level", choices=LEVELS, default='INFO', help="Least severe level written to --log-file (default: INFO).")
+    parser.add_argument("--log-rotate-mb", type=float, default=10.0, help="Rotate the log file before it grows past this many MB; 0 disables (default: 10).")
+    parser.add_argument("--log-rotate-hours", type=float, default=0.0, help="Also rotate the log file after this many hours; 0 disables (default: 0).")
+    parser.add_argument("--log-backups", type=int, default=10, help="Rotated log files to keep (default: 10).")
+    parser.add_argument("--log-gzip", action="store_true", help="Gzip rotated log files.")
+    parser.add_argument("--simulate", nargs="?", const="", metavar="SCRIPT", default=None, help="Run on a virtual clock with recorded input instead of the real screen and mouse. Detections come from SCRIPT (an outcome script, or a .jsonl/.bin trace to replay); without one every detection succeeds.")
+    parser.add_argument("--scan-cost", type=float, default=SCAN_COST, help=f"Virtual seconds each simulated scan takes (default: {SCAN_COST}).")
+    args = parser.parse_args(argv)
+
+    try:
+        chart = load_chart(args.chart)
+    except (OSError, ValueError) as e:
+        print(json.dumps({'t': 0, 'event': 'error', 'title': "Load Error", 'message': f"Failed to load {args.chart}: {e}"}), flush=True)
+        return 2
+    log_file = None
+    if args.log_file:
+        try: log_file = LogFileSink(args.log_file, max_bytes=int(args.log_rotate_mb * MB), rotate_seconds=args.log_rotate_hours * 3600, compress=args.log_gzip, backups=args.log_backups, min_level=args.log_level)
+        except OSError as e:
+            print(json.dumps({'t': 0, 'event': 'error', 'title': "Log File Error", 'message': f"Could not open {args.log_file}: {e}"}), flush=True)
+            return 2
+    try: return run_engine(chart, args, log_file)
+    finally:
+        if log_file: log_file.close()
+
+
+def run_engine(chart, args, log_file):
+    """Builds the engine for args (simulated or live) and runs the chart; returns the exit code."""
+    if args.simulate is not None:
+        try: script = OutcomeScript.load(args.simulate) if args.simulate else OutcomeScript()
+        except (OSError, ValueError) as e:
+            print(json.dumps({'t': 0, 'event': 'error', 'title': "Simulation Error", 'message': f"Failed to load {args.simulate}: {e}"}), flush=True)
+            return 2
+        scheduler = VirtualScheduler(work_cost=args.scan_cost); backend = RecordingBackend(scheduler.time)
+        engine = HeadlessEngine(chart, backend, verbose=args.verbose, trace_path=args.trace, metrics_port=args.metrics_port, scheduler=scheduler, outcome_script=script, log_file=log_file)
+    else:
+        name = args.backend or chart.get('global_settings', {}).get('input_backend_name', GLOBAL_SETTING_DEFAULTS['input_backend_name'])
+        try: backend = create_backend(name, key_hold=args.key_hold) if name == 'xtest' else create_backend(name)
+        except Exception as e:
+            print(json.dumps({'t': 0, 'event': 'error', 'title': "Backend Error", 'message': f"Could not start the '{name}' input backend: {e}"}), flush=True)
+            return 2
+        engine = HeadlessEngine(chart, backend, verbose=args.verbose, trace_path=args.trace, metrics_port=args.metrics_port, log_file=log_file)
+    started = time.perf_counter()
+    exit_code = engine.run(args.start_step, args.duration)
+    if args.simulate is not None:
+        engine._event('simulation', virtual_s=round(engine.scheduler.time() - engine.engine_start_time, 3), wall_s=round(time.perf_counter() - started, 3), actions=dict(engine.input_backend.counts))
+    if args.profile:
+        step_names = {i: s.get('name', '') for i, s in enumerate(engine.steps)}
+        if args.profile.lower().endswith('.csv'): engine.profiler.export_csv(args.profile, step_names)
+        else: engine.profiler.export_json(args.profile, step_names)
+    return exit_code
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,153 @@
+import asyncio
+import heapq
+import itertools
+import threading
+import time
+
+
+class AsyncioScheduler:
+    """
+    Drives the executor from an asyncio event loop. Timers are real loop timers behind a
+    Tk-style after()/after_cancel(); blocking work (capture, detection, OCR, GE fetches) is
+    awaited on worker threads through submit(). Every method may be called from any thread.
+    The loop runs either in its own thread (start_thread) or in the caller's (run).
+    """
+    realtime = True # time() is the wall clock; see MotionEngine
+
+    def __init__(self):
+        self.loop = asyncio.new_event_loop()
+        self.loop_thread = None
+        self._handles = {}
+        self._ids = itertools.count(1)
+
+    def start_thread(self):
+        self.loop_thread = threading.Thread(target=self.run, name="executor-loop", daemon=True)
+        self.loop_thread.start()
+
+    def run(self):
+        """Runs the loop in the calling thread until quit() is called."""
+        self.loop_thread = threading.current_thread()
+        asyncio.set_event_loop(self.loop)
+        self.loop.run_forever()
+
+    def quit(self):
+        self.loop.call_soon_threadsafe(self.loop.stop)
+
+    def in_loop_thread(self):
+        return threading.current_thread() is self.loop_thread
+
+    def time(self):
+        """The executor's clock: wall-clock seconds, as time.time()."""
+        return time.time()
+
+    def _call_in_loop(self, func, *args):
+        if self.in_loop_thread(): func(*args)
+        else: self.loop.call_soon_threadsafe(func, *args)
+
+    # --- Timers ---
+    def after(self, ms, func, *args):
+        after_id = f"after#{next(self._ids)}"
+        self._call_in_loop(self._arm, after_id, max(0, ms) / 1000, func, args)
+        return after_id
+
+    def _arm(self, after_id, delay, func, args):
+        self._handles[after_id] = self.loop.call_later(delay, self._fire, after_id, func, args)
+
+    def _fire(self, after_id, func, args):
+        self._handles.pop(after_id, None)
+        func(*args)
+
+    def after_cancel(self, after_id):
+        self._call_in_loop(self._cancel, after_id)
+
+    def _cancel(self, after_id):
+        handle = self._handles.pop(after_id, None)
+        if handle: handle.cancel()
+
+    # --- Awaitable Work ---
+    def submit(self, callback, func, *args):
+        """
+        Awaits func(*args) on a worker thread, then calls callback(result, error) on the loop.
+        error is None on success; otherwise result is None and error is the exception.
+        """
+        self._call_in_loop(lambda: self.loop.create_task(self._await_work(callback, func, args)))
+
+    async def _await_work(self, callback, func, args):
+        try:
+            result, error = await self.loop.run_in_executor(None, func, *args), None
+        except Exception as e:
+            result, error = None, e
+        callback(result, error)
+
+
+class VirtualScheduler:
+    """
+    AsyncioScheduler's interface on a virtual clock. Timers wait on a heap and run() jumps
+    time() straight to the next one, so delays, waits and timeouts cost no real time and a
+    run is deterministic. submit() calls the work inline and delivers callback(result, error)
+    as a timer work_cost seconds later, modelling how long a scan takes. after() and
+    after_cancel() may be called from any thread; timers only ever run in run()'s thread.
+    With a speed, virtual time is paced to at most speed times real time, so a UI drawing
+    from time() can follow along; without one it runs as fast as the timers allow.
+    """
+    PACE_SLICE = 0.02 # Longest real sleep while paced, so time() moves smoothly and new timers are seen
+    realtime = False
+
+    def __init__(self, start=None, work_cost=0.0, speed=None):
+        self.now = time.time() if start is None else start # Starts at wall-clock time unless given
+        self.work_cost = work_cost
+        self.speed = speed
+        self.fired = 0 # Timers run so far
+        self.loop_thread = None
+        self._heap = []
+        self._cancelled = set()
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self._stop = False
+
+    def time(self): return self.now
+
+    def start_thread(self):
+        self.loop_thread = threading.Thread(target=self.run, name="virtual-loop", daemon=True)
+        self.loop_thread.start()
+
+    def run(self, until=None):
+        """Runs timers in due order until quit(), an empty heap, or virtual time until."""
+        self.loop_thread = threading.current_thread(); self._stop = False
+        real_start, virtual_start = time.perf_counter(), self.now
+        while not self._stop:
+            with self._lock:
+                while self._heap and self._heap[0][2] in self._cancelled: self._cancelled.discard(heapq.heappop(self._heap)[2])
+                if not self._heap or (until is not None and self._heap[0][0] > until): break
+                due, sleep = self._heap[0][0], 0
+                if self.speed:
+                    reachable = virtual_start + (time.perf_counter() - real_start) * self.speed
+                    if due > reachable: self.now = max(self.now, reachable); sleep = min(self.PACE_SLICE, (due - reachable) / self.speed)
+                if not sleep: _, _, after_id, func, args = heapq.heappop(self._heap)
+            if sleep: time.sleep(sleep); continue
+            self.now = max(self.now, due); self.fired += 1
+            func(*args)
+        if until is not None and not self._stop: self.now = max(self.now, until)
+
+    def quit(self): self._stop = True
+
+    def in_loop_thread(self):
+        return threading.current_thread() is self.loop_thread
+
+    # --- Timers ---
+    def after(self, ms, func, *args):
+        with self._lock:
+            seq = next(self._ids); after_id = f"after#{seq}"
+            heapq.heappush(self._heap, (self.now + max(0, ms) / 1000, seq, after_id, func, args))
+        return after_id
+
+    def after_cancel(self, after_id):
+        with self._lock: self._cancelled.add(after_id)
+
+    # --- Awaitable Work ---
+    def submit(self, callback, func, *args):
+        try:
+            result, error = func(*args), None
+        except Exception as e:
+            result, error = None, e
+        self.after(self.work_cost * 1000, callback, result, error)
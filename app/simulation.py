@@ -0,0 +1,80 @@
+import json
+
+from app.trace import DETECTION, read_trace
+
+SCAN_COST = 0.05 # Virtual seconds every simulated scan takes
+SPEEDS = {'1x': 1, '10x': 10, '100x': 100, '1000x': 1000, 'Max': None}
+# Result a step gets when the script says nothing about it: found, a count and a number that pass the
+# default '>= 1' and '> 0' expressions, a still screen, a Wait for Any step's first target and a true Condition.
+DEFAULT_OUTCOMES = {'found': True, 'count': 1, 'number': 1, 'movement': 0.0, 'branch': 1, 'condition': True}
+OUTCOME_TYPES = {'png': 'found', 'color': 'found', 'pixel': 'found', 'png_count': 'count', 'color_count': 'count', 'number': 'number', 'movement': 'movement',
+                 'wait_any': 'branch', 'condition': 'condition'}
+
+
+class OutcomeScript:
+    """
+    Detection outcomes for a simulated run, replacing capture and detection. steps maps a
+    0-based step index to one value or a list of values; a list is used one value per scan
+    and then starts over, so [false, false, true] succeeds on every third scan of that step.
+    Values by step type: PNG/Color/pixel steps take true/false or an [x, y] position (true
+    clicks the centre of the area), count steps a count, Number steps a number (or raw OCR
+    text), Movement Detect steps the percentage of the area that changed and Wait for Any steps
+    the 1-based number of the target that matches (0 for none), optionally as [n, x, y].
+    Condition steps take true/false for the whole condition.
+    """
+    def __init__(self, steps=None, defaults=None):
+        self.steps = {index: value if isinstance(value, list) else [value] for index, value in (steps or {}).items()}
+        self.defaults = {**DEFAULT_OUTCOMES, **(defaults or {})}
+        self.cursors = {}
+
+    @classmethod
+    def load(cls, filepath):
+        """
+        Reads a script ({"defaults": {...}, "steps": {"<1-based step>": value or [values]}}) or,
+        for .jsonl/.bin files, replays the detections recorded in an execution trace.
+        """
+        if filepath.lower().endswith(('.jsonl', '.bin')): return cls.from_trace(read_trace(filepath))
+        with open(filepath) as f: data = json.load(f)
+        try: steps = {int(step) - 1: value for step, value in data.get('steps', {}).items()}
+        except ValueError as e: raise ValueError(f"Step keys must be step numbers: {e}")
+        return cls(steps, data.get('defaults'))
+
+    @classmethod
+    def from_trace(cls, events):
+        """Each step's detections, in the order the trace recorded them."""
+        steps = {}
+        for e in events[events['kind'] == DETECTION]:
+            steps.setdefault(int(e['step']), []).append({'code': int(e['code']), 'x': int(e['x']), 'y': int(e['y']), 'value': float(e['value'])})
+        return cls(steps)
+
+    def next_value(self, index, outcome_type):
+        values = self.steps.get(index)
+        if not values: return self.defaults[outcome_type]
+        cursor = self.cursors.get(index, 0); self.cursors[index] = cursor + 1
+        value = values[cursor % len(values)]
+        if isinstance(value, dict): # A replayed trace detection
+            if outcome_type == 'found': return [value['x'], value['y']] if value['code'] else False
+            if outcome_type == 'branch': return [value['code'], value['x'], value['y']]
+            if outcome_type == 'condition': return bool(value['code'])
+            return value['value']
+        return value
+
+    def work(self, entry, *args):
+        """Stands in for the executor's capture-and-detect work; returns what its judge expects."""
+        outcome_type = OUTCOME_TYPES.get(entry.kind, 'found')
+        value = self.next_value(entry.index, outcome_type)
+        if outcome_type == 'found':
+            if isinstance(value, (list, tuple)): return (int(value[0]), int(value[1])), 1.0
+            if not value: return None, 0
+            x1, y1, x2, y2 = entry.area
+            return ((x1 + x2) // 2, (y1 + y2) // 2), 1.0
+        if outcome_type == 'branch':
+            match, pos = (int(value[0]), (int(value[1]), int(value[2]))) if isinstance(value, (list, tuple)) else (int(value), None)
+            x1, y1, x2, y2 = entry.area
+            pos = pos if pos and any(pos) else ((x1 + x2) // 2, (y1 + y2) // 2)
+            return [(n + 1 == match, pos if n + 1 == match else None, 1.0) for n in range(len(entry.config['_targets']))]
+        if outcome_type == 'condition': return bool(value), [] # (result, predicates that ran)
+        if outcome_type == 'count': return int(value)
+        if outcome_type == 'number': return str(value)
+        return None, float(value) # Movement: (frame, % changed)
+
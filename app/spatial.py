@@ -0,0 +1,59 @@
+class GridIndex:
+    """
+    Uniform-grid spatial index of axis-aligned boxes (x1, y1, x2, y2) in model coordinates,
+    keyed by any hashable (the canvas uses ('step', i), ('note', i) and ('edge', n)). A box
+    is filed under every cell it overlaps, so a query only visits the cells under the query
+    box: a viewport, a click or a marquee touches a handful of cells however large the
+    chart is. Queries covering more cells than there are boxes scan the boxes instead.
+    """
+    def __init__(self, cell=256):
+        self.cell = cell
+        self.boxes = {} # key -> box
+        self.cells = {} # (column, row) -> set of keys
+
+    def __len__(self): return len(self.boxes)
+
+    def clear(self): self.boxes.clear(); self.cells.clear()
+
+    def insert(self, key, box):
+        """Adds key with box, or moves it there if it is already indexed."""
+        if key in self.boxes: self.remove(key)
+        self.boxes[key] = box
+        for cell in self._cells(box): self.cells.setdefault(cell, set()).add(key)
+
+    def remove(self, key):
+        box = self.boxes.pop(key, None)
+        if box is None: return
+        for cell in self._cells(box):
+            bucket = self.cells.get(cell)
+            if bucket is not None:
+                bucket.discard(key)
+                if not bucket: del self.cells[cell]
+
+    def query(self, box):
+        """Keys whose boxes intersect box."""
+        x1, y1, x2, y2 = box; s = self.cell; boxes = self.boxes
+        if (int(x2 // s) - int(x1 // s) + 1) * (int(y2 // s) - int(y1 // s) + 1) > len(boxes): candidates = boxes
+        else:
+            candidates = set()
+            for cell in self._cells(box): candidates.update(self.cells.get(cell, ()))
+        return {key for key in candidates if boxes[key][0] <= x2 and boxes[key][2] >= x1 and boxes[key][1] <= y2 and boxes[key][3] >= y1}
+
+    def hit(self, x, y, tolerance=0):
+        """Keys whose boxes are within tolerance of the point (x, y)."""
+        return self.query((x - tolerance, y - tolerance, x + tolerance, y + tolerance))
+
+    def enclosed(self, box):
+        """Keys whose boxes lie entirely inside box."""
+        x1, y1, x2, y2 = box; boxes = self.boxes
+        return {key for key in self.query(box) if boxes[key][0] >= x1 and boxes[key][2] <= x2 and boxes[key][1] >= y1 and boxes[key][3] <= y2}
+
+    def bounds(self, kinds=None):
+        """Bounding box of every indexed box (only keys whose first element is in kinds, if given), or None."""
+        boxes = [box for key, box in self.boxes.items() if kinds is None or key[0] in kinds]
+        if not boxes: return None
+        return (min(b[0] for b in boxes), min(b[1] for b in boxes), max(b[2] for b in boxes), max(b[3] for b in boxes))
+
+    def _cells(self, box):
+        s = self.cell; x1, y1, x2, y2 = box
+        return [(column, row) for column in range(int(x1 // s), int(x2 // s) + 1) for row in range(int(y1 // s), int(y2 // s) + 1)]
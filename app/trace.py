@@ -0,0 +1,163 @@
+import argparse
+import json
+import sys
+import threading
+import time
+
+import numpy as np
+
+# Event kinds. Each event is one fixed-layout TRACE_DTYPE record; what 'code', 'target', 'x', 'y'
+# and 'value' hold depends on the kind:
+#   step_enter  -                                         value: step timeout (s), 0 if none
+#   step_exit   code: OUTCOMES index, target: next step    value: time spent in the step (s)
+#   detection   code: 1 found / 0 not found, x, y          value: confidence, area, count, number or % changed
+#   action      code: ACTIONS index, x, y                  value: -
+#   jump        code: OUTCOMES index, target: next step    value: delay before the next step (s)
+#   timeout     -                                         value: step timeout (s)
+# Steps are 0-based; target is -1 when the run stops instead of jumping.
+EVENT_KINDS = ('step_enter', 'step_exit', 'detection', 'action', 'jump', 'timeout')
+STEP_ENTER, STEP_EXIT, DETECTION, ACTION, JUMP, TIMEOUT = range(len(EVENT_KINDS))
+OUTCOMES = ('success', 'count_reached', 'timeout', 'stopped')
+ACTIONS = ('Left Click', 'Click Object', 'Click Only', 'Right Click', 'Move Only', 'Key Press', 'Type Text')
+
+TRACE_DTYPE = np.dtype([('t', '<f8'), ('kind', 'u1'), ('code', 'i1'), ('step', '<i4'), ('target', '<i4'), ('x', '<i4'), ('y', '<i4'), ('value', '<f8')])
+BINARY_MAGIC = b'FCTRACE1'
+
+
+class TraceRecorder:
+    """
+    Structured execution trace. record() writes one fixed-layout event into a preallocated
+    ring buffer under a lock and never allocates, so it can stay on for every run. When a
+    file is open a background thread flushes new events every flush_interval seconds as
+    JSON lines or as raw TRACE_DTYPE records; if the ring laps the writer, the overwritten
+    events are counted in 'dropped'. Event times come from clock(), the run's clock.
+    """
+    def __init__(self, capacity=65536, flush_interval=0.5, clock=time.time):
+        self.clock = clock
+        self.capacity = capacity
+        self.flush_interval = flush_interval
+        self.buffer = np.zeros(capacity, dtype=TRACE_DTYPE)
+        self.head = 0 # Total events recorded; the next slot is head % capacity
+        self.flushed = 0
+        self.dropped = 0
+        self._lock = threading.Lock()
+        self._file = None; self._format = None; self._writer = None; self._stop_writer = threading.Event()
+
+    def record(self, kind, step, code=0, target=-1, x=0, y=0, value=0.0):
+        with self._lock:
+            self.buffer[self.head % self.capacity] = (self.clock(), kind, code, step, target, x, y, value)
+            self.head += 1
+
+    def snapshot(self):
+        """Returns a copy of the events still in the ring, oldest first."""
+        with self._lock:
+            start = max(0, self.head - self.capacity)
+            return self.buffer[np.arange(start, self.head) % self.capacity].copy()
+
+    # --- File Output ---
+    def open(self, filepath, fmt='jsonl'):
+        """Starts writing events recorded from now on to filepath ('jsonl' or 'binary')."""
+        self.close()
+        self._format = fmt
+        self._file = open(filepath, 'wb' if fmt == 'binary' else 'w')
+        if fmt == 'binary':
+            descr = json.dumps(TRACE_DTYPE.descr).encode()
+            self._file.write(BINARY_MAGIC + len(descr).to_bytes(2, 'little') + descr)
+        with self._lock: self.flushed = self.head; self.dropped = 0
+        self._stop_writer.clear()
+        self._writer = threading.Thread(target=self._write_loop, name="trace-writer", daemon=True); self._writer.start()
+
+    def close(self):
+        if self._writer is None: return
+        self._stop_writer.set(); self._writer.join(); self._writer = None
+        self._flush(); self._file.close(); self._file = None
+
+    def _write_loop(self):
+        while not self._stop_writer.wait(self.flush_interval): self._flush()
+
+    def _flush(self):
+        with self._lock:
+            start = max(self.flushed, self.head - self.capacity)
+            self.dropped += start - self.flushed
+            events = self.buffer[np.arange(start, self.head) % self.capacity].copy()
+            self.flushed = self.head
+        if not len(events): return
+        if self._format == 'binary': self._file.write(events.tobytes())
+        else: self._file.writelines(json.dumps(event_to_dict(e)) + "\n" for e in events)
+        self._file.flush()
+
+
+def event_to_dict(event):
+    return {'t': float(event['t']), 'event': EVENT_KINDS[event['kind']], 'code': int(event['code']), 'step': int(event['step']),
+            'target': int(event['target']), 'x': int(event['x']), 'y': int(event['y']), 'value': float(event['value'])}
+
+
+def read_trace(filepath):
+    """Loads a trace written as JSON lines or binary records into a TRACE_DTYPE array."""
+    with open(filepath, 'rb') as f: data = f.read()
+    if data.startswith(BINARY_MAGIC):
+        descr_len = int.from_bytes(data[8:10], 'little'); offset = 10 + descr_len
+        file_dtype = np.dtype([tuple(field) for field in json.loads(data[10:offset])])
+        return np.frombuffer(data[offset:], dtype=file_dtype).astype(TRACE_DTYPE)
+    rows = []
+    for line in data.decode().splitlines():
+        if not line.strip(): continue
+        e = json.loads(line)
+        rows.append((e['t'], EVENT_KINDS.index(e['event']), e['code'], e['step'], e['target'], e['x'], e['y'], e['value']))
+    return np.array(rows, dtype=TRACE_DTYPE)
+
+
+def summarize(events):
+    """
+    Returns {'steps': [...], 'transitions': [...]}: per-step visit, outcome, timing and
+    detection counts, and how often each (step, next step, outcome) transition was taken.
+    Steps are 1-based here; a next step of None means the run stopped.
+    """
+    steps, transitions = {}, {}
+    for e in events:
+        kind, index = int(e['kind']), int(e['step'])
+        s = steps.setdefault(index, {'step': index + 1, 'visits': 0, 'outcomes': {}, 'times': [], 'detections': 0, 'found': 0, 'actions': 0, 'timeouts': 0})
+        if kind == STEP_ENTER: s['visits'] += 1
+        elif kind == STEP_EXIT:
+            outcome = OUTCOMES[e['code']]; s['outcomes'][outcome] = s['outcomes'].get(outcome, 0) + 1; s['times'].append(float(e['value']))
+        elif kind == DETECTION: s['detections'] += 1; s['found'] += int(e['code'] == 1)
+        elif kind == ACTION: s['actions'] += 1
+        elif kind == TIMEOUT: s['timeouts'] += 1
+        elif kind == JUMP:
+            key = (index + 1, int(e['target']) + 1 if e['target'] >= 0 else None, OUTCOMES[e['code']])
+            transitions[key] = transitions.get(key, 0) + 1
+
+    step_rows = []
+    for index in sorted(steps):
+        s = steps[index]; times = np.array(s.pop('times'))
+        s.update({'time_total_s': round(float(times.sum()), 4) if len(times) else 0.0,
+                  'time_mean_s': round(float(times.mean()), 4) if len(times) else None,
+                  'time_p95_s': round(float(np.percentile(times, 95)), 4) if len(times) else None,
+                  'time_max_s': round(float(times.max()), 4) if len(times) else None})
+        step_rows.append(s)
+    transition_rows = [{'from': f, 'to': t, 'outcome': o, 'count': n} for (f, t, o), n in sorted(transitions.items(), key=lambda item: -item[1])]
+    return {'steps': step_rows, 'transitions': transition_rows}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m app.trace", description="Summarize an execution trace into per-step timing and transition counts.")
+    parser.add_argument("trace", help="Trace file written by the app or by 'python -m app.run --trace'.")
+    parser.add_argument("--json", action="store_true", help="Print the summary as JSON instead of tables.")
+    args = parser.parse_args(argv)
+
+    summary = summarize(read_trace(args.trace))
+    if args.json: print(json.dumps(summary, indent=4)); return 0
+
+    print(f"{'Step':>5} {'Visits':>7} {'Total s':>9} {'Mean s':>8} {'p95 s':>8} {'Max s':>8} {'Detect':>7} {'Found':>6} {'Actions':>8} {'Timeouts':>9}  Outcomes")
+    for s in summary['steps']:
+        fmt = lambda v: f"{v:.3f}" if v is not None else "-"
+        outcomes = ", ".join(f"{k}={v}" for k, v in s['outcomes'].items())
+        print(f"{s['step']:>5} {s['visits']:>7} {s['time_total_s']:>9.3f} {fmt(s['time_mean_s']):>8} {fmt(s['time_p95_s']):>8} {fmt(s['time_max_s']):>8} {s['detections']:>7} {s['found']:>6} {s['actions']:>8} {s['timeouts']:>9}  {outcomes}")
+    print(f"\n{'From':>5} {'To':>5} {'Outcome':<14} {'Count':>7}")
+    for t in summary['transitions']:
+        print(f"{t['from']:>5} {t['to'] if t['to'] is not None else 'stop':>5} {t['outcome']:<14} {t['count']:>7}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,44 @@
+import queue
+import time
+
+
+class UIQueue:
+    """
+    Message queue from other threads (the executor loop, price fetches) to Tk. post() may be
+    called from any thread; the Tk thread drains the queue every interval_ms, running the
+    posted calls in order. on_tick (the runtime status refresh) is called at most every
+    tick_ms, so how often it redraws does not depend on how often anything is posted.
+    """
+    def __init__(self, root, interval_ms=30, on_tick=None, tick_ms=100, metrics=None):
+        self.root = root
+        self.interval_ms = interval_ms
+        self.on_tick = on_tick
+        self.tick_ms = tick_ms
+        self._next_tick = 0.0
+        self.metrics = metrics # Receives how late each drain ran, as Tk event-loop lag
+        self._queue = queue.SimpleQueue()
+        self._after_id = None
+        self._due = None
+        self.max_lag = 0.0
+
+    def post(self, func, *args): self._queue.put((func, args))
+
+    def start(self):
+        if self._after_id is None: self._drain()
+
+    def stop(self):
+        if self._after_id: self.root.after_cancel(self._after_id); self._after_id = None
+
+    def _drain(self):
+        if self._due is not None and self.metrics:
+            lag = max(0.0, time.monotonic() - self._due); self.max_lag = max(self.max_lag, lag)
+            self.metrics.set('tk_event_loop_lag_seconds', round(lag, 6)); self.metrics.set('tk_event_loop_lag_max_seconds', round(self.max_lag, 6))
+        # Only run what was queued before this pass so a busy producer cannot starve Tk.
+        for _ in range(self._queue.qsize()):
+            func, args = self._queue.get_nowait()
+            try: func(*args)
+            except Exception as e: print(f"Error in UI update {getattr(func, '__name__', func)}: {e}")
+        if self.on_tick and time.monotonic() >= self._next_tick:
+            self._next_tick = time.monotonic() + self.tick_ms / 1000; self.on_tick()
+        self._due = time.monotonic() + self.interval_ms / 1000
+        self._after_id = self.root.after(self.interval_ms, self._drain)
@@ -8,6 +8,7 @@ import os
 import math
 import keyboard
 import threading
+from app.logfile import level_for_color
 try:
     import pytesseract
     from PIL import Image
@@ -19,37 +20,32 @@ class UtilsMixin:
         self.destroy_all_overlays()
         self._stop_ge_auto_updater()
         if self.running: self.stop()
+        if self.metrics_server: self.metrics_server.stop()
+        if self.log_file: self.log_file.close()
+        self.ui_queue.stop(); self.log_view.stop(); self.minimap.stop(); self.scheduler.quit()
         self.root.destroy()
 
-    def log(self, message, color_name=None):
-        theme = self.current_theme
-        if color_name in ["green", "orange", "red"]: self.status_label_color_state = color_name; self.status_label.config(foreground=theme[f'status_{color_name}'])
-        log_entry = f"[{time.strftime('%H:%M:%S')}] {message}"; self.full_log_history.append(log_entry); self.filter_log()
-
-    def log_execution(self, message, color_name=None):
-        """Logs a message during script execution, respecting the step's log setting."""
-        if not self.running or not (0 <= self.current_step_index < len(self.steps)):
-            self.log(message, color_name)
-            return
-
-        step = self.steps[self.current_step_index]
-        if step.get('enable_logging', True):
-            self.log(message, color_name)
+    def log(self, message, color_name=None, level=None):
+        """Can be called from any thread; the line is queued and drawn by the log view's next flush. level (see
+        app.logfile) defaults to color_name's and decides whether the log file keeps the line."""
+        self.log_view.add(f"[{time.strftime('%H:%M:%S')}] {message}")
+        if self.log_file: self.log_file.write(message, level or level_for_color(color_name))
+        if color_name in ["green", "orange", "red"]: self.live_status['status_color'] = color_name # Drawn by _refresh_runtime_ui
 
     def filter_log(self, *args):
-        query = self.log_search_query.get().lower(); self.log_text.config(state='normal'); self.log_text.delete('1.0', tk.END)
-        filtered_log = [line for line in self.full_log_history if query in line.lower()] if query else self.full_log_history
-        for line in filtered_log: self.log_text.insert(tk.END, line + "\n")
-        max_lines = self.log_auto_clear_lines.get()
-        if max_lines > 0 and not query:
-            num_lines = int(self.log_text.index('end-1c').split('.')[0])
-            if num_lines > max_lines:
-                self.log_text.delete('1.0', f'{num_lines - max_lines + 1}.0')
-                self.full_log_history = self.full_log_history[-(max_lines):]
-        self.log_text.config(state='disabled'); self.log_text.yview(tk.END)
+        try: max_lines = max(0, self.log_auto_clear_lines.get())
+        except tk.TclError: return # Auto-clear field is being edited
+        self.log_view.set_filter(self.log_search_query.get(), max_lines)
 
     def clear_log(self):
-        self.full_log_history.clear(); self.log_search_query.set(""); self.log("Log cleared.")
+        self.log_view.clear(); self.log_search_query.set(""); self.log("Log cleared.")
+
+    def setup_hotkeys(self):
+        try: keyboard.add_hotkey('f2',lambda: self.ui_queue.post(lambda: self.start() if not self.running else self.stop())); keyboard.add_hotkey('f3',self.capture_from_hotkey); keyboard.add_hotkey('f4',self.select_area_mode)
+        except Exception as e: self.log(f"Failed to register hotkeys: {e}", "red")
+        self.root.bind("<Control-c>", self.copy_selection)
+        self.root.bind("<Control-v>", self.paste_selection)
+        self.root.bind("<Delete>", self.delete_selected_from_key)
 
     def get_node_center(self, index):
         step, z = self.steps[index], self.zoom_factor
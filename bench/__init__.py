@@ -0,0 +1,4 @@
+"""
+Benchmarks. Run from the repository root, e.g. 'python -m bench.detection --quick'.
+Results are written as JSON to bench/results/ so runs can be compared with --compare.
+"""
@@ -0,0 +1,170 @@
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import cv2
+import numpy as np
+
+from app.detection import DetectionMixin
+from app.metrics import Metrics
+from bench.report import change, environment, fmt, load_results, timing_fields, write_results
+from bench.synthetic import RESOLUTIONS, TARGET_RGB, build_scene, crop_box, movement_frames
+
+IMAGE_MODES = ('Grayscale', 'Color', 'Binary (B&W)')
+COLOR_SPACES = ('HSV', 'RGB')
+TEMPLATE_COUNTS = (1, 4, 16)
+AREAS = {'quarter': 0.25, 'half': 0.5, 'full': 1.0} # Capture area per axis, centred on the planted objects
+THRESHOLD = 0.8
+TOLERANCE = 15
+MIN_CALLS = 3
+POSITION_SLACK = 2 # Pixels a reported centre may be off from the planted one
+
+
+class BenchDetector(DetectionMixin):
+    """The app's detectors without Tk or a run: template caches, metrics and a stderr log."""
+    def __init__(self):
+        self.template_cache = {}
+        self.folder_image_cache = {}
+        self.metrics = Metrics()
+
+    def log(self, message, color_name=None, level=None): print(message, file=sys.stderr)
+
+
+def time_call(func, args, repeat, budget, warmup=1):
+    """
+    Calls func(*args) once per warmup, then up to repeat timed times, stopping early once
+    budget seconds are spent (but never before MIN_CALLS). Returns (last result, per-call seconds).
+    """
+    for _ in range(warmup): result = func(*args)
+    times, deadline = [], time.perf_counter() + budget
+    for _ in range(repeat):
+        started = time.perf_counter(); result = func(*args); times.append(time.perf_counter() - started)
+        if len(times) >= MIN_CALLS and started + times[-1] > deadline: break
+    return result, times
+
+
+def run_case(base, detector, func, args, expected, check, limits, **fields):
+    """Times func and returns its result row; an exception is recorded in 'error' and counts as wrong."""
+    row = {**base, 'detector': detector, **fields, 'expected': expected}
+    try:
+        result, times = time_call(func, args, *limits)
+        got, correct = check(result)
+        row.update({'got': got, 'correct': bool(correct), 'error': None, **timing_fields(times)})
+    except Exception as e:
+        row.update({'got': None, 'correct': False, 'error': f"{type(e).__name__}: {e}", **timing_fields([])})
+    return row
+
+
+def near(got, expected, slack=POSITION_SLACK):
+    return got is not None and abs(got[0] - expected[0]) <= slack and abs(got[1] - expected[1]) <= slack
+
+
+def load_templates(detector, folder, arrays, prefix, image_mode):
+    """Writes arrays as PNGs and loads them through load_template, as a PNG step would."""
+    loaded = []
+    for i, array in enumerate(arrays):
+        path = os.path.join(folder, f"{prefix}_{i}.png")
+        if not os.path.exists(path): cv2.imwrite(path, array)
+        loaded.append(detector.load_template(path, image_mode))
+    return loaded
+
+
+def bench_scene(detector, scene, folder, args):
+    """Yields one result row per (detector, area, image mode / colour space, template set)."""
+    screen, truth, resolution = scene['screen'], scene['truth'], scene['resolution']
+    for area_name, fraction in AREAS.items():
+        ax, ay, aw, ah = crop_box(resolution, fraction)
+        region = np.ascontiguousarray(screen[ay:ay + ah, ax:ax + aw]); offset = (ax, ay)
+        base = {'resolution': resolution, 'area': area_name, 'width': aw, 'height': ah}
+
+        for image_mode in args.image_modes:
+            for masked in (False, True):
+                suffix = '_masked' if masked else ''
+                decoys = scene['decoys']['masked' if masked else 'opaque']
+                for count in args.template_counts:
+                    # Compiled plans bind '_templates' up front, so only matching is timed here.
+                    find_templates = load_templates(detector, folder, [scene['templates']['find' + suffix]] + decoys[:count - 1], f"{resolution}_find{suffix}", image_mode)
+                    step = {'image_mode': image_mode, 'threshold': THRESHOLD, 'find_first_match': False, '_templates': find_templates}
+                    expected = truth['find' + suffix]
+                    yield run_case(base, 'find_png', detector.find_png, (region, offset, step), expected, lambda r, e=expected: (r[0], near(r[0], e)),
+                                   (args.repeat, args.budget), image_mode=image_mode, masked=masked, templates=count)
+
+                    count_templates = load_templates(detector, folder, [scene['templates']['count' + suffix]] + decoys[:count - 1], f"{resolution}_count{suffix}", image_mode)
+                    step = {'image_mode': image_mode, 'threshold': THRESHOLD, '_templates': count_templates}
+                    expected = truth['count' + suffix]
+                    yield run_case(base, 'find_and_count_png', detector.find_and_count_png, (region, offset, step), expected, lambda r, e=expected: (r, r == e),
+                                   (args.repeat, args.budget), image_mode=image_mode, masked=masked, templates=count)
+
+        for color_space in COLOR_SPACES:
+            step = {'rgb': TARGET_RGB, 'tolerance': TOLERANCE, 'min_pixel_area': 10, 'color_space': color_space}
+            step['_bounds'] = detector.color_bounds(TARGET_RGB, TOLERANCE, color_space)
+            finder = detector.find_color_on_screen_hsv if color_space == 'HSV' else detector.find_color_on_screen_rgb
+            ex, ey, expected_area = truth['color_largest']
+            yield run_case(base, finder.__name__, finder, (region, offset, step), (ex, ey),
+                           lambda r: (r[0], near(r[0], (ex, ey)) and abs(r[1] - expected_area) <= expected_area * 0.2),
+                           (args.repeat, args.budget), image_mode=color_space, masked=False, templates=0)
+            yield run_case(base, 'find_and_count_color', detector.find_and_count_color, (region, offset, step), truth['color_count'],
+                           lambda r: (r, r == truth['color_count']), (args.repeat, args.budget), image_mode=color_space, masked=False, templates=0)
+
+        previous, current, expected = movement_frames(region, scene['seed'], scene['noise'])
+        yield run_case(base, 'frame_change_percent', detector.frame_change_percent, (previous, current), round(expected, 4),
+                       lambda r: (round(r, 4), abs(r - expected) <= 0.1), (args.repeat, args.budget), image_mode='Grayscale', masked=False, templates=0)
+
+
+def status(row):
+    if row['error']: return f"ERROR {row['error']}"
+    return 'ok' if row['correct'] else f"WRONG (expected {row['expected']}, got {row['got']})"
+
+
+def row_key(row):
+    return (row['detector'], row['resolution'], row['area'], row['image_mode'], row['masked'], row['templates'])
+
+
+def compare(rows, baseline_path):
+    """Prints the median change of every row also present in a previous results file, and any correctness change."""
+    baseline = {row_key(r): r for r in load_results(baseline_path)}
+    print(f"\n{'Detector':<22} {'Res':<6} {'Area':<8} {'Mode':<13} {'Mask':<5} {'Tpl':>3} {'Base ms':>9} {'Now ms':>9} {'Change':>8}  Correctness")
+    for row in rows:
+        old = baseline.get(row_key(row))
+        if not old: continue
+        flipped = "" if row['correct'] == old['correct'] else ("now ok" if row['correct'] else "now WRONG")
+        print(f"{row['detector']:<22} {row['resolution']:<6} {row['area']:<8} {row['image_mode']:<13} {'yes' if row['masked'] else 'no':<5} {row['templates']:>3} {fmt(old['median_ms']):>9} {fmt(row['median_ms']):>9} {change(row['median_ms'], old['median_ms']):>8}  {flipped}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m bench.detection", description="Time the detectors on synthetic screens with planted templates, colour blobs and noise, and check them against the planted ground truth.")
+    parser.add_argument("--resolutions", nargs="+", choices=sorted(RESOLUTIONS), default=list(RESOLUTIONS), help="Screen sizes to generate (default: all).")
+    parser.add_argument("--image-modes", nargs="+", choices=IMAGE_MODES, default=list(IMAGE_MODES), help="PNG image modes to time (default: all).")
+    parser.add_argument("--template-counts", nargs="+", type=int, default=list(TEMPLATE_COUNTS), help="Templates per PNG step; all but one are decoys (default: 1 4 16).")
+    parser.add_argument("--repeat", type=int, default=20, help="Most timed calls per case (default: 20).")
+    parser.add_argument("--budget", type=float, default=1.0, help="Seconds per case after which timing stops early, after at least 3 calls (default: 1).")
+    parser.add_argument("--seed", type=int, default=0, help="Scene generator seed (default: 0).")
+    parser.add_argument("--noise", type=float, default=4.0, help="Gaussian noise sigma added to every screen (default: 4).")
+    parser.add_argument("--quick", action="store_true", help="720p only, one template count and 3 repeats; for a fast smoke run.")
+    parser.add_argument("--out", metavar="PATH", default=None, help="Write results as JSON to PATH (default: bench/results/detection-<time>.json).")
+    parser.add_argument("--compare", metavar="PATH", default=None, help="Print the median change against a previous results file.")
+    args = parser.parse_args(argv)
+    if args.quick: args.resolutions, args.template_counts, args.repeat = ['720p'], [4], 3
+    if max(args.template_counts) > 16 or min(args.template_counts) < 1: parser.error("--template-counts must be between 1 and 16")
+
+    detector, rows = BenchDetector(), []
+    print(f"{'Detector':<22} {'Res':<6} {'Area':<8} {'Mode':<13} {'Mask':<5} {'Tpl':>3} {'Median ms':>10} {'p95 ms':>9}  OK")
+    with tempfile.TemporaryDirectory() as folder:
+        for resolution in args.resolutions:
+            scene = build_scene(resolution, args.seed, args.noise)
+            for row in bench_scene(detector, scene, folder, args):
+                rows.append(row)
+                print(f"{row['detector']:<22} {row['resolution']:<6} {row['area']:<8} {row['image_mode']:<13} {'yes' if row['masked'] else 'no':<5} {row['templates']:>3} {fmt(row['median_ms']):>10} {fmt(row['p95_ms']):>9}  {status(row)}", flush=True)
+
+    meta = environment(seed=args.seed, noise=args.noise, repeat=args.repeat, budget=args.budget, threshold=THRESHOLD, tolerance=TOLERANCE)
+    out = write_results('detection', rows, meta, args.out)
+    wrong = [row for row in rows if not row['correct']]
+    print(f"\n{len(rows)} cases, {len(wrong)} wrong or failed. Results written to {out}")
+    if args.compare: compare(rows, args.compare)
+    return 1 if wrong else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,193 @@
+import argparse
+import math
+import sys
+import time
+
+import numpy as np
+
+from app.engine import HeadlessEngine
+from app.scheduler import AsyncioScheduler, VirtualScheduler
+from bench.report import change, environment, fmt, load_results, write_results
+
+CHART_KINDS = ('location', 'count', 'wait', 'detection', 'mixed')
+SIZES = (10, 100, 1000, 10000)
+CLOCKS = ('virtual', 'real')
+TARGET_RGB = (230, 40, 200)
+FRAME_SIZE = 64
+
+
+class FakeBackend:
+    """
+    Input backend that records instead of moving the mouse, and a capture source that returns
+    a prebuilt frame: the target colour is on screen for every hit_every-th grab, so detection
+    steps rescan hit_every - 1 times before they succeed.
+    """
+    name = 'fake'
+
+    def __init__(self, hit_every=1):
+        self.hit_every = hit_every
+        self.grabs = 0; self.moves = 0; self.keys = 0
+        self.clicks = [] # perf_counter() of every click
+        self.empty = np.full((FRAME_SIZE, FRAME_SIZE, 3), 90, np.uint8)
+        self.hit = self.empty.copy(); self.hit[16:48, 16:48] = tuple(reversed(TARGET_RGB))
+
+    def position(self): return (0, 0)
+
+    def size(self): return (1920, 1080)
+
+    def move_to(self, x, y, duration=0): self.moves += 1
+
+    def set_position(self, x, y): self.moves += 1
+
+    def click(self, duration=0): self.clicks.append(time.perf_counter())
+
+    def right_click(self): self.clicks.append(time.perf_counter())
+
+    def press(self, key): self.keys += 1
+
+    def write(self, text, interval=0): self.keys += len(text)
+
+    def grab(self, region, conversion=None):
+        self.grabs += 1
+        return self.hit if self.grabs % self.hit_every == 0 else self.empty
+
+
+class MeasuredScheduler(AsyncioScheduler):
+    """AsyncioScheduler that records how late every timer fired, in seconds."""
+    def __init__(self):
+        super().__init__()
+        self.lateness = []
+
+    def _arm(self, after_id, delay, func, args):
+        super()._arm(after_id, delay, self._measure, (self.loop.time() + delay, func, args))
+
+    def _measure(self, due, func, args):
+        self.lateness.append(self.loop.time() - due)
+        func(*args)
+
+
+class BenchEngine(HeadlessEngine):
+    """
+    HeadlessEngine that timestamps the detection -> click -> next step path: when a scan result
+    reaches the loop (_on_probe_done), when the backend clicks, and when advance_step runs.
+    """
+    def __init__(self, chart, backend, scheduler):
+        super().__init__(chart, backend, emit=self._count_event, scheduler=scheduler)
+        self.events = 0
+        self.tick_costs = []; self.detected_at = None
+        self.detect_to_click = []; self.click_to_next = []
+
+    def _count_event(self, event): self.events += 1
+
+    def run_step_executor(self):
+        started = time.perf_counter()
+        super().run_step_executor()
+        self.tick_costs.append(time.perf_counter() - started)
+
+    def _on_probe_done(self, *args):
+        self.detected_at = time.perf_counter()
+        super()._on_probe_done(*args)
+
+    def advance_step(self):
+        # The click happens on the motion thread, after the detection that triggered it.
+        clicks = self.input_backend.clicks
+        if self.detected_at is not None and clicks and clicks[-1] >= self.detected_at:
+            self.detect_to_click.append(clicks[-1] - self.detected_at); self.click_to_next.append(time.perf_counter() - clicks[-1])
+        self.detected_at = None
+        super().advance_step()
+
+
+def chart_step(kind, index, wait):
+    """One step of a chart; kind 'mixed' cycles through the other kinds."""
+    if kind == 'mixed': kind = CHART_KINDS[index % 4]
+    step = {'name': f"{kind} {index + 1}", 'delay_after': 0, 'on_success_action': 'Next Step', 'enable_logging': True}
+    if kind == 'location': step.update(type='location', action='Left Click', coords=[100 + index % 50, 200])
+    elif kind == 'count': step.update(type='logical', logical_type='Count', max_count=0)
+    elif kind == 'wait': step.update(type='logical', logical_type='Wait', max_time=wait)
+    else: step.update(type='color', action='Left Click', rgb=list(TARGET_RGB), tolerance=10, color_space='HSV', min_pixel_area=10,
+                      area=[0, 0, FRAME_SIZE, FRAME_SIZE], timeout=0, on_timeout_action='Stop')
+    return step
+
+
+def make_chart(kind, size, loops, wait, scan_interval):
+    """
+    size steps of kind followed by a Count step that loops back to step 1 loops times and then
+    stops the run, so every case executes about size * loops steps.
+    """
+    steps = [chart_step(kind, i, wait) for i in range(size - 1)]
+    steps.append({'name': 'loop', 'type': 'logical', 'logical_type': 'Count', 'max_count': loops, 'delay_after': 0, 'on_count_reached_delay': 0,
+                  'on_success_action': 'Go to Step', 'on_success_goto_step': 1, 'on_count_reached_action': 'Stop', 'enable_logging': True})
+    return {'global_settings': {'scan_interval': scan_interval, 'mouse_speed': 0, 'hold_duration': 0.01, 'speed_variance': 0,
+                                'hold_duration_variance': 0, 'loc_offset_variance': 0}, 'steps': steps}
+
+
+def micros(values, p):
+    return round(float(np.percentile(values, p)) * 1e6, 2) if len(values) else None
+
+
+def run_case(kind, size, clock, args):
+    loops = max(1, math.ceil(args.min_steps / size))
+    # On the virtual clock waits and rescans cost nothing, so they can be realistic.
+    wait, scan_interval = (1.0, 0.05) if clock == 'virtual' else (0.002, 0.001)
+    chart = make_chart(kind, size, loops, wait, scan_interval)
+    backend = FakeBackend(hit_every=args.hit_every)
+    scheduler = VirtualScheduler(start=0.0) if clock == 'virtual' else MeasuredScheduler()
+    engine = BenchEngine(chart, backend, scheduler)
+
+    started = time.perf_counter(); engine.compile_plan(); compile_s = time.perf_counter() - started
+    started = time.perf_counter(); exit_code = engine.run(); wall = time.perf_counter() - started
+    steps = int(engine.metrics.get('steps_executed')); ticks = len(engine.tick_costs)
+    lateness = scheduler.lateness if clock == 'real' else []
+    return {
+        'chart': kind, 'size': size, 'clock': clock, 'loops': loops, 'exit_code': exit_code, 'final_status': engine.final_status[0] if engine.final_status else None,
+        'steps': steps, 'ticks': ticks, 'clicks': len(backend.clicks), 'grabs': backend.grabs, 'events': engine.events,
+        'wall_s': round(wall, 4), 'virtual_s': round(scheduler.time(), 3) if clock == 'virtual' else None, 'compile_ms': round(compile_s * 1000, 3),
+        'steps_per_s': round(steps / wall, 1) if wall else None, 'ticks_per_s': round(ticks / wall, 1) if wall else None,
+        'tick_p50_us': micros(engine.tick_costs, 50), 'tick_p99_us': micros(engine.tick_costs, 99),
+        'jitter_p50_us': micros(lateness, 50), 'jitter_p99_us': micros(lateness, 99), 'jitter_max_us': round(max(lateness) * 1e6, 2) if lateness else None,
+        'detect_to_click_p50_us': micros(engine.detect_to_click, 50), 'detect_to_click_p95_us': micros(engine.detect_to_click, 95),
+        'click_to_next_p50_us': micros(engine.click_to_next, 50), 'click_to_next_p95_us': micros(engine.click_to_next, 95),
+    }
+
+
+def compare(rows, baseline_path):
+    """Prints the steps/s change of every case also present in a previous results file."""
+    baseline = {(r['chart'], r['size'], r['clock']): r for r in load_results(baseline_path)}
+    print(f"\n{'Chart':<10} {'Steps':>6} {'Clock':<8} {'Base st/s':>10} {'Now st/s':>10} {'Change':>8}")
+    for row in rows:
+        old = baseline.get((row['chart'], row['size'], row['clock']))
+        if old: print(f"{row['chart']:<10} {row['size']:>6} {row['clock']:<8} {fmt(old['steps_per_s'], 1):>10} {fmt(row['steps_per_s'], 1):>10} {change(row['steps_per_s'], old['steps_per_s']):>8}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m bench.executor", description="Measure executor throughput and scheduling jitter with a fake capture source, a recording input backend and a virtual or real clock.")
+    parser.add_argument("--charts", nargs="+", choices=CHART_KINDS, default=list(CHART_KINDS), help="Chart kinds to run (default: all).")
+    parser.add_argument("--sizes", nargs="+", type=int, default=list(SIZES), help="Steps per chart (default: 10 100 1000 10000).")
+    parser.add_argument("--clocks", nargs="+", choices=CLOCKS, default=list(CLOCKS), help="Virtual clock (no real waiting) and/or the real asyncio loop (default: both).")
+    parser.add_argument("--min-steps", type=int, default=5000, help="Smaller charts loop until about this many steps ran (default: 5000).")
+    parser.add_argument("--hit-every", type=int, default=2, help="Detection steps find their target on every Nth scan (default: 2).")
+    parser.add_argument("--quick", action="store_true", help="Sizes 10 and 1000 with 1000 steps each; for a fast smoke run.")
+    parser.add_argument("--out", metavar="PATH", default=None, help="Write results as JSON to PATH (default: bench/results/executor-<time>.json).")
+    parser.add_argument("--compare", metavar="PATH", default=None, help="Print the steps/s change against a previous results file.")
+    args = parser.parse_args(argv)
+    if args.quick: args.sizes, args.min_steps = [10, 1000], 1000
+    if min(args.sizes) < 2: parser.error("--sizes must be at least 2 (the last step is the loop counter)")
+
+    rows = []
+    print(f"{'Chart':<10} {'Steps':>6} {'Clock':<8} {'Ran':>7} {'Steps/s':>10} {'Ticks/s':>10} {'Tick p99 us':>12} {'Jitter p99 us':>14} {'Det->click us':>14} {'Click->next us':>15}  Status")
+    for kind in args.charts:
+        for size in args.sizes:
+            for clock in args.clocks:
+                row = run_case(kind, size, clock, args); rows.append(row)
+                print(f"{kind:<10} {size:>6} {clock:<8} {row['steps']:>7} {fmt(row['steps_per_s'], 1):>10} {fmt(row['ticks_per_s'], 1):>10} {fmt(row['tick_p99_us'], 1):>12} "
+                      f"{fmt(row['jitter_p99_us'], 1):>14} {fmt(row['detect_to_click_p50_us'], 1):>14} {fmt(row['click_to_next_p50_us'], 1):>15}  {row['final_status']}", flush=True)
+
+    out = write_results('executor', rows, environment(min_steps=args.min_steps, hit_every=args.hit_every), args.out)
+    failed = [row for row in rows if row['exit_code'] != 0]
+    print(f"\n{len(rows)} cases, {len(failed)} did not finish normally. Results written to {out}")
+    if args.compare: compare(rows, args.compare)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
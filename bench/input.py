@@ -0,0 +1,126 @@
+import argparse
+import os
+import shutil
+import subprocess
+import sys
+import time
+
+from app.backends import create_backend
+from bench.report import change, environment, fmt, load_results, timing_fields, write_results
+
+BACKENDS = ('pyautogui', 'xtest')
+SCREEN = (1280, 720)
+TYPED_TEXT = "hello world 12345"
+GRAB_REGION = (0, 0, 640, 360)
+POINTER_TIMEOUT = 1.0 # Seconds to wait for the server to report a move before giving up on it
+
+
+def start_xvfb(size=SCREEN):
+    """Starts a private Xvfb on the first free display number; returns (process, display name)."""
+    if not shutil.which('Xvfb'): raise RuntimeError("Xvfb is not installed (needed by --xvfb)")
+    number = next(n for n in range(90, 200) if not os.path.exists(f"/tmp/.X11-unix/X{n}") and not os.path.exists(f"/tmp/.X{n}-lock"))
+    proc = subprocess.Popen(['Xvfb', f":{number}", '-screen', '0', f"{size[0]}x{size[1]}x24", '-nolisten', 'tcp'], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    deadline = time.monotonic() + 5
+    while not os.path.exists(f"/tmp/.X11-unix/X{number}"):
+        if proc.poll() is not None or time.monotonic() > deadline: proc.kill(); raise RuntimeError(f"Xvfb :{number} did not start")
+        time.sleep(0.05)
+    return proc, f":{number}"
+
+
+def pointer_round_trip(backend, i):
+    """set_position() until position() reports the new point: the latency a detection would see."""
+    target = (100 + i % 200, 100 + i % 150)
+    backend.set_position(*target)
+    deadline = time.perf_counter() + POINTER_TIMEOUT
+    while tuple(backend.position()) != target:
+        if time.perf_counter() > deadline: raise TimeoutError(f"pointer never reached {target}")
+
+
+def operations(backend):
+    """(name, call(i)) for every timed operation; the click holds for 0 s so only overhead is timed."""
+    return [
+        ('set_position', lambda i: backend.set_position(100 + i % 200, 100)),
+        ('move_to', lambda i: backend.move_to(100 + i % 200, 200, duration=0)),
+        ('pointer_round_trip', lambda i: pointer_round_trip(backend, i)),
+        ('click', lambda i: backend.click(duration=0)),
+        ('press', lambda i: backend.press('a')),
+        ('write', lambda i: backend.write(TYPED_TEXT, interval=0)),
+        ('grab', lambda i: backend.grab(GRAB_REGION)),
+    ]
+
+
+def time_operation(call, repeat, budget):
+    """Per-call seconds for up to repeat calls of call(i), stopping early once budget seconds are spent."""
+    times, deadline = [], time.perf_counter() + budget
+    for i in range(repeat):
+        started = time.perf_counter(); call(i); times.append(time.perf_counter() - started)
+        if time.perf_counter() > deadline: break
+    return times
+
+
+def bench_backend(name, display, args):
+    """Yields one result row per operation; a backend that cannot start gives a single error row."""
+    try: backend = create_backend(name, display=display) if name == 'xtest' else create_backend(name)
+    except Exception as e:
+        yield {'backend': name, 'op': 'start', 'error': f"{type(e).__name__}: {e}", **timing_fields([])}; return
+    for op, call in operations(backend):
+        if args.ops and op not in args.ops: continue
+        row = {'backend': name, 'op': op}
+        try: row.update(error=None, **timing_fields(time_operation(call, args.repeat, args.budget)))
+        except Exception as e: row.update(error=f"{type(e).__name__}: {e}", **timing_fields([]))
+        yield row
+
+
+def compare(rows, baseline_path):
+    """Prints the median change of every row also present in a previous results file."""
+    baseline = {(r['backend'], r['op']): r for r in load_results(baseline_path)}
+    print(f"\n{'Backend':<10} {'Operation':<19} {'Base ms':>9} {'Now ms':>9} {'Change':>8}")
+    for row in rows:
+        old = baseline.get((row['backend'], row['op']))
+        if old: print(f"{row['backend']:<10} {row['op']:<19} {fmt(old['median_ms']):>9} {fmt(row['median_ms']):>9} {change(row['median_ms'], old['median_ms']):>8}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m bench.input", description="Time the input backends' mouse, keyboard and capture calls on an X display. "
+                                     "The benchmark really moves, clicks and types, so run it on a private Xvfb (--xvfb) or a display nothing else uses.")
+    target = parser.add_mutually_exclusive_group(required=True)
+    target.add_argument("--xvfb", action="store_true", help=f"Start a private {SCREEN[0]}x{SCREEN[1]} Xvfb for the run (needs Xvfb on PATH).")
+    target.add_argument("--display", metavar="NAME", help="Use this existing X display, e.g. ':99'. Clicks and keys go to whatever has focus there.")
+    parser.add_argument("--backends", nargs="+", choices=BACKENDS, default=list(BACKENDS), help="Backends to time (default: all).")
+    parser.add_argument("--ops", nargs="+", default=None, help="Only time these operations (default: all).")
+    parser.add_argument("--repeat", type=int, default=50, help="Most timed calls per operation (default: 50).")
+    parser.add_argument("--budget", type=float, default=3.0, help="Seconds per operation after which timing stops early (default: 3).")
+    parser.add_argument("--out", metavar="PATH", default=None, help="Write results as JSON to PATH (default: bench/results/input-<time>.json).")
+    parser.add_argument("--compare", metavar="PATH", default=None, help="Print the median change against a previous results file.")
+    args = parser.parse_args(argv)
+
+    xvfb = None
+    try:
+        if args.xvfb: xvfb, display = start_xvfb()
+        else: display = args.display
+    except RuntimeError as e: parser.error(str(e))
+    os.environ['DISPLAY'] = display # pyautogui connects to $DISPLAY when it is imported
+
+    rows = []
+    print(f"{'Backend':<10} {'Operation':<19} {'Calls':>6} {'Median ms':>10} {'p95 ms':>9} {'Min ms':>9}  Status")
+    try:
+        for name in args.backends:
+            for row in bench_backend(name, display, args):
+                rows.append(row)
+                print(f"{row['backend']:<10} {row['op']:<19} {row['repeat']:>6} {fmt(row['median_ms']):>10} {fmt(row['p95_ms']):>9} {fmt(row['min_ms']):>9}  {row['error'] or 'ok'}", flush=True)
+    finally:
+        if xvfb: xvfb.terminate(); xvfb.wait()
+
+    medians = {(r['backend'], r['op']): r['median_ms'] for r in rows if r['median_ms']}
+    speedups = [(op, medians[('pyautogui', op)] / medians[('xtest', op)]) for (backend, op) in medians if backend == 'xtest' and ('pyautogui', op) in medians]
+    if speedups: print("\nxtest vs pyautogui (median): " + ", ".join(f"{op} {ratio:.1f}x" for op, ratio in speedups))
+
+    out = write_results('input', rows, environment(display=display, xvfb=bool(xvfb), repeat=args.repeat, budget=args.budget), args.out)
+    failed = [row for row in rows if row['error']]
+    print(f"\n{len(rows)} cases, {len(failed)} failed. Results written to {out}")
+    if args.compare: compare(rows, args.compare)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
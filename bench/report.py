@@ -0,0 +1,43 @@
+import json
+import os
+import platform
+import time
+
+import cv2
+import numpy as np
+
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results")
+
+
+def environment(**settings):
+    """Machine and library details stored with every results file, plus the run's settings."""
+    return {'time': time.time(), 'python': platform.python_version(), 'numpy': np.__version__, 'opencv': cv2.__version__,
+            'platform': platform.platform(), 'cpu_count': os.cpu_count(), 'opencv_threads': cv2.getNumThreads(), **settings}
+
+
+def write_results(name, rows, meta, out=None):
+    """Writes {'meta', 'results'} as JSON to out (default: bench/results/<name>-<time>.json) and returns the path."""
+    out = out or os.path.join(RESULTS_DIR, time.strftime(f"{name}-%Y%m%d-%H%M%S.json"))
+    os.makedirs(os.path.dirname(os.path.abspath(out)), exist_ok=True)
+    with open(out, 'w') as f: json.dump({'meta': meta, 'results': rows}, f, indent=4, default=lambda v: v.item() if hasattr(v, 'item') else list(v))
+    return out
+
+
+def timing_fields(times):
+    """Summary of per-call seconds in milliseconds: repeat, min, median, p95 and mean."""
+    if not times: return {'repeat': 0, 'min_ms': None, 'median_ms': None, 'p95_ms': None, 'mean_ms': None}
+    ms = np.array(times) * 1000
+    return {'repeat': len(times), 'min_ms': round(float(ms.min()), 4), 'median_ms': round(float(np.median(ms)), 4),
+            'p95_ms': round(float(np.percentile(ms, 95)), 4), 'mean_ms': round(float(ms.mean()), 4)}
+
+
+def load_results(path):
+    with open(path) as f: return json.load(f)['results']
+
+
+def fmt(value, digits=3): return f"{value:.{digits}f}" if value is not None else "-"
+
+
+def change(new, old):
+    """Relative change of new against old as '+12.3%', or '-' when either is missing."""
+    return f"{(new - old) / old * 100:+.1f}%" if old and new is not None else "-"
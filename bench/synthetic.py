@@ -0,0 +1,136 @@
+import cv2
+import numpy as np
+
+RESOLUTIONS = {'720p': (1280, 720), '1080p': (1920, 1080), '1440p': (2560, 1440)}
+TARGET_RGB = (230, 40, 200) # Saturated magenta; the muted background never falls inside its HSV/RGB bounds
+TEMPLATE_SIZE = 32
+CELL = 40 # Planted objects sit one per CELL x CELL cell inside the central planting box
+PLANT_FRACTION = 0.25 # The planting box is the central quarter (per axis) of the screen
+
+
+def background(rng, width, height):
+    """A muted desktop-like screen: a diagonal gradient, flat panels and thin text-like lines."""
+    y, x = np.mgrid[0:height, 0:width].astype(np.float32)
+    base = 40 + 120 * (x / width * 0.6 + y / height * 0.4)
+    screen = np.dstack([base + 10, base, base - 10]).clip(0, 255).astype(np.uint8)
+    for _ in range(int(width * height / 40000)):
+        x0, y0 = int(rng.integers(0, width - 20)), int(rng.integers(0, height - 20))
+        x1, y1 = x0 + int(rng.integers(20, 300)), y0 + int(rng.integers(20, 200))
+        grey = int(rng.integers(30, 220)); tint = rng.integers(-25, 26, 3)
+        cv2.rectangle(screen, (x0, y0), (x1, y1), [int(np.clip(grey + t, 0, 255)) for t in tint], -1)
+        for line_y in range(y0 + 8, min(y1, height) - 4, 12):
+            cv2.line(screen, (x0 + 6, line_y), (x0 + 6 + int(rng.integers(10, max(11, x1 - x0 - 12))), line_y), (255 - grey,) * 3, 1)
+    return screen
+
+
+def icon_colour(rng):
+    """A random BGR colour well away from TARGET_RGB's hue, so templates never read as colour blobs."""
+    target_hue = int(cv2.cvtColor(np.uint8([[list(reversed(TARGET_RGB))]]), cv2.COLOR_BGR2HSV)[0, 0, 0])
+    while True:
+        colour = rng.integers(0, 256, 3).astype(np.uint8)
+        h, s, _ = (int(c) for c in cv2.cvtColor(colour.reshape(1, 1, 3), cv2.COLOR_BGR2HSV)[0, 0])
+        if s < 60 or min(abs(h - target_hue), 180 - abs(h - target_hue)) > 45: return [int(c) for c in colour]
+
+
+def make_template(rng, size=TEMPLATE_SIZE, masked=False):
+    """
+    A random high-contrast icon. Masked templates are BGRA with a round opaque centre; their
+    transparent corners hold colours that never appear on screen, as in a real cut-out PNG.
+    """
+    icon = np.empty((size, size, 3), np.uint8); icon[:] = icon_colour(rng)
+    for _ in range(6):
+        colour = icon_colour(rng)
+        p1, p2 = (int(rng.integers(0, size)), int(rng.integers(0, size))), (int(rng.integers(0, size)), int(rng.integers(0, size)))
+        shape = rng.integers(0, 3)
+        if shape == 0: cv2.rectangle(icon, p1, p2, colour, -1)
+        elif shape == 1: cv2.circle(icon, p1, int(rng.integers(3, size // 2)), colour, -1)
+        else: cv2.line(icon, p1, p2, colour, 3)
+    if not masked: return icon
+    alpha = np.zeros((size, size), np.uint8); cv2.circle(alpha, (size // 2, size // 2), size // 2 - 1, 255, -1)
+    icon[alpha == 0] = icon_colour(rng)
+    return np.dstack([icon, alpha])
+
+
+def paste(screen, template, x, y):
+    """Draws template with its top-left at (x, y); BGRA templates only cover their opaque pixels."""
+    h, w = template.shape[:2]; target = screen[y:y + h, x:x + w]
+    if template.shape[2] == 4: opaque = template[:, :, 3] > 0; target[opaque] = template[:, :, :3][opaque]
+    else: target[:] = template
+
+
+def add_noise(image, rng, sigma):
+    if sigma <= 0: return image
+    return (image.astype(np.int16) + rng.normal(0, sigma, image.shape).round().astype(np.int16)).clip(0, 255).astype(np.uint8)
+
+
+def plant_box(resolution):
+    """(x, y, w, h) of the central box that holds every planted object, in screen coordinates."""
+    width, height = RESOLUTIONS[resolution]
+    w, h = int(width * PLANT_FRACTION), int(height * PLANT_FRACTION)
+    return ((width - w) // 2, (height - h) // 2, w, h)
+
+
+def crop_box(resolution, fraction):
+    """(x, y, w, h) of the central capture area covering fraction of each axis (1.0 = full screen)."""
+    width, height = RESOLUTIONS[resolution]
+    w, h = int(width * fraction), int(height * fraction)
+    return ((width - w) // 2, (height - h) // 2, w, h)
+
+
+def build_scene(resolution, seed=0, noise=4.0, count_instances=4, blob_count=6, decoys=15):
+    """
+    Returns a dict describing one synthetic screen and its ground truth, all coordinates in
+    screen pixels:
+      screen        BGR image
+      templates     {'find', 'count', 'find_masked', 'count_masked'} -> planted template
+      decoys        {'opaque', 'masked'} -> templates that appear nowhere on screen
+      truth         'find' / 'find_masked': planted centre (x, y); 'count' / 'count_masked':
+                    instances planted; 'color_largest': (x, y, area) of the largest blob;
+                    'color_count': blobs planted
+    Objects are placed on a grid inside plant_box() so they never overlap.
+    """
+    rng = np.random.default_rng(seed)
+    width, height = RESOLUTIONS[resolution]
+    screen = background(rng, width, height)
+    templates = {'find': make_template(rng), 'count': make_template(rng), 'find_masked': make_template(rng, masked=True), 'count_masked': make_template(rng, masked=True)}
+    decoy_templates = {'opaque': [make_template(rng) for _ in range(decoys)], 'masked': [make_template(rng, masked=True) for _ in range(decoys)]}
+
+    bx, by, bw, bh = plant_box(resolution)
+    cells = [(bx + cx * CELL, by + cy * CELL) for cy in range(bh // CELL) for cx in range(bw // CELL)]
+    needed = 2 + 2 * count_instances + blob_count
+    if len(cells) < needed: raise ValueError(f"{resolution} planting box only has {len(cells)} cells for {needed} objects")
+    order = rng.permutation(len(cells)); cells = [cells[i] for i in order[:needed]]
+    pad = (CELL - TEMPLATE_SIZE) // 2
+    truth = {}
+
+    for name in ('find', 'find_masked'):
+        x, y = cells.pop(); paste(screen, templates[name], x + pad, y + pad)
+        truth[name] = (x + pad + TEMPLATE_SIZE // 2, y + pad + TEMPLATE_SIZE // 2)
+    for name in ('count', 'count_masked'):
+        for _ in range(count_instances):
+            x, y = cells.pop(); paste(screen, templates[name], x + pad, y + pad)
+        truth[name] = count_instances
+
+    colour_bgr = tuple(reversed(TARGET_RGB)); largest = None
+    for radius in range(6, 6 + 2 * blob_count, 2): # Distinct radii so the largest blob is unambiguous
+        x, y = cells.pop(); centre = (x + CELL // 2, y + CELL // 2)
+        cv2.circle(screen, centre, radius, colour_bgr, -1)
+        largest = (centre[0], centre[1], np.pi * radius * radius)
+    truth['color_largest'] = largest; truth['color_count'] = blob_count
+
+    return {'resolution': resolution, 'screen': add_noise(screen, rng, noise), 'templates': templates, 'decoys': decoy_templates, 'truth': truth, 'seed': seed, 'noise': noise}
+
+
+def movement_frames(frame, seed=0, noise=4.0, changed_fraction=0.05):
+    """
+    Returns (previous, current, expected %) grayscale frames for the movement diff: current
+    re-noises previous and shifts every pixel of one rectangle by 128 grey levels, so exactly
+    that rectangle's share of the frame has changed.
+    """
+    rng = np.random.default_rng(seed)
+    grey = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+    h, w = grey.shape; side = max(1, int(np.sqrt(changed_fraction * w * h)))
+    rw, rh = min(w, side), min(h, side)
+    x, y = int(rng.integers(0, w - rw + 1)), int(rng.integers(0, h - rh + 1))
+    current = grey.copy(); current[y:y + rh, x:x + rw] = (current[y:y + rh, x:x + rw].astype(np.int16) + 128) % 256
+    return add_noise(grey, rng, noise / 2), add_noise(current, rng, noise / 2), rw * rh / (w * h) * 100
@@ -0,0 +1,24 @@
+from app.detection import group_rectangles
+
+
+def cluster(x, y, size=20, spread=2):
+    return [[x + dx, y + dy, size, size] for dx in range(-spread, spread + 1) for dy in range(-spread, spread + 1)]
+
+
+def test_groups_overlapping_matches_and_drops_lone_ones():
+    rects = cluster(100, 100) + cluster(300, 40) + [[600, 600, 20, 20]]
+    assert sorted(group_rectangles(rects, group_threshold=1, eps=0.2)) == [[100, 100, 20, 20], [300, 40, 20, 20]]
+
+
+def test_similarity_is_transitive():
+    chain = [[x, 50, 20, 20] for x in range(0, 40, 4)] # Each box is within 4 px of the next, far from the ends
+    assert group_rectangles(chain, group_threshold=1, eps=0.2) == [[18, 50, 20, 20]]
+
+
+def test_weak_cluster_inside_a_strong_one_is_dropped():
+    big = cluster(100, 100, size=60, spread=2); small = [[115, 115, 20, 20], [116, 115, 20, 20]]
+    assert group_rectangles(big + small, group_threshold=1, eps=0.2) == [[100, 100, 60, 60]]
+
+
+def test_no_rects():
+    assert group_rectangles([], group_threshold=1, eps=0.2) == []
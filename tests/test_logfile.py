@@ -0,0 +1,40 @@
+import gzip
+import os
+
+from app.logfile import LogFileSink
+
+
+def rotated_files(directory):
+    return sorted(name for name in os.listdir(directory) if name != 'run.log')
+
+
+def read_lines(path):
+    opener = gzip.open if path.endswith('.gz') else open
+    with opener(path, 'rt') as f: return f.read().splitlines()
+
+
+def test_rotates_by_size_and_keeps_the_newest_backups(tmp_path):
+    sink = LogFileSink(str(tmp_path / 'run.log'), max_bytes=300, backups=2)
+    for n in range(60): sink.write(f"line {n:02d}")
+    sink.close()
+    assert sink.written == 60 and sink.rotations > 2
+    assert len(rotated_files(tmp_path)) == 2
+    assert os.path.getsize(tmp_path / 'run.log') <= 300
+    assert read_lines(str(tmp_path / 'run.log'))[-1].endswith("INFO    line 59")
+
+
+def test_compresses_rotated_files(tmp_path):
+    sink = LogFileSink(str(tmp_path / 'run.log'), max_bytes=300, compress=True, backups=10)
+    for n in range(30): sink.write(f"line {n:02d}")
+    sink.close()
+    names = rotated_files(tmp_path)
+    assert names and all(name.endswith('.log.gz') for name in names)
+    lines = [line for name in names for line in read_lines(str(tmp_path / name))] + read_lines(str(tmp_path / 'run.log'))
+    assert sorted(line[-7:] for line in lines) == [f"line {n:02d}" for n in range(30)]
+
+
+def test_drops_lines_below_the_minimum_level(tmp_path):
+    sink = LogFileSink(str(tmp_path / 'run.log'), min_level='WARNING')
+    sink.write("detail", 'DEBUG'); sink.write("fine"); sink.write("careful", 'WARNING'); sink.write("broken", 'ERROR')
+    sink.close()
+    assert [line.split(maxsplit=2)[2] for line in read_lines(str(tmp_path / 'run.log'))] == ["WARNING careful", "ERROR   broken"]
@@ -0,0 +1,47 @@
+import time
+
+import numpy as np
+
+from app.minimap import Minimap
+
+KINDS = ['color', 'png', 'location', 'logical', 'note']
+EDGES = [(0, 1), (1, 2), (2, 3), (3, 4), (4, 0)]
+
+
+def layout(moved=()):
+    nodes = [[n * 180.0, (n % 2) * 140.0, n * 180.0 + 120, (n % 2) * 140.0 + 60] for n in range(5)]
+    for index, dx, dy in moved: nodes[index] = [nodes[index][0] + dx, nodes[index][1] + dy, nodes[index][2] + dx, nodes[index][3] + dy]
+    return nodes
+
+
+def render(minimap, nodes):
+    result = minimap._render(nodes, KINDS, EDGES, '#21252B')
+    return None if result is None else np.asarray(result[0])
+
+
+def test_partial_render_equals_full_render():
+    minimap = Minimap(None, lambda x, y: None)
+    render(minimap, layout())
+    for moved in ([(2, 13.3, 7.9)], [(2, 40.0, 20.0), (3, -7.5, -3.25)]): # Moves that keep the fit the same
+        partial = render(minimap, layout(moved))
+        full = render(Minimap(None, lambda x, y: None), layout(moved))
+        assert np.array_equal(partial, full)
+    assert minimap.partial_renders == 2 and minimap.renders == 3
+
+
+def test_unchanged_snapshot_is_not_rendered_again():
+    minimap = Minimap(None, lambda x, y: None)
+    render(minimap, layout())
+    assert render(minimap, layout()) is None and minimap.renders == 1
+
+
+def test_failed_render_is_logged_and_the_thread_keeps_going():
+    messages = []; minimap = Minimap(None, lambda x, y: None, log=lambda message, color: messages.append((message, color)))
+    minimap.update([[0, 0, 1]], ['png'], [], '#000000') # Malformed node box
+    deadline = time.monotonic() + 5
+    while minimap.error is None and time.monotonic() < deadline: time.sleep(0.01)
+    minimap.update(layout(), KINDS, EDGES, '#21252B')
+    image, transform = minimap._results.get(timeout=5)
+    minimap.stop()
+    assert image.size == (minimap.width, minimap.height)
+    assert len(messages) == 1 and messages[0][1] == 'red' and isinstance(minimap.error, ValueError)
@@ -0,0 +1,72 @@
+import pytest
+
+from app.plan import PlanError, parse_comparison, parse_condition, predicate_name, resolve_successor
+
+
+@pytest.mark.parametrize('expression, value, expected', [
+    ('>= 5', 5, True), ('>= 5', 4, False), ('> 1', 1, False), ('< 3', 2, True),
+    ('<= 2', 3, False), ('== 0', 0, True), ('!= 0', 0, False),
+])
+def test_parse_comparison(expression, value, expected):
+    assert parse_comparison(expression)(value) is expected
+
+
+def test_parse_comparison_value_type():
+    compare = parse_comparison('> 1.5', float)
+    assert compare.value == 1.5 and compare(2.0) and not compare(1.5)
+    assert str(compare) == '> 1.5'
+
+
+@pytest.mark.parametrize('expression', ['', '>=5', '>= 5 6', '=> 5', '>= five'])
+def test_parse_comparison_rejects_malformed(expression):
+    with pytest.raises(ValueError):
+        parse_comparison(expression)
+
+
+@pytest.mark.parametrize('expression, expected', [
+    ('A', ('pred', 0)),
+    ('A || B && !C', ('or', [('pred', 0), ('and', [('pred', 1), ('not', ('pred', 2))])])),
+    ('(a or b) and not c', ('and', [('or', [('pred', 0), ('pred', 1)]), ('not', ('pred', 2))])),
+])
+def test_parse_condition(expression, expected):
+    assert parse_condition(expression, 3) == expected
+
+
+@pytest.mark.parametrize('expression', ['', 'A and', 'A D', '(A', 'A)', 'A and D', 'A + B', 'not'])
+def test_parse_condition_rejects_malformed(expression):
+    with pytest.raises(ValueError):
+        parse_condition(expression, 3)
+
+
+def test_predicate_name():
+    assert [predicate_name(n) for n in (0, 25, 26)] == ['A', 'Z', 'P27']
+    assert parse_condition('P27', 27) == ('pred', 26)
+
+
+STEPS = [
+    {'on_success_action': 'Next Step'},
+    {'on_success_action': 'Go to Step', 'on_success_goto_step': 1},
+    {'on_success_action': 'Stop'},
+    {},
+]
+
+
+@pytest.mark.parametrize('index, expected', [(0, 1), (1, 0), (2, None), (3, None)])
+def test_resolve_successor(index, expected):
+    assert resolve_successor(STEPS, index, 'on_success_action', 'on_success_goto_step') == expected
+
+
+def test_resolve_successor_runs_off_the_end():
+    assert resolve_successor([{'on_success_action': 'Next Step'}], 0, 'on_success_action', 'on_success_goto_step') == 1
+
+
+@pytest.mark.parametrize('step', [
+    {'on_success_action': 'Go to Step', 'on_success_goto_step': 3},
+    {'on_success_action': 'Go to Step', 'on_success_goto_step': 0},
+    {'on_success_action': 'Go to Step', 'on_success_goto_step': 'two'},
+    {'on_success_action': 'Jump'},
+])
+def test_resolve_successor_rejects_bad_gotos(step):
+    with pytest.raises(PlanError) as error:
+        resolve_successor([step, {}], 0, 'on_success_action', 'on_success_goto_step')
+    assert error.value.index == 0 and str(error.value).startswith("Step 1: ")
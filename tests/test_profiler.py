@@ -0,0 +1,39 @@
+import random
+
+import pytest
+
+from app.profiler import LatencyHistogram
+
+
+def test_small_values_have_their_own_buckets():
+    for micros in range(1 << LatencyHistogram.SUB_BITS):
+        assert LatencyHistogram._bucket(micros) == micros == LatencyHistogram._bucket_high(micros)
+
+
+def test_buckets_are_ordered_and_bound_their_values():
+    previous = -1
+    for micros in range(1, 5_000_000, 997):
+        index = LatencyHistogram._bucket(micros)
+        assert index >= previous; previous = index
+        high = LatencyHistogram._bucket_high(index)
+        # The bucket holds micros, its highest value is within 1/16 of it and the next value starts a new bucket
+        assert micros <= high <= micros * (1 + 1 / 16)
+        assert LatencyHistogram._bucket(high) == index and LatencyHistogram._bucket(high + 1) == index + 1
+
+
+def test_percentiles_are_within_the_bucket_error():
+    histogram = LatencyHistogram(); values = [random.Random(n).uniform(0.0005, 2.0) for n in range(2000)]
+    for value in values: histogram.record(value)
+    values.sort()
+    for p in (1, 50, 90, 99):
+        exact = values[max(0, -(-p * len(values) // 100) - 1)]
+        assert exact <= histogram.percentile(p) <= exact * (1 + 1 / 16) + 1e-6
+    assert histogram.percentile(100) == histogram.max == values[-1]
+    assert histogram.count == len(values) and histogram.total == pytest.approx(sum(values))
+
+
+def test_percentile_of_an_empty_histogram_and_negative_samples():
+    histogram = LatencyHistogram()
+    assert histogram.percentile(50) == 0.0
+    histogram.record(-1.0)
+    assert histogram.count == 1 and histogram.percentile(50) == 0.0
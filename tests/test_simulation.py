@@ -0,0 +1,46 @@
+import json
+
+from app.run import main
+
+STEPS = [
+    {'name': 'click', 'type': 'location', 'action': 'Left Click', 'coords': [100, 200], 'delay_after': 0, 'on_success_action': 'Next Step'},
+    {'name': 'find', 'type': 'color', 'action': 'Left Click', 'rgb': [255, 0, 0], 'tolerance': 10, 'color_space': 'HSV', 'min_pixel_area': 10,
+     'area': [0, 0, 50, 50], 'timeout': 2, 'on_timeout_action': 'Stop', 'delay_after': 0, 'on_success_action': 'Next Step'},
+    {'name': 'wait', 'type': 'logical', 'logical_type': 'Wait', 'max_time': 5, 'delay_after': 0, 'on_success_action': 'Next Step'},
+]
+
+
+def simulate(tmp_path, capsys, script=None, steps=STEPS):
+    chart = tmp_path / 'chart.json'
+    chart.write_text(json.dumps({'global_settings': {'mouse_speed': 0, 'hold_duration': 0.01, 'speed_variance': 0, 'hold_duration_variance': 0,
+                                                     'loc_offset_variance': 0}, 'steps': steps}))
+    argv = [str(chart), '--simulate']
+    if script is not None:
+        (tmp_path / 'script.json').write_text(json.dumps(script)); argv.append(str(tmp_path / 'script.json'))
+    exit_code = main(argv)
+    events = [json.loads(line) for line in capsys.readouterr().out.splitlines()]
+    return exit_code, {e['event']: e for e in events}
+
+
+def test_simulated_run_completes_on_the_virtual_clock(tmp_path, capsys):
+    exit_code, events = simulate(tmp_path, capsys)
+    assert exit_code == 0
+    assert events['stopped']['status'] == "Status: Completed all steps"
+    assert events['simulation']['virtual_s'] >= 5 > events['simulation']['wall_s']
+    assert events['simulation']['actions'] == {'move': 2, 'click': 2}
+
+
+def test_outcome_script_drives_a_step_to_its_timeout(tmp_path, capsys):
+    exit_code, events = simulate(tmp_path, capsys, {'steps': {'2': False}})
+    assert exit_code == 0
+    assert events['stopped']['status'] == "Status: Stopped on timeout at Step 2"
+    assert events['stopped']['elapsed'] == 2.0
+    assert events['simulation']['actions'] == {'move': 1, 'click': 1}
+
+
+def test_plan_errors_stop_the_run_before_it_starts(tmp_path, capsys):
+    read = {'name': 'read', 'type': 'number', 'area': [0, 0, 50, 50], 'expression': '>= x', 'delay_after': 0, 'on_success_action': 'Next Step'}
+    exit_code, events = simulate(tmp_path, capsys, steps=STEPS + [read])
+    assert exit_code == 2
+    assert events['error']['title'] == "Invalid Flowchart" and events['error']['message'].startswith("Step 4: ")
+    assert 'stopped' not in events
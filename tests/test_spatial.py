@@ -0,0 +1,50 @@
+import random
+
+import pytest
+
+from app.spatial import GridIndex
+
+
+def random_box(rng, size=600):
+    x, y = rng.uniform(-2000, 6000), rng.uniform(-2000, 6000)
+    return (x, y, x + rng.uniform(0, size), y + rng.uniform(0, size))
+
+
+def intersects(a, b): return a[0] <= b[2] and a[2] >= b[0] and a[1] <= b[3] and a[3] >= b[1]
+
+
+@pytest.fixture
+def indexed():
+    rng = random.Random(7); index = GridIndex(cell=256); boxes = {}
+    for n in range(400):
+        key = ('step', n); boxes[key] = random_box(rng); index.insert(key, boxes[key])
+    for n in range(0, 400, 3): # Move some, drop others
+        key = ('step', n)
+        if n % 2: boxes[key] = random_box(rng); index.insert(key, boxes[key])
+        else: del boxes[key]; index.remove(key)
+    return index, boxes, rng
+
+
+def test_query_and_enclosed_match_a_brute_force_scan(indexed):
+    index, boxes, rng = indexed
+    assert len(index) == len(boxes)
+    for size in (0, 50, 800, 20000): # Down to a point and up to more cells than boxes
+        for _ in range(50):
+            box = random_box(rng, size)
+            assert index.query(box) == {key for key, b in boxes.items() if intersects(b, box)}
+            assert index.enclosed(box) == {key for key, b in boxes.items() if box[0] <= b[0] and b[2] <= box[2] and box[1] <= b[1] and b[3] <= box[3]}
+
+
+def test_hit_matches_a_brute_force_scan(indexed):
+    index, boxes, rng = indexed
+    for _ in range(200):
+        x, y, tolerance = rng.uniform(-2000, 6600), rng.uniform(-2000, 6600), rng.choice((0, 3))
+        assert index.hit(x, y, tolerance) == {key for key, b in boxes.items() if b[0] - tolerance <= x <= b[2] + tolerance and b[1] - tolerance <= y <= b[3] + tolerance}
+
+
+def test_bounds_by_kind():
+    index = GridIndex()
+    index.insert(('step', 0), (0, 0, 10, 10)); index.insert(('note', 0), (-50, 5, -40, 300))
+    assert index.bounds() == (-50, 0, 10, 300) and index.bounds(('step',)) == (0, 0, 10, 10) and index.bounds(('edge',)) is None
+    index.clear()
+    assert len(index) == 0 and index.query((-100, -100, 100, 100)) == set()
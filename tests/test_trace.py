@@ -0,0 +1,32 @@
+import numpy as np
+import pytest
+
+from app.trace import ACTION, DETECTION, STEP_ENTER, STEP_EXIT, TraceRecorder, event_to_dict, read_trace
+
+
+def record_run(trace):
+    trace.record(STEP_ENTER, 0, value=5.0)
+    trace.record(DETECTION, 0, 1, x=120, y=-40, value=0.93)
+    trace.record(ACTION, 0, 1, x=120, y=-40)
+    trace.record(STEP_EXIT, 0, 0, 1, value=0.25)
+
+
+@pytest.mark.parametrize('name, fmt', [('run.jsonl', 'jsonl'), ('run.bin', 'binary')])
+def test_written_trace_reads_back(tmp_path, name, fmt):
+    clock = iter(range(100)).__next__
+    trace = TraceRecorder(clock=lambda: float(clock()))
+    trace.record(STEP_ENTER, 9) # Before the file was opened: not written
+    trace.open(tmp_path / name, fmt); record_run(trace); trace.close()
+    events = read_trace(tmp_path / name)
+    assert np.array_equal(events, trace.snapshot()[1:])
+    assert [event_to_dict(e)['event'] for e in events] == ['step_enter', 'detection', 'action', 'step_exit']
+    assert event_to_dict(events[1]) == {'t': 2.0, 'event': 'detection', 'code': 1, 'step': 0, 'target': -1, 'x': 120, 'y': -40, 'value': 0.93}
+
+
+def test_events_overwritten_before_a_flush_are_counted_as_dropped(tmp_path):
+    trace = TraceRecorder(capacity=4, flush_interval=60)
+    trace.open(tmp_path / 'run.jsonl')
+    for n in range(10): trace.record(DETECTION, n)
+    trace.close()
+    assert trace.dropped == 6
+    assert list(read_trace(tmp_path / 'run.jsonl')['step']) == [6, 7, 8, 9]